@@ -0,0 +1,85 @@
+import functools
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from .helpers import compute_etag, get_versions
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+
+def response_cache_key(etag):
+    return f'api:response:{etag.strip(chr(34))}'
+
+
+def conditional(tags_func, per_user=False, vary_func=None, cache=False):
+    """
+    GET condizionale per le view JSON di sola lettura: ETag e Last-Modified vengono calcolati dai
+    contatori ResourceVersion dei tag ritornati da `tags_func(request, *args, **kwargs)` e, se il client
+    ha già la versione corrente (If-None-Match / If-Modified-Since), la view risponde 304 senza
+    eseguire le query e la serializzazione del corpo.
+
+    `tags_func` può ritornare None per saltare il controllo (es. parametri mancanti: la view risponde 400).
+    Se la risposta cambia a seconda di chi la chiede, `vary_func(request, *args, **kwargs)` ritorna ciò da
+    cui dipende (es. i ruoli dell'utente nella conferenza); `per_user` equivale a variare su request.user.
+    Entrambi richiedono request.user, quindi il decoratore va messo sotto @get_user. Queste view usano
+    solo l'ETag: Last-Modified viene dai contatori condivisi tra tutti gli utenti, quindi un
+    If-Modified-Since ottenuto da un altro utente darebbe un 304 valido per dati diversi.
+
+    Con `cache` le risposte 200 vengono salvate nella cache 'responses' con l'ETag come chiave: una
+    modifica a una delle risorse incrementa il suo contatore, quindi cambia l'ETag e le vecchie voci
+    non vengono più lette (e scadono dopo API_RESPONSE_CACHE_SECONDS).
+    """
+    if per_user:
+        vary_func = lambda request, *args, **kwargs: request.user.id  # noqa: E731
+
+    def decorator(func):
+        def validators(request, *args, **kwargs):
+            # etag_func e last_modified_func vengono chiamate entrambe: i contatori si leggono una volta sola
+            cached = getattr(request, '_conditional_validators', None)
+            if cached is not None:
+                return cached
+            tags = tags_func(request, *args, **kwargs)
+            if tags is None:
+                cached = (None, None)
+            else:
+                versions = get_versions(tags)
+                vary = vary_func(request, *args, **kwargs) if vary_func else None
+                query_string = '&'.join(sorted(request.GET.urlencode().split('&')))
+                etag = compute_etag(func.__name__, tags, versions, query_string, vary)
+                last_modified = None
+                if vary_func is None:
+                    last_modified = max((updated_at for _, updated_at in versions.values()), default=None)
+                cached = (etag, last_modified)
+            request._conditional_validators = cached
+            return cached
+
+        @functools.wraps(func)
+        @condition(
+            etag_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[0],
+            last_modified_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[1],
+        )
+        def wrapper(request, *args, **kwargs):
+            etag = validators(request, *args, **kwargs)[0]
+            if not cache or etag is None:
+                return func(request, *args, **kwargs)
+
+            response_cache = caches[RESPONSE_CACHE_ALIAS]
+            key = response_cache_key(etag)
+            entry = response_cache.get(key)
+            if entry is not None:
+                content_type, content = entry
+                return HttpResponse(content, content_type=content_type)
+
+            response = func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                response_cache.set(
+                    key, (response['Content-Type'], response.content),
+                    getattr(settings, 'API_RESPONSE_CACHE_SECONDS', 300)
+                )
+            return response
+
+        return wrapper
+    return decorator
@@ -0,0 +1,64 @@
+import hashlib
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ResourceVersion
+
+
+def as_int(value):
+    """Intero da un valore JSON (numero o stringa di cifre), o None: booleani e decimali non sono id validi."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+
+def bump_versions(tags):
+    """
+    Incrementa i contatori di `tags` (creandoli se mancano). Va chiamata nella transazione che
+    modifica i dati, così un client non può ricevere il nuovo ETag insieme ai vecchi dati.
+    """
+    tags = set(tags)
+    if not tags:
+        return
+    now = timezone.now()
+    updated = ResourceVersion.objects.filter(key__in=tags).update(version=F('version') + 1, updated_at=now)
+    if updated == len(tags):
+        return
+    # Prima modifica di qualche risorsa: crea i contatori mancanti e li incrementa. ignore_conflicts
+    # gestisce le creazioni concorrenti, che vengono comunque contate dall'UPDATE successivo
+    missing = tags - set(ResourceVersion.objects.filter(key__in=tags).values_list('key', flat=True))
+    ResourceVersion.objects.bulk_create(
+        [ResourceVersion(key=tag, updated_at=now) for tag in missing], ignore_conflicts=True
+    )
+    ResourceVersion.objects.filter(key__in=missing).update(version=F('version') + 1, updated_at=now)
+
+
+def get_versions(tags):
+    """Ritorna {tag: (version, updated_at)} con una sola query; i tag mai modificati non compaiono."""
+    return {
+        key: (version, updated_at)
+        for key, version, updated_at in ResourceVersion.objects.filter(key__in=set(tags)).values_list(
+            'key', 'version', 'updated_at'
+        )
+    }
+
+
+def compute_etag(view_name, tags, versions, query_string='', vary=None):
+    """
+    ETag forte dell'insieme di versioni: cambia quando cambia almeno una delle risorse (o i parametri).
+    Anche l'istante dell'ultima modifica entra nell'hash, così un contatore ricreato (es. dopo il
+    ripristino del database) non può riprodurre un ETag già visto con dati diversi.
+    """
+    parts = [view_name, '' if vary is None else repr(vary), query_string]
+    for tag in sorted(set(tags)):
+        version, updated_at = versions.get(tag, (0, None))
+        parts.append(f'{tag}={version}@{updated_at.isoformat() if updated_at else ""}')
+    return '"' + hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest() + '"'
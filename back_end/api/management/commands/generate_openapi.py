@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.schema import SCHEMA_DECORATORS, schema_file, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera il documento OpenAPI di tutte le view e lo salva in API_SCHEMA_FILE, da dove /swagger.json "
+        "lo serve come file statico. Va eseguito a ogni build/deploy, con i decoratori attivi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', metavar='FILE', help='File di destinazione (default: API_SCHEMA_FILE)')
+
+    def handle(self, *args, **options):
+        if not SCHEMA_DECORATORS:
+            raise CommandError("API_SCHEMA_DECORATORS is disabled: the views carry no schema to generate from")
+        path, content = write_schema(options['output'] or schema_file())
+        self.stdout.write(f"OpenAPI schema written to {path} ({len(content)} bytes)")
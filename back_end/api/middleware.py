@@ -0,0 +1,82 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # brotli è opzionale: senza si negozia solo gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+_accept_encoding_re = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def _accepted_encodings(header):
+    """Codifiche di Accept-Encoding con il relativo peso q (quelle con q=0 sono escluse)."""
+    encodings = {}
+    for part in header.split(','):
+        match = _accept_encoding_re.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        encodings[match.group(1).lower()] = quality
+    return {name: quality for name, quality in encodings.items() if quality > 0}
+
+
+def choose_encoding(header):
+    """Ritorna 'br', 'gzip' o None in base all'header Accept-Encoding, preferendo brotli a parità di peso."""
+    accepted = _accepted_encodings(header or '')
+    wildcard = accepted.get('*', 0)
+    candidates = (['br'] if brotli else []) + ['gzip']
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'API_COMPRESSION_BROTLI_QUALITY', 5))
+    # mtime=0: stesso input, stessi byte (gli ETag calcolati sul contenuto restano stabili)
+    return gzip.compress(content, compresslevel=getattr(settings, 'API_COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Comprime con brotli o gzip, secondo l'Accept-Encoding del client, le risposte JSON e testuali
+    più grandi di API_COMPRESSION_MIN_SIZE byte. Le risposte in streaming (stream SSE delle notifiche,
+    PDF serviti con FileResponse) non vengono toccate: comprimerle ne ritarderebbe l'invio.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        if len(response.content) < getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        # Come GZipMiddleware: l'ETag di un corpo compresso non è più byte per byte quello dell'originale
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class ResourceVersion(models.Model):
+    """
+    Contatore di modifiche di una risorsa (es. 'conference:3', 'paper:12'), incrementato dai signal
+    in api/signals.py nella stessa transazione della scrittura. Gli ETag delle view @conditional
+    vengono calcolati da questi contatori senza serializzare la risposta.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
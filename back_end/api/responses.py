@@ -0,0 +1,51 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+
+try:
+    import orjson
+except ImportError:  # orjson è opzionale: senza si usa l'encoder della libreria standard
+    orjson = None
+
+_default_encoder = DjangoJSONEncoder()
+
+# Date e orari passano comunque da DjangoJSONEncoder: il formato resta identico a quello dell'encoder standard
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson else 0
+)
+
+
+def fast_json_enabled():
+    return orjson is not None and getattr(settings, 'API_FAST_JSON', True)
+
+
+def dumps(data):
+    """Serializza `data` in bytes UTF-8 con orjson se disponibile, altrimenti con json.dumps."""
+    if fast_json_enabled():
+        try:
+            return orjson.dumps(data, default=_default_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Casi non supportati da orjson (es. interi oltre 64 bit): si riprova con l'encoder standard
+            pass
+    return json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+class JsonResponse(DjangoJsonResponse):
+    """
+    Stessa interfaccia di django.http.JsonResponse, ma il corpo viene serializzato con `dumps`.
+    Con un encoder personalizzato o con json_dumps_params si comporta esattamente come quella di Django.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if encoder is not DjangoJSONEncoder or json_dumps_params:
+            super().__init__(data, encoder=encoder, safe=safe, json_dumps_params=json_dumps_params, **kwargs)
+            return
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the safe parameter to False."
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        HttpResponse.__init__(self, content=dumps(data), **kwargs)
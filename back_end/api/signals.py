@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+
+from assign_paper_reviewers.models import PaperReviewAssignment
+from comments.models import Comment
+from conference.models import Conference
+from conference_roles.models import ConferenceRole
+from papers.models import Paper
+from reviews.models import Review, ReviewItem, ReviewTemplateItem
+from users.models import User
+from .helpers import bump_versions
+
+
+def _review_paper_tags(review_id):
+    paper_id = Review.objects.filter(id=review_id).values_list('paper_id', flat=True).first()
+    return [f'paper:{paper_id}'] if paper_id else []
+
+
+# Tag (vedi api.decorators.conditional) che una modifica di ogni modello rende obsoleti:
+# 'conferences' per le liste di conferenze, 'conference:<id>' per i dati di una conferenza
+# (paper, ruoli, template, stato), 'paper:<id>' per review, item e commenti di un paper,
+# 'user:<id>' per i ruoli di un utente, 'users' per nomi ed email mostrati nelle risposte
+RESOURCE_TAGS = {
+    Conference: lambda instance: ['conferences', f'conference:{instance.pk}'],
+    ReviewTemplateItem: lambda instance: ['conferences', f'conference:{instance.conference_id}'],
+    ConferenceRole: lambda instance: [f'conference:{instance.conference_id}', f'user:{instance.user_id}'],
+    Paper: lambda instance: [f'conference:{instance.conference_id}', f'paper:{instance.pk}'],
+    PaperReviewAssignment: lambda instance: [f'conference:{instance.conference_id}', f'paper:{instance.paper_id}'],
+    Review: lambda instance: [f'paper:{instance.paper_id}'],
+    ReviewItem: lambda instance: _review_paper_tags(instance.review_id),
+    Comment: lambda instance: _review_paper_tags(instance.review_id),
+    User: lambda instance: ['users'],
+}
+
+
+def resource_changed(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if sender is User and update_fields and set(update_fields) <= {'last_login', 'password'}:
+        # Login e cambio password non modificano dati mostrati dalle view
+        return
+    bump_versions(RESOURCE_TAGS[sender](instance))
+
+
+for model in RESOURCE_TAGS:
+    post_save.connect(resource_changed, sender=model, dispatch_uid=f'api_version_save_{model._meta.label_lower}')
+    post_delete.connect(resource_changed, sender=model, dispatch_uid=f'api_version_delete_{model._meta.label_lower}')
@@ -0,0 +1,554 @@
+import datetime
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from comments.models import Comment
+from conference.models import Conference
+from conference.teardown import teardown_conference
+from conference_roles.models import ConferenceRole
+from papers.models import Paper
+from reviews.models import Review, ReviewItem, ReviewTemplateItem
+from users.models import User
+from . import middleware, responses
+from .decorators import RESPONSE_CACHE_ALIAS
+from .helpers import bump_versions, get_versions
+from .middleware import CompressionMiddleware, choose_encoding
+from .responses import JsonResponse, dumps
+from .schema import get_schema_document
+from .throttling import RATE_LIMIT_CACHE_ALIAS, acquire_slot, parse_rate, rate_limit, release_slot, take_token
+
+
+class JsonResponseTests(SimpleTestCase):
+    payload = {
+        "id": 1,
+        "title": "Conferenza è",
+        "created_at": datetime.datetime(2024, 11, 19, 10, 59, 22, 123456, tzinfo=datetime.timezone.utc),
+        "deadline": datetime.date(2024, 12, 1),
+        "score": Decimal("3.50"),
+        "by_id": {1: "one"},
+        "items": [None, True, 1.5],
+    }
+
+    def test_same_document_as_stdlib_encoder(self):
+        expected = json.loads(json.dumps(self.payload, cls=DjangoJSONEncoder))
+        self.assertEqual(json.loads(dumps(self.payload)), expected)
+        # Le date mantengono il formato di DjangoJSONEncoder
+        self.assertEqual(expected["created_at"], "2024-11-19T10:59:22.123Z")
+
+    @override_settings(API_FAST_JSON=False)
+    def test_stdlib_fallback(self):
+        self.assertEqual(dumps({"a": 1}), b'{"a": 1}')
+
+    @unittest.skipIf(responses.orjson is None, "orjson not installed")
+    def test_orjson_used_when_available(self):
+        self.assertEqual(dumps({"a": 1}), b'{"a":1}')
+
+    def test_huge_integers_fall_back_to_stdlib(self):
+        self.assertEqual(json.loads(dumps({"n": 2 ** 70})), {"n": 2 ** 70})
+
+    def test_response(self):
+        response = JsonResponse(self.payload, status=201)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(response.content)["title"], "Conferenza è")
+
+    def test_safe(self):
+        with self.assertRaises(TypeError):
+            JsonResponse([1, 2])
+        self.assertEqual(json.loads(JsonResponse([1, 2], safe=False).content), [1, 2])
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = json.dumps([{"id": i, "title": f"Paper {i}", "status": "submitted"} for i in range(200)]).encode()
+
+    def _response(self, accept_encoding=None, response=None):
+        request = RequestFactory().get('/', **({'HTTP_ACCEPT_ENCODING': accept_encoding} if accept_encoding else {}))
+        if response is None:
+            response = HttpResponse(self.body, content_type='application/json')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        response = self._response('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    @unittest.skipIf(middleware.brotli is None, "brotli not installed")
+    def test_brotli_preferred(self):
+        response = self._response('gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), self.body)
+
+    def test_no_accept_encoding(self):
+        response = self._response()
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.body)
+
+    def test_small_response_not_compressed(self):
+        response = self._response('gzip', HttpResponse(b'{"message": "ok"}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_streaming_and_binary_responses_not_compressed(self):
+        streaming = self._response('gzip', StreamingHttpResponse(iter([self.body]), content_type='text/event-stream'))
+        pdf = self._response('gzip', HttpResponse(self.body, content_type='application/pdf'))
+        self.assertFalse(streaming.has_header('Content-Encoding'))
+        self.assertFalse(pdf.has_header('Content-Encoding'))
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip;q=0.5, identity'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, br;q=0'))
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertEqual(choose_encoding('*'), 'br' if middleware.brotli else 'gzip')
+        self.assertEqual(choose_encoding('br;q=0.1, gzip'), 'gzip')
+
+
+class CompressedEndpointTests(TestCase):
+    def test_conference_list_is_compressed(self):
+        admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        Conference.objects.bulk_create([
+            Conference(title=f"Conference {i}", admin_id=admin, description="Description " * 5,
+                       deadline=timezone.now() + timezone.timedelta(days=7))
+            for i in range(30)
+        ])
+
+        response = self.client.get(reverse('get_conferences'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['conferences']), 20)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        self.reviewer = User.objects.create(first_name="Reviewer", last_name="User", email="reviewer@example.com", password="x")
+        self.conference = self._conference("Conference")
+        self.other = self._conference("Other Conference")
+        self.paper = Paper.objects.create(title="Paper", conference=self.conference, author_id=self.admin, status_id='submitted')
+        self.review = Review.objects.create(paper=self.paper, user=self.reviewer, comment_text="Good", score=3, confidence_level=2)
+        self._login(self.admin)
+
+    def _conference(self, title):
+        conference = Conference.objects.create(
+            title=title, admin_id=self.admin, description="Description",
+            deadline=timezone.now() + timezone.timedelta(days=7)
+        )
+        ConferenceRole.objects.create(user=self.admin, conference=conference, role='admin')
+        return conference
+
+    def _login(self, user):
+        self.client.force_login(user)
+        session = self.client.session
+        session['_auth_user_id'] = user.id
+        session.save()
+
+    def _revalidate(self, url):
+        """Richiesta iniziale seguita da una condizionale: ritorna (ETag, risposta condizionale)."""
+        etag = self.client.get(url)['ETag']
+        return etag, self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified_skips_serialization(self):
+        self.client.logout()
+        url = reverse('get_conferences')
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # Solo la lettura dei contatori: nessuna query sulle conferenze
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_etag_depends_on_query_params(self):
+        url = reverse('get_conferences')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url + '?page=2', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_conference_changes_invalidate_lists(self):
+        for url in (reverse('get_conferences'), reverse('get_user_conferences')):
+            etag, response = self._revalidate(url)
+            self.assertEqual(response.status_code, 304)
+
+            ReviewTemplateItem.objects.create(
+                conference=self.conference, label="Originality", description="", has_comment=True, has_score=True
+            )
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_role_changes_invalidate_user_conferences(self):
+        self._login(self.reviewer)
+        url = reverse('get_user_conferences')
+        etag, response = self._revalidate(url)
+        self.assertEqual(response.status_code, 304)
+
+        ConferenceRole.objects.create(user=self.reviewer, conference=self.other, role='reviewer')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_papers_invalidated_per_conference(self):
+        url = reverse('get_all_papers', args=[self.conference.id])
+        etag, response = self._revalidate(url)
+        self.assertEqual(response.status_code, 304)
+
+        Paper.objects.create(title="Elsewhere", conference=self.other, author_id=self.admin, status_id='submitted')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Paper.objects.create(title="New", conference=self.conference, author_id=self.admin, status_id='submitted')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_paper_reviews_invalidated_by_comments_and_per_user(self):
+        url = f"{reverse('get_paper_reviews')}?paper_id={self.paper.id}"
+        etag, response = self._revalidate(url)
+        self.assertEqual(response.status_code, 304)
+
+        # La risposta dipende dai ruoli dell'utente: un altro utente non può riusare l'ETag
+        self._login(self.reviewer)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self._login(self.admin)
+        Comment.objects.create(user=self.admin, review=self.review, comment_text="Thanks")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_missing_paper_id_is_not_conditional(self):
+        response = self.client.get(reverse('get_paper_reviews'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_last_modified(self):
+        url = reverse('get_conferences')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_per_user_views_send_only_etag(self):
+        # Last-Modified è condiviso tra gli utenti: If-Modified-Since non deve produrre un 304
+        last_modified = self.client.get(reverse('get_conferences'))['Last-Modified']
+        for url in (reverse('get_user_conferences'), f"{reverse('get_paper_reviews')}?paper_id={self.paper.id}"):
+            response = self.client.get(url)
+            self.assertTrue(response.has_header('ETag'))
+            self.assertFalse(response.has_header('Last-Modified'))
+            self._login(self.reviewer)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+            self._login(self.admin)
+
+    def test_teardown_invalidates(self):
+        url = reverse('get_conferences')
+        etag = self.client.get(url)['ETag']
+
+        teardown_conference(self.other.id)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bump_versions(self):
+        bump_versions(['test:1', 'test:2'])
+        bump_versions(['test:1'])
+        versions = get_versions(['test:1', 'test:2', 'test:3'])
+        self.assertEqual(versions['test:1'][0], 2)
+        self.assertEqual(versions['test:2'][0], 1)
+        self.assertNotIn('test:3', versions)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        self.chair = User.objects.create(first_name="Chair", last_name="User", email="chair@example.com", password="x")
+        self.reviewer = User.objects.create(first_name="Reviewer", last_name="User", email="reviewer@example.com", password="x")
+        self.conference = Conference.objects.create(
+            title="Conference", admin_id=self.admin, description="Description",
+            deadline=timezone.now() + timezone.timedelta(days=7)
+        )
+        for user in (self.admin, self.chair):
+            ConferenceRole.objects.create(user=user, conference=self.conference, role='admin')
+        ConferenceRole.objects.create(user=self.reviewer, conference=self.conference, role='reviewer')
+        self.paper = Paper.objects.create(title="Paper", conference=self.conference, author_id=self.admin, status_id='submitted')
+        self.review = Review.objects.create(paper=self.paper, user=self.reviewer, comment_text="Good", score=3, confidence_level=2)
+        self.url = f"{reverse('get_paper_reviews')}?paper_id={self.paper.id}"
+
+    def _login(self, user):
+        self.client.force_login(user)
+        session = self.client.session
+        session['_auth_user_id'] = user.id
+        session.save()
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, len(queries.captured_queries)
+
+    def test_second_request_served_from_cache(self):
+        self._login(self.admin)
+        first, first_queries = self._get(self.url)
+        second, second_queries = self._get(self.url)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertLess(second_queries, first_queries)
+
+    def test_writes_invalidate_cached_responses(self):
+        self._login(self.admin)
+        self._get(self.url)
+
+        ReviewItem.objects.create(
+            review=self.review, comment="Ok", score=3,
+            templateItem=ReviewTemplateItem.objects.create(
+                conference=self.conference, label="Originality", description="", has_comment=True, has_score=True
+            )
+        )
+        response, _ = self._get(self.url)
+        self.assertEqual(len(json.loads(response.content)["reviews"][0]["reviewItems"]), 1)
+
+        Comment.objects.create(user=self.admin, review=self.review, comment_text="Thanks")
+        response, _ = self._get(self.url)
+        self.assertEqual(len(json.loads(response.content)["reviews"][0]["comments"]), 1)
+
+        self.review.delete()
+        response, _ = self._get(self.url)
+        self.assertEqual(json.loads(response.content)["reviews"], [])
+
+    def test_cache_shared_by_role(self):
+        self._login(self.admin)
+        _, admin_queries = self._get(self.url)
+
+        # Stessi ruoli: la risposta viene dalla cache
+        self._login(self.chair)
+        chair, chair_queries = self._get(self.url)
+        self.assertLess(chair_queries, admin_queries)
+
+        # Ruoli diversi: risposta calcolata a parte
+        self._login(self.reviewer)
+        reviewer, _ = self._get(self.url)
+        self.assertNotEqual(reviewer['ETag'], chair['ETag'])
+
+    def test_errors_are_not_cached(self):
+        url = reverse('get_all_papers', args=[999])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # bulk_create non incrementa i contatori: l'ETag resta lo stesso della risposta 404
+        Conference.objects.bulk_create([Conference(
+            id=999, title="Late", admin_id=self.admin, description="", deadline=timezone.now() + timezone.timedelta(days=7)
+        )])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class OpenAPISchemaTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'openapi.json')
+        settings_override = override_settings(API_SCHEMA_FILE=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_generated_document_is_served_with_etag(self):
+        call_command('generate_openapi', stdout=io.StringIO())
+        with open(self.path, 'rb') as f:
+            document = json.load(f)
+        self.assertIn('/conference/list/', document['paths'])
+
+        response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), document)
+        self.assertIn('no-cache', response['Cache-Control'])
+        not_modified = self.client.get(reverse('openapi-schema'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        # Un nuovo deploy riscrive il file: cambia l'ETag senza riavviare i worker
+        with open(self.path, 'w') as f:
+            json.dump({'swagger': '2.0', 'paths': {}}, f)
+        os.utime(self.path, ns=(1, 1))
+        response = self.client.get(reverse('openapi-schema'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['paths'], {})
+
+    def test_document_is_generated_once_without_the_file(self):
+        first = get_schema_document()
+        self.assertIs(get_schema_document(), first)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_ui_pages_load_the_static_document(self):
+        for name in ('schema-swagger-ui', 'schema-redoc'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(reverse('openapi-schema'), response.content.decode())
+
+    def test_decorators_disabled(self):
+        # In un processo nuovo: la modalità viene scelta all'import delle view
+        code = (
+            "import os, sys, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back_end.settings'); "
+            "django.setup(); import back_end.urls; from conference.views import get_conferences; "
+            "print(any(name.startswith('drf_yasg.') for name in sys.modules), hasattr(get_conferences, '_swagger_auto_schema'))"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                env=dict(os.environ, API_SCHEMA_DECORATORS='false'))
+        self.assertEqual(result.stdout.strip(), 'False False')
+
+
+def rate_limit_count(client, scope, outcome):
+    """Valore del contatore esposto su /metrics."""
+    prefix = f'rate_limit_requests_total{{scope="{scope}",outcome="{outcome}"}} '
+    with override_settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+        text = client.get('/metrics').content.decode()
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0
+
+
+class RateLimitTests(TestCase):
+    url = '/conference/automatic_assign_reviewers/'
+
+    def setUp(self):
+        self.cache = caches[RATE_LIMIT_CACHE_ALIAS]
+        self.factory = RequestFactory()
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        self.other = User.objects.create(first_name="Other", last_name="User", email="other@example.com", password="x")
+        self.client.force_login(self.admin)
+
+    def assign(self, client=None):
+        return (client or self.client).post(self.url, json.dumps({
+            'user_id': self.admin.id, 'conference_id': 9001, 'max_papers_per_reviewer': 2, 'required_reviewers_per_paper': 1
+        }), content_type='application/json')
+
+    def test_token_bucket_refills_over_time(self):
+        self.assertEqual(parse_rate('3/m'), (3, 60))
+        for _ in range(3):
+            self.assertEqual(take_token(self.cache, 'bucket', '3/m', now=1000), 0)
+        self.assertAlmostEqual(take_token(self.cache, 'bucket', '3/m', now=1000), 20)
+        self.assertAlmostEqual(take_token(self.cache, 'bucket', '3/m', now=1015), 5)
+        self.assertEqual(take_token(self.cache, 'bucket', '3/m', now=1020), 0)
+        # Il lock del bucket è rilasciato dopo ogni richiesta
+        self.assertIsNone(self.cache.get('bucket:lock'))
+
+    @mock.patch('api.throttling.BUCKET_LOCK_WAIT', 0)
+    def test_token_bucket_waits_for_lock_held_by_another_worker(self):
+        self.cache.add('bucket:lock', 'other-worker', timeout=60)
+
+        self.assertAlmostEqual(take_token(self.cache, 'bucket', '3/m', now=1000), 20)
+        # Il bucket non è stato toccato e il lock dell'altro worker è ancora al suo posto
+        self.assertIsNone(self.cache.get('bucket'))
+        self.assertEqual(self.cache.get('bucket:lock'), 'other-worker')
+
+        self.cache.delete('bucket:lock')
+        self.assertEqual(take_token(self.cache, 'bucket', '3/m', now=1000), 0)
+
+    @override_settings(API_RATE_LIMITS={'automatic_assign_reviewers': {'rate': '1/m'}})
+    def test_rate_limited_per_session_user(self):
+        before = rate_limit_count(self.client, 'automatic_assign_reviewers', 'rate_limited')
+        # Altri client, anche anonimi, che inviano la stessa conferenza non consumano il bucket dell'admin
+        other = Client()
+        other.force_login(self.other)
+        self.assertEqual(self.assign(other).status_code, 404)
+        self.assertEqual(self.assign(Client()).status_code, 404)
+        self.assertEqual(self.assign().status_code, 404)
+
+        response = self.assign()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertEqual(response.json()['retry_after'], 60)
+        self.assertEqual(rate_limit_count(self.client, 'automatic_assign_reviewers', 'rate_limited'), before + 1)
+
+    def test_concurrent_run_by_same_user_is_rejected(self):
+        before = rate_limit_count(self.client, 'automatic_assign_reviewers', 'concurrency_limited')
+        # Un'assegnazione dello stesso admin è già in corso
+        self.assertTrue(acquire_slot(self.cache, f'ratelimit:automatic_assign_reviewers:slots:user:{self.admin.id}', 1, 60))
+
+        response = self.assign()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(rate_limit_count(self.client, 'automatic_assign_reviewers', 'concurrency_limited'), before + 1)
+        other = Client()
+        other.force_login(self.other)
+        self.assertEqual(self.assign(other).status_code, 404)
+        # Il posto globale preso dalla richiesta rifiutata è stato restituito
+        self.assertEqual(self.cache.get('ratelimit:automatic_assign_reviewers:slots'), 0)
+
+    def test_views_without_get_user_are_keyed_by_session_user(self):
+        @rate_limit('export', rate='1/m')
+        def export(request):
+            return HttpResponse()
+
+        def request_as(user_id):
+            request = self.factory.get('/export')
+            request.session = {'_auth_user_id': user_id} if user_id else {}
+            return request
+
+        self.assertEqual(export(request_as(self.admin.id)).status_code, 200)
+        self.assertEqual(export(request_as(self.other.id)).status_code, 200)
+        self.assertEqual(export(request_as(self.admin.id)).status_code, 429)
+        self.assertEqual(export(request_as(None)).status_code, 200)
+
+    def test_client_ip_header(self):
+        @rate_limit('export', rate='1/m', key='ip')
+        def export(request):
+            return HttpResponse()
+
+        def via_proxy(address):
+            return self.factory.get('/export', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'1.2.3.4, {address}')
+
+        self.assertEqual(export(via_proxy('192.0.2.1')).status_code, 200)
+        # Senza API_RATE_LIMIT_IP_HEADER tutti i client dietro il proxy hanno lo stesso indirizzo
+        self.assertEqual(export(via_proxy('192.0.2.2')).status_code, 429)
+        with self.settings(API_RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            self.assertEqual(export(via_proxy('192.0.2.3')).status_code, 200)
+            self.assertEqual(export(via_proxy('192.0.2.3')).status_code, 429)
+
+    def test_slot_lease_is_renewed_by_every_request(self):
+        with mock.patch.object(self.cache, 'touch', wraps=self.cache.touch) as touch:
+            self.assertTrue(acquire_slot(self.cache, 'slots', 2, 60))
+            self.assertTrue(acquire_slot(self.cache, 'slots', 2, 60))
+        self.assertEqual([call.args for call in touch.call_args_list], [('slots', 60), ('slots', 60)])
+
+        # Un contatore scaduto e ricreato durante le richieste non scende sotto zero
+        self.cache.delete('slots')
+        self.assertTrue(acquire_slot(self.cache, 'slots', 2, 60))
+        release_slot(self.cache, 'slots')
+        release_slot(self.cache, 'slots')
+        self.assertEqual(self.cache.get('slots'), 0)
+
+    @override_settings(API_RATE_LIMIT_ENABLED=False, API_RATE_LIMITS={'automatic_assign_reviewers': {'rate': '1/m'}})
+    def test_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.assign().status_code, 404)
+
+    def test_streaming_response_holds_slot_until_sent(self):
+        @rate_limit('export', global_concurrency=1)
+        def export(request):
+            return StreamingHttpResponse(iter([b'a', b'b']))
+
+        response = export(self.factory.get('/export'))
+        self.assertEqual(export(self.factory.get('/export')).status_code, 429)
+        self.assertEqual(b''.join(response.streaming_content), b'ab')
+        self.assertEqual(export(self.factory.get('/export')).status_code, 200)
+
+    async def test_async_view(self):
+        @rate_limit('async_upload', rate='1/m', key='ip')
+        async def upload(request):
+            return HttpResponse(status=201)
+
+        self.assertEqual((await upload(self.factory.post('/upload'))).status_code, 201)
+        self.assertEqual((await upload(self.factory.post('/upload'))).status_code, 429)
+        self.assertEqual((await upload(self.factory.post('/upload', REMOTE_ADDR='10.0.0.2'))).status_code, 201)
@@ -0,0 +1,245 @@
+import functools
+import math
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+from metrics.registry import registry
+from .responses import JsonResponse
+
+RATE_LIMIT_CACHE_ALIAS = 'ratelimit'
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Lock del bucket: scade da solo se il processo che lo tiene termina, e chi aspetta rinuncia dopo WAIT
+BUCKET_LOCK_TIMEOUT = 2
+BUCKET_LOCK_WAIT = 1.0
+
+
+def parse_rate(rate):
+    """'5/m' -> (5, 60): al massimo 5 richieste al minuto (periodi: s, m, h, d)."""
+    count, _, period = rate.partition('/')
+    return int(count), _PERIODS[period[0]]
+
+
+def session_user_id(request):
+    """
+    Id dell'utente loggato letto dalla sessione, come fa get_user: anche le view senza get_user
+    vengono limitate per utente e non per IP. Nelle view async va letto prima con session.aget.
+    """
+    session = getattr(request, 'session', None)
+    return session.get('_auth_user_id') if session is not None else None
+
+
+def client_ip(request):
+    """
+    IP del client. Dietro un reverse proxy REMOTE_ADDR è quello del proxy per tutti i client:
+    API_RATE_LIMIT_IP_HEADER (es. 'HTTP_X_FORWARDED_FOR') va impostato solo se il proxy è fidato
+    e aggiunge l'indirizzo del client in fondo all'header, che altrimenti il client può falsificare.
+    """
+    header = getattr(settings, 'API_RATE_LIMIT_IP_HEADER', None)
+    if header and request.META.get(header):
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _client_key(request, key, user_id, args, kwargs):
+    if callable(key):
+        return key(request, *args, **kwargs)
+    if key == 'user' and user_id is not None:
+        return f'user:{user_id}'
+    return f'ip:{client_ip(request)}'
+
+
+def _bucket_lock(cache, key):
+    """
+    Lock per chiave preso con cache.add, atomico anche su Redis e memcached: la lettura e la scrittura
+    del bucket non si sovrappongono tra worker diversi. Ritorna la funzione che lo rilascia, o None se
+    non si è riusciti a prenderlo entro BUCKET_LOCK_WAIT secondi.
+    """
+    lock_key, token = f'{key}:lock', uuid.uuid4().hex
+    deadline = time.monotonic() + BUCKET_LOCK_WAIT
+    while not cache.add(lock_key, token, timeout=BUCKET_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.005)
+
+    def release():
+        # Non cancella il lock preso da un'altra richiesta dopo che il nostro è scaduto
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return release
+
+
+def take_token(cache, key, rate, burst=None, now=None):
+    """
+    Token bucket: il bucket contiene al massimo `burst` token (default: il numero di richieste di `rate`)
+    e si riempie in modo continuo al ritmo di `rate`. Ritorna 0 se la richiesta è ammessa, altrimenti
+    i secondi da aspettare prima del prossimo token.
+    """
+    count, period = parse_rate(rate)
+    capacity = burst or count
+    refill = count / period
+    now = time.time() if now is None else now
+    release = _bucket_lock(cache, key)
+    if release is None:
+        # Troppe richieste contemporanee sullo stesso bucket: il client riprova tra poco
+        return 1 / refill
+    try:
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            return (1 - tokens) / refill
+        # Dopo il tempo necessario a riempirsi il bucket è di nuovo pieno: la chiave può scadere
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(capacity / refill) + 1)
+    finally:
+        release()
+    return 0
+
+
+def acquire_slot(cache, key, limit, lease):
+    """
+    Occupa uno dei `limit` posti di `key`. Il contatore scade `lease` secondi dopo l'ultima richiesta
+    ammessa, così un processo terminato durante la richiesta non tiene occupato il posto per sempre
+    e il contatore non scade mentre ci sono richieste che lo hanno incrementato da poco.
+    """
+    cache.add(key, 0, timeout=lease)
+    try:
+        in_use = cache.incr(key)
+    except ValueError:
+        # Scaduto tra add e incr
+        cache.add(key, 0, timeout=lease)
+        in_use = cache.incr(key)
+    cache.touch(key, lease)
+    if in_use > limit:
+        release_slot(cache, key)
+        return False
+    return True
+
+
+def release_slot(cache, key):
+    try:
+        if cache.decr(key) < 0:
+            # Il contatore è scaduto ed è stato ricreato mentre la richiesta era in corso
+            cache.incr(key)
+    except ValueError:
+        pass
+
+
+def _too_many_requests(retry_after):
+    retry_after = max(1, math.ceil(retry_after))
+    response = JsonResponse({"error": "Too many requests, retry later", "retry_after": retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _release_after(streaming_content, release):
+    try:
+        yield from streaming_content
+    finally:
+        release()
+
+
+async def _arelease_after(streaming_content, release):
+    try:
+        async for chunk in streaming_content:
+            yield chunk
+    finally:
+        release()
+
+
+def rate_limit(scope, rate=None, burst=None, concurrency=None, global_concurrency=None, key='user'):
+    """
+    Admission control per le view costose. Le richieste oltre i limiti ricevono 429 con Retry-After:
+    - `rate` ('5/m') e `burst`: token bucket per chiave;
+    - `concurrency`: richieste in esecuzione contemporaneamente per chiave;
+    - `global_concurrency`: richieste in esecuzione contemporaneamente per la view, per tutti i client,
+      così una view costosa non può occupare tutti i thread dei worker.
+    `key` è 'user' (utente della sessione, altrimenti IP), 'ip' o una funzione (request, *args, **kwargs) -> str.
+    Le chiavi vanno ricavate solo da dati autenticati: una chiave presa dal corpo della richiesta (es. la
+    conferenza) permetterebbe a chiunque di consumare i limiti di un altro utente.
+
+    I valori si possono cambiare senza toccare il codice con API_RATE_LIMITS[scope]. I contatori stanno
+    nella cache 'ratelimit', locale al processo per default: `global_concurrency` e i limiti per utente
+    valgono per tutti i worker solo con una cache condivisa (Redis, memcached).
+    """
+    defaults = {'rate': rate, 'burst': burst, 'concurrency': concurrency, 'global_concurrency': global_concurrency, 'key': key}
+
+    def admit(request, user_id, args, kwargs):
+        """Ritorna (risposta 429 o None, funzione che libera i posti occupati)."""
+        config = {**defaults, **getattr(settings, 'API_RATE_LIMITS', {}).get(scope, {})}
+        if not getattr(settings, 'API_RATE_LIMIT_ENABLED', True):
+            return None, lambda: None
+        cache = caches[RATE_LIMIT_CACHE_ALIAS]
+        client = _client_key(request, config['key'], user_id, args, kwargs)
+        lease = getattr(settings, 'API_RATE_LIMIT_LEASE_SECONDS', 600)
+
+        if config['rate']:
+            wait = take_token(cache, f'ratelimit:{scope}:bucket:{client}', config['rate'], config['burst'])
+            if wait:
+                registry.inc('rate_limit_requests_total', (('scope', scope), ('outcome', 'rate_limited')))
+                return _too_many_requests(wait), None
+
+        acquired = []
+        for slot_key, limit in [(f'ratelimit:{scope}:slots:{client}', config['concurrency']),
+                                (f'ratelimit:{scope}:slots', config['global_concurrency'])]:
+            if not limit:
+                continue
+            if not acquire_slot(cache, slot_key, limit, lease):
+                for acquired_key in acquired:
+                    release_slot(cache, acquired_key)
+                registry.inc('rate_limit_requests_total', (('scope', scope), ('outcome', 'concurrency_limited')))
+                return _too_many_requests(getattr(settings, 'API_RATE_LIMIT_BUSY_RETRY_AFTER', 5)), None
+            acquired.append(slot_key)
+
+        registry.inc('rate_limit_requests_total', (('scope', scope), ('outcome', 'allowed')))
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                for acquired_key in acquired:
+                    release_slot(cache, acquired_key)
+        return None, release
+
+    def finish(response, release):
+        # Le risposte in streaming (export dei commenti) liberano il posto quando l'invio è finito
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _arelease_after(response.streaming_content, release)
+            else:
+                response.streaming_content = _release_after(response.streaming_content, release)
+        else:
+            release()
+        return response
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(request, *args, **kwargs):
+                session = getattr(request, 'session', None)
+                user_id = await session.aget('_auth_user_id') if session is not None else None
+                rejected, release = admit(request, user_id, args, kwargs)
+                if rejected:
+                    return rejected
+                try:
+                    response = await func(request, *args, **kwargs)
+                except BaseException:
+                    release()
+                    raise
+                return finish(response, release)
+        else:
+            @functools.wraps(func)
+            def wrapper(request, *args, **kwargs):
+                rejected, release = admit(request, session_user_id(request), args, kwargs)
+                if rejected:
+                    return rejected
+                try:
+                    response = func(request, *args, **kwargs)
+                except BaseException:
+                    release()
+                    raise
+                return finish(response, release)
+        return wrapper
+    return decorator
@@ -0,0 +1,50 @@
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .responses import JsonResponse
+from .schema import API_INFO, get_schema_document
+
+
+def _schema_etag(request):
+    document = get_schema_document()
+    return document.etag if document else None
+
+
+@require_GET
+@condition(etag_func=_schema_etag)
+def openapi_schema(request):
+    """Documento OpenAPI pregenerato: statico, con ETag, senza introspezione delle view a ogni richiesta."""
+    document = get_schema_document()
+    if document is None:
+        return JsonResponse({"error": "OpenAPI schema not generated: run manage.py generate_openapi"}, status=503)
+    response = HttpResponse(document.content, content_type='application/json')
+    # no-cache: il client può tenerlo ma lo rivalida (304) per vedere subito lo schema di un nuovo deploy
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+class _UIInfo:
+    title = API_INFO['title']
+    version = API_INFO['default_version']
+
+
+class _UIDocument:
+    """Ai renderer di drf_yasg serve solo `info` per il titolo: il documento lo scarica il browser da SPEC_URL."""
+    info = _UIInfo
+
+
+def _ui_view(renderer_path):
+    @require_GET
+    def view(request):
+        from django.utils.module_loading import import_string
+        renderer = import_string(renderer_path)()
+        context = {'request': request}
+        renderer.set_context(context, _UIDocument)
+        return HttpResponse(render_to_string(renderer.template, context, request), content_type='text/html; charset=utf-8')
+    return view
+
+
+swagger_ui = _ui_view('drf_yasg.renderers.SwaggerUIRenderer')
+redoc_ui = _ui_view('drf_yasg.renderers.ReDocRenderer')
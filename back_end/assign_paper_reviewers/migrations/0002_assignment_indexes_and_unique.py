@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_assignments(apps, schema_editor):
+    """Rimuove le assegnazioni duplicate dello stesso reviewer allo stesso paper prima di aggiungere il vincolo di unicità."""
+    PaperReviewAssignment = apps.get_model('assign_paper_reviewers', 'PaperReviewAssignment')
+    keep_ids = PaperReviewAssignment.objects.values('paper', 'reviewer').annotate(keep_id=Min('id')).values('keep_id')
+    PaperReviewAssignment.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assign_paper_reviewers', '0001_initial'),
+        ('conference', '0005_conference_status'),
+        ('papers', '0001_initial'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_assignments, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='paperreviewassignment',
+            index=models.Index(fields=['reviewer', 'conference'], name='assignment_reviewer_conf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paperreviewassignment',
+            index=models.Index(fields=['paper', 'conference'], name='assignment_paper_conf_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paperreviewassignment',
+            constraint=models.UniqueConstraint(fields=('paper', 'reviewer'), name='unique_paper_reviewer_assignment'),
+        ),
+    ]
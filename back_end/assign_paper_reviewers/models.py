@@ -17,5 +17,16 @@ class PaperReviewAssignment(models.Model):
     #assigned_at = models.DateTimeField(auto_now_add=True)
     #updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['paper', 'reviewer'], name='unique_paper_reviewer_assignment'),
+        ]
+        indexes = [
+            # Paper assegnati a un reviewer in una conferenza
+            models.Index(fields=['reviewer', 'conference'], name='assignment_reviewer_conf_idx'),
+            # Reviewer assegnati ai paper di una conferenza
+            models.Index(fields=['paper', 'conference'], name='assignment_paper_conf_idx'),
+        ]
+
     def __str__(self):
         return f"Reviewer: {self.reviewer.email} - Paper: {self.paper.title} - Status: {self.status}"
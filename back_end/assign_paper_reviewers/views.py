@@ -1,9 +1,10 @@
-from django.http import JsonResponse
+from api.responses import JsonResponse
 import json
+import logging
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
-from drf_yasg.utils import swagger_auto_schema, logger
-from drf_yasg import openapi
+from api.schema import swagger_auto_schema
+from api.schema import openapi
 from rest_framework.decorators import api_view
 
 from conference.models import Conference
@@ -13,6 +14,8 @@ from users.decorators import get_user
 from users.models import User
 from conference_roles.models import ConferenceRole
 
+logger = logging.getLogger(__name__)
+
 
 '''
 esempio di richiesta post:
@@ -83,25 +86,19 @@ def assign_reviewer_to_paper(request):
     except Paper.DoesNotExist:
         return JsonResponse({"error": "Paper not found in this conference."}, status=400)
 
-    # se il reviewer è già stato assegnato al paper, non fare nulla
-    if PaperReviewAssignment.objects.filter(
+    # Assegno il reviewer al paper; se è già stato assegnato non fare nulla
+    # (il vincolo unique_paper_reviewer_assignment evita duplicati con richieste concorrenti)
+    _, created = PaperReviewAssignment.objects.get_or_create(
         reviewer=reviewer,
         paper=paper,
-        conference=conference
-    ).exists():
+        defaults={'conference': conference, 'status': "assigned"}
+    )
+    if not created:
         return JsonResponse(
             {
                 "message": "Reviewer already assigned to this paper."
             },status=201)
 
-    # Assegno il reviewer al paper
-    PaperReviewAssignment.objects.create(
-        reviewer=reviewer,
-        paper=paper,
-        conference=conference,
-        status="assigned"
-    )
-
     return JsonResponse(
         {
             "message": "Reviewers assigned successfully."
@@ -5,6 +5,15 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+The notification stream (notifications/stream/) is an async view that keeps the
+connection open: serve the project with an ASGI server so that each open stream
+costs a coroutine instead of a worker thread, e.g.
+
+    uvicorn back_end.asgi:application --app-dir back_end
+
+Under ASGI the I/O-bound endpoints also have async variants (papers/async/create/,
+papers/async/paper/<file>/, conference/async/create/, notifications/async/update-notification/).
 """
 
 import os
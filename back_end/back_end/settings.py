@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,11 +54,24 @@ INSTALLED_APPS = [
     'assign_paper_reviewers',
     'comments',
     'preferences',
+    'emails',
+    'database',
+    'api',
+    'metrics',
+    'logs',
 ]
 
 MIDDLEWARE = [
+    # First, so that latency covers every other middleware and sizes are those sent on the wire
+    'metrics.middleware.MetricsMiddleware',
+    # Before everything that logs, so that every record carries the request id
+    'logs.middleware.RequestIdMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Before the middlewares that read or change the response body
+    'api.middleware.CompressionMiddleware',
+    # Before SessionMiddleware so that session writes also pin the client to the primary
+    'database.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,6 +87,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Frontend base URL, used for the links in the emails
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
+
 ROOT_URLCONF = 'back_end.urls'
 
 TEMPLATES = [
@@ -95,12 +114,78 @@ WSGI_APPLICATION = 'back_end.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite is used for development; set DB_ENGINE=postgresql (and the DB_* variables below)
+# for production, where concurrent writes at the deadlines would lock the SQLite file.
+# `python manage.py verify_database` checks the connection and the pending migrations.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # Built-in psycopg pool (Django >= 5.1, requires `psycopg[pool]`, installed by the postgres extra): connections are reused
+    # across requests by the pool, so persistent connections (CONN_MAX_AGE) must stay disabled
+    DB_POOL = os.environ.get('DB_POOL', 'true').lower() in ('1', 'true', 'yes')
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'submission'),
+            'USER': os.environ.get('DB_USER', 'submission'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            # Checks persistent connections before reusing them, so a restarted server is not an error
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+            'TEST': {
+                'NAME': os.environ.get('DB_TEST_NAME', 'test_submission'),
+            },
+        }
     }
-}
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+    # Performance mode for single-node deployments that stay on SQLite (DB_SQLITE_TUNING=true):
+    # these PRAGMAs are run on every new connection by the `database` app (connection_created signal).
+    # WAL lets readers and the writer work at the same time; `manage.py sqlite_checkpoint` folds the WAL back
+    if os.environ.get('DB_SQLITE_TUNING', 'false').lower() in ('1', 'true', 'yes'):
+        SQLITE_PRAGMAS = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',  # Safe with WAL: a power loss can only lose the last commits, not corrupt the file
+            'busy_timeout': 5000,  # Milliseconds a writer waits for the lock instead of failing with "database is locked"
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # Negative values are KiB: 64 MB of page cache per connection
+        }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE '{DB_ENGINE}': use 'sqlite' or 'postgresql'")
+
+# Read replicas for the list/dashboard views marked with @read_replica (database.decorators).
+# PostgreSQL: DB_REPLICA_HOSTS=host1,host2 (same credentials as the primary).
+# SQLite: DB_REPLICA_NAMES=/path/to/copy.sqlite3, a second local file to try the routing.
+# After a write the client is pinned to the primary for DATABASE_REPLICA_STICKINESS_SECONDS.
+_replicas = [
+    {**DATABASES['default'], 'HOST': host} for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host
+] if DB_ENGINE == 'postgresql' else [
+    {**DATABASES['default'], 'NAME': name} for name in os.environ.get('DB_REPLICA_NAMES', '').split(',') if name
+]
+DATABASE_REPLICAS = []
+for _index, _replica in enumerate(_replicas, start=1):
+    # In the tests the replicas point to the test database of the primary
+    DATABASES[f'replica{_index}'] = {**_replica, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{_index}')
+
+DATABASE_ROUTERS = ['database.routers.ReplicaRouter']
+DATABASE_REPLICA_STICKINESS_SECONDS = int(os.environ.get('DB_REPLICA_STICKINESS_SECONDS', 10))
 
 
 # Password validation
@@ -161,12 +246,153 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024 * 1024
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024 * 1024
+# Uploaded files bigger than this are streamed to a temporary file instead of being kept in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB (Django default)
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# The backend can be swapped (e.g. 'django.core.mail.backends.filebased.EmailBackend'
+# or '...console.EmailBackend') to develop and test without going through SMTP
+EMAIL_BACKEND = os.environ.get('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('DJANGO_EMAIL_FILE_PATH', BASE_DIR / 'sent_emails')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'submissionispossible6@gmail.com'
 EMAIL_HOST_PASSWORD = 'oqja aewn bizl qtzu'
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Email outbox: emails are stored in the DB and sent by the `manage.py process_email_queue` worker
+EMAIL_QUEUE_BATCH_SIZE = 100  # Emails sent per SMTP connection
+EMAIL_QUEUE_MAX_ATTEMPTS = 5  # After this many failures an email is moved to the 'dead' status
+EMAIL_QUEUE_RETRY_DELAY_SECONDS = 60  # Delay before the first retry, doubled at every attempt
+EMAIL_QUEUE_LEASE_SECONDS = 300  # How long a claimed batch stays reserved for the worker sending it
+
+# Real-time notifications (Server-Sent Events on /notifications/stream/, served through ASGI)
+# The in-process broker only reaches streams opened in the same process: when running several
+# ASGI worker processes use 'notifications.events.CacheBroker' with a cache shared between them
+NOTIFICATIONS_BROKER = {
+    'BACKEND': os.environ.get('NOTIFICATIONS_BROKER', 'notifications.events.InProcessBroker'),
+    'OPTIONS': {},
+}
+NOTIFICATIONS_SSE_HEARTBEAT_SECONDS = 15  # Keep-alive comment sent when no notification arrives
+NOTIFICATIONS_COUNT_CACHE_SECONDS = 60  # Upper bound on how stale the cached pending counter can be
+
+# Conference deletion: conferences with more papers than this are deleted in the background by
+# `manage.py delete_conferences`, CONFERENCE_TEARDOWN_BATCH_SIZE papers per transaction
+CONFERENCE_TEARDOWN_ASYNC_THRESHOLD = 500
+CONFERENCE_TEARDOWN_BATCH_SIZE = 200
+
+# API responses
+
+API_FAST_JSON = os.environ.get('API_FAST_JSON', 'true').lower() in ('1', 'true', 'yes')  # orjson, when installed
+API_COMPRESSION_MIN_SIZE = 1024  # Smaller bodies are sent uncompressed
+API_COMPRESSION_GZIP_LEVEL = 6
+API_COMPRESSION_BROTLI_QUALITY = 5  # 0-11: higher is smaller but much slower to compress
+API_RESPONSE_CACHE_SECONDS = int(os.environ.get('API_RESPONSE_CACHE_SECONDS', 300))
+
+# OpenAPI documentation. `manage.py generate_openapi` writes the document to API_SCHEMA_FILE at build/deploy
+# time and /swagger.json serves it as a static file. With API_SCHEMA_DECORATORS=false the views skip their
+# swagger_auto_schema decorators (drf_yasg's schema machinery is not loaded): use it in production workers
+API_SCHEMA_DECORATORS = os.environ.get('API_SCHEMA_DECORATORS', 'true').lower() in ('1', 'true', 'yes')
+API_SCHEMA_FILE = os.environ.get('API_SCHEMA_FILE', str(BASE_DIR / 'openapi.json'))
+SWAGGER_SETTINGS = {'SPEC_URL': 'openapi-schema'}
+REDOC_SETTINGS = {'SPEC_URL': 'openapi-schema'}
+
+# Caches. 'responses' holds the bodies of the @conditional(cache=True) views, keyed by ETag: the
+# local-memory default is per process; set API_RESPONSE_CACHE_BACKEND to
+# 'django.core.cache.backends.filebased.FileBasedCache' (LOCATION: a directory) or
+# 'django.core.cache.backends.redis.RedisCache' (LOCATION: redis://host:6379) to share it between processes
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': os.environ.get('API_RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('API_RESPONSE_CACHE_LOCATION', 'api-responses'),
+        'TIMEOUT': API_RESPONSE_CACHE_SECONDS,
+    },
+}
+if 'redis' not in CACHES['responses']['BACKEND']:
+    # Redis passes OPTIONS to its client and evicts on its own (maxmemory-policy)
+    CACHES['responses']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('API_RESPONSE_CACHE_MAX_ENTRIES', 1000))}
+
+# Admission control for the expensive endpoints (api/throttling.py). Token buckets and running-request
+# counters live in the 'ratelimit' cache. With the default local memory cache every limit is per process:
+# under N gunicorn workers global_concurrency=2 admits 2*N requests. Multi-worker deployments must set
+# API_RATE_LIMIT_CACHE_BACKEND/LOCATION to a shared cache (Redis, memcached) to enforce them across workers.
+# API_RATE_LIMITS overrides the values declared on the views, per scope, for example
+# {'automatic_assign_reviewers': {'rate': '1/m', 'concurrency': 1}}
+CACHES['ratelimit'] = {
+    'BACKEND': os.environ.get('API_RATE_LIMIT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+    'LOCATION': os.environ.get('API_RATE_LIMIT_CACHE_LOCATION', 'api-ratelimit'),
+    'TIMEOUT': None,
+}
+API_RATE_LIMIT_ENABLED = os.environ.get('API_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+API_RATE_LIMITS = {}
+# A running request holds its slot at most this long (a worker killed mid-request does not leak it)
+API_RATE_LIMIT_LEASE_SECONDS = 600
+# Retry-After sent when a view has no free slot
+API_RATE_LIMIT_BUSY_RETRY_AFTER = 5
+# Limits are per session user, or per client IP for anonymous requests. Behind a reverse proxy REMOTE_ADDR is
+# the proxy for every client: set API_RATE_LIMIT_IP_HEADER=HTTP_X_FORWARDED_FOR only if a trusted proxy
+# appends the client address to that header (the last entry is used, the others can be forged)
+API_RATE_LIMIT_IP_HEADER = os.environ.get('API_RATE_LIMIT_IP_HEADER') or None
+
+# Comments export (comments/allthecomments/list/): rows read from the database and written per chunk
+COMMENTS_EXPORT_CHUNK_SIZE = 2000
+
+# Request metrics exposed on /metrics in the Prometheus text format. With several worker processes set
+# METRICS_MULTIPROC_DIR (or PROMETHEUS_MULTIPROC_DIR) to a local directory shared by the workers and emptied
+# at every deploy: each process writes its values there at most every METRICS_FLUSH_SECONDS, and the files
+# of exited processes are folded into metrics-aggregate.json at the next scrape
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+# /metrics is denied by default: scrapers send "Authorization: Bearer $METRICS_TOKEN" or connect from one of
+# METRICS_ALLOWED_IPS (comma separated addresses or networks, e.g. "10.0.0.0/8,127.0.0.1")
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
+# Logging: one JSON object per line on stderr. Records are queued by the request thread and written by
+# a background listener thread. LOG_LEVEL is the root level; LOG_LEVELS sets per-module levels, for
+# example LOG_LEVELS="reviews=DEBUG,django.db.backends=DEBUG"
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = {
+    'django': 'INFO',
+    'django.db.backends': 'WARNING',
+}
+for item in filter(None, os.environ.get('LOG_LEVELS', '').split(',')):
+    module, _, level = item.partition('=')
+    LOG_LEVELS[module.strip()] = level.strip().upper()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'logs.handlers.RequestIdFilter'},
+    },
+    'formatters': {
+        'json': {'()': 'logs.handlers.JsonFormatter'},
+    },
+    'handlers': {
+        # Configured before 'queue' (dictConfig sorts handlers by name), which references it
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'logs.handlers.BackgroundQueueHandler',
+            'handlers': ['cfg://handlers.console'],
+            'filters': ['request_id'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        # Without handlers of their own they propagate to the root queue handler
+        module: {'handlers': [], 'level': level, 'propagate': True}
+        for module, level in LOG_LEVELS.items()
+    },
+}
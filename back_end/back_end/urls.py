@@ -18,24 +18,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-#from users import views
+from api.views import openapi_schema, redoc_ui, swagger_ui
+from metrics.views import metrics
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API Documentation",
-        default_version='v1',
-        description="API documentation for the back_end project",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="support@example.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+#from users import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -47,10 +34,12 @@ urlpatterns = [
     path('notifications/', include('notifications.urls')),
     path('assign_paper_reviewers/', include('assign_paper_reviewers.urls')),
     #Swagger and Redoc paths for accessing documentation
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger/', swagger_ui, name='schema-swagger-ui'),
+    path('redoc/', redoc_ui, name='schema-redoc'),
+    path('swagger.json', openapi_schema, name='openapi-schema'),
     path('preferences/', include('preferences.urls')),
     path('comments/', include('comments.urls')),
+    path('metrics', metrics, name='metrics'),
 
 
 ]
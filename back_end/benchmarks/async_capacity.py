@@ -0,0 +1,181 @@
+"""
+Concurrent-connection capacity of the WSGI deployment against the ASGI one.
+
+Slow clients download a paper PDF (the I/O-bound view_paper_pdf) while a probe measures the latency of a
+cheap request (/metrics) on the same server:
+- WSGI: gunicorn with gthread workers serving papers/paper/<file>/. Every download holds a worker
+  thread until the client has read the whole file, so once the threads are busy the probe waits too.
+- ASGI: uvicorn serving the async variant papers/async/paper/<file>/. A download is a coroutine that
+  waits on the socket, and the probe keeps answering.
+
+Both servers run with the same number of worker processes. gunicorn is not a project dependency and
+uvicorn comes with the asgi extra:
+
+    poetry install -E asgi
+    pip install gunicorn
+
+Usage (from the back_end directory):
+
+    python benchmarks/async_capacity.py [--clients 200] [--seconds 10] [--workers 1] [--threads 8]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACK_END_DIR = Path(__file__).resolve().parent.parent
+PDF_NAME = 'benchmark.pdf'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, media_root, args):
+    if kind == 'wsgi':
+        command = [sys.executable, '-m', 'gunicorn', 'back_end.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--worker-class', 'gthread', '--threads', str(args.threads),
+                   '--timeout', '120', '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'back_end.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log']
+    # MEDIA_ROOT è relativa alla directory corrente: il server parte nella directory temporanea con il PDF
+    pythonpath = os.pathsep.join(filter(None, [str(BACK_END_DIR), os.environ.get('PYTHONPATH')]))
+    # La sonda interroga /metrics, negato se il client non è in METRICS_ALLOWED_IPS
+    env = dict(os.environ, PYTHONPATH=pythonpath, DJANGO_SETTINGS_MODULE='back_end.settings', LOG_LEVEL='WARNING',
+               METRICS_ALLOWED_IPS='127.0.0.1')
+    process = subprocess.Popen(command, cwd=media_root, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'{kind} server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit(f'{kind} server did not start')
+
+
+async def get(port, path, read_rate=None, timeout=60):
+    """GET con HTTP/1.1 e Connection: close; con `read_rate` (byte/s) il corpo viene letto lentamente."""
+    sock = socket.socket()
+    # Buffer di ricezione piccolo: il server non può scaricare tutto il file nel kernel e deve aspettare il client
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        size = 0
+        while True:
+            chunk = await asyncio.wait_for(reader.read(16 * 1024), timeout)
+            if not chunk:
+                break
+            size += len(chunk)
+            if read_rate:
+                await asyncio.sleep(len(chunk) / read_rate)
+        return int(status_line.split()[1]), size
+    finally:
+        writer.close()
+
+
+async def load(port, pdf_path, args):
+    stop = time.monotonic() + args.seconds
+    downloads = {'done': 0, 'failed': 0, 'bytes': 0}
+    probes = []
+    probe_failures = 0
+
+    async def slow_client():
+        while time.monotonic() < stop:
+            try:
+                status, size = await get(port, pdf_path, read_rate=args.client_rate * 1024)
+                downloads['done' if status == 200 else 'failed'] += 1
+                downloads['bytes'] += size
+            except (OSError, asyncio.TimeoutError):
+                downloads['failed'] += 1
+
+    async def probe():
+        nonlocal probe_failures
+        # Lascia che i client lenti occupino il server prima di misurare
+        await asyncio.sleep(1)
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                status, _ = await get(port, '/metrics', timeout=args.probe_timeout)
+                if status != 200:
+                    raise OSError(status)
+                probes.append((time.perf_counter() - start) * 1000)
+            except (OSError, asyncio.TimeoutError):
+                probe_failures += 1
+            await asyncio.sleep(0.1)
+
+    await asyncio.gather(probe(), *(slow_client() for _ in range(args.clients)))
+    return downloads, probes, probe_failures
+
+
+def report(name, downloads, probes, probe_failures, seconds):
+    if probes:
+        ordered = sorted(probes)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        latency = f'probe p50 {statistics.median(ordered):8.1f} ms  p95 {p95:8.1f} ms  max {ordered[-1]:8.1f} ms'
+    else:
+        latency = 'probe: no successful request'
+    print(f'{name:6} {downloads["done"]:6d} downloads ({downloads["bytes"] / seconds / 1024 / 1024:6.1f} MiB/s) '
+          f'{downloads["failed"]:4d} failed   {latency}   {probe_failures} probes timed out')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=200, help='Client lenti che scaricano il PDF in parallelo')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=1, help='Processi worker di entrambi i server')
+    parser.add_argument('--threads', type=int, default=8, help='Thread per worker gunicorn (gthread)')
+    parser.add_argument('--pdf-size', type=int, default=512, help='Dimensione del PDF in KiB')
+    parser.add_argument('--client-rate', type=int, default=256, help='Velocità di lettura di ogni client in KiB/s')
+    parser.add_argument('--probe-timeout', type=float, default=5, help='Secondi dopo cui una richiesta di probe è fallita')
+    args = parser.parse_args()
+
+    missing = [module for module in ('gunicorn', 'uvicorn') if not _importable(module)]
+    if missing:
+        raise SystemExit(f'Missing {", ".join(missing)}: poetry install -E asgi; pip install gunicorn')
+
+    print(f'{args.clients} clients reading a {args.pdf_size} KiB PDF at {args.client_rate} KiB/s for {args.seconds:.0f}s, '
+          f'{args.workers} worker(s), gunicorn with {args.threads} threads per worker\n')
+    with tempfile.TemporaryDirectory() as media_root:
+        os.makedirs(os.path.join(media_root, 'papers', 'paper'))
+        with open(os.path.join(media_root, 'papers', 'paper', PDF_NAME), 'wb') as f:
+            f.write(b'%PDF-1.4\n' + os.urandom(args.pdf_size * 1024))
+
+        for kind, path in [('wsgi', f'/papers/paper/{PDF_NAME}/'), ('asgi', f'/papers/async/paper/{PDF_NAME}/')]:
+            port = free_port()
+            process = start_server(kind, port, media_root, args)
+            try:
+                downloads, probes, probe_failures = asyncio.run(load(port, path, args))
+            finally:
+                process.terminate()
+                process.wait()
+            report(kind.upper(), downloads, probes, probe_failures, args.seconds)
+
+
+def _importable(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+if __name__ == '__main__':
+    main()
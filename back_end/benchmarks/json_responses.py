@@ -0,0 +1,133 @@
+"""
+Benchmark of the JSON response layer (api.responses.JsonResponse and api.middleware.CompressionMiddleware).
+
+A throw-away test database is filled with synthetic data and the heaviest endpoints are called through
+the test client: for each one the bytes on the wire without compression, with gzip and with brotli
+(when installed) are printed, together with the time spent encoding the payload with the standard
+library encoder and with orjson (when installed).
+
+Usage (from the back_end directory):
+
+    python benchmarks/json_responses.py [--comments 20000] [--reviews 200] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back_end.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from api import middleware, responses  # noqa: E402
+from comments.models import Comment  # noqa: E402
+from conference.models import Conference  # noqa: E402
+from conference_roles.models import ConferenceRole  # noqa: E402
+from papers.models import Paper  # noqa: E402
+from reviews.models import Review, ReviewItem, ReviewTemplateItem  # noqa: E402
+from users.models import User  # noqa: E402
+
+TEXT = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt. '
+
+
+def seed(n_comments, n_reviews):
+    rng = random.Random(42)
+    now = timezone.now()
+    users = User.objects.bulk_create([
+        User(first_name=f'User{i}', last_name='Bench', email=f'user{i}@example.com', password='x')
+        for i in range(max(n_reviews, 100))
+    ], batch_size=1000)
+    admin = users[0]
+    conferences = Conference.objects.bulk_create([
+        Conference(title=f'Conference {i}', admin_id=admin, deadline=now, description=TEXT * 3, papers_deadline=now)
+        for i in range(200)
+    ])
+    conference = conferences[0]
+    ConferenceRole.objects.create(user=admin, conference=conference, role='admin')
+    template = ReviewTemplateItem.objects.bulk_create([
+        ReviewTemplateItem(conference=conference, label=f'Criterion {i}', description=TEXT, has_comment=True, has_score=True)
+        for i in range(4)
+    ])
+    paper = Paper.objects.create(title='Heavy paper', conference=conference, author_id=admin, status_id='submitted')
+    reviews = Review.objects.bulk_create([
+        Review(paper=paper, user=user, comment_text=TEXT * 2, score=rng.randint(1, 5), confidence_level=rng.randint(1, 5))
+        for user in users[:n_reviews]
+    ], batch_size=1000)
+    ReviewItem.objects.bulk_create([
+        ReviewItem(review=review, templateItem=item, comment=TEXT, score=rng.randint(1, 5))
+        for review in reviews for item in template
+    ], batch_size=1000)
+    Comment.objects.bulk_create([
+        Comment(user=rng.choice(users), review=rng.choice(reviews), comment_text=TEXT)
+        for _ in range(n_comments)
+    ], batch_size=1000)
+    return admin, paper
+
+
+def measure(client, url, repeat):
+    identity = client.get(url, HTTP_ACCEPT_ENCODING='identity')
+    data = json.loads(identity.content)
+    sizes = {'identity': len(identity.content)}
+    for encoding in ['gzip'] + (['br'] if middleware.brotli else []):
+        response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+        sizes[encoding] = len(response.content)
+
+    timings = {}
+    encoders = [('stdlib', False)] + ([('orjson', True)] if responses.orjson else [])
+    for name, fast in encoders:
+        with override_settings(API_FAST_JSON=fast):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                responses.JsonResponse(data, safe=False)
+            timings[name] = (time.perf_counter() - start) / repeat * 1000
+    return sizes, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comments', type=int, default=20000, help='Commenti restituiti da get_all_comments')
+    parser.add_argument('--reviews', type=int, default=200, help='Recensioni del paper usato per get_paper_reviews')
+    parser.add_argument('--repeat', type=int, default=20, help='Serializzazioni di ogni payload per la misura del tempo')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        admin, paper = seed(args.comments, args.reviews)
+        client = Client()
+        client.force_login(admin)
+        session = client.session
+        session['_auth_user_id'] = admin.id
+        session.save()
+
+        endpoints = [
+            ('get_all_comments', reverse('get_all_comments')),
+            ('get_paper_reviews', f"{reverse('get_paper_reviews')}?paper_id={paper.id}&page_size={args.reviews}"),
+            ('get_conferences', f"{reverse('get_conferences')}?page_size=200"),
+        ]
+        print(f"orjson: {'yes' if responses.orjson else 'no'}, brotli: {'yes' if middleware.brotli else 'no'}\n")
+        for name, url in endpoints:
+            sizes, timings = measure(client, url, args.repeat)
+            wire = ', '.join(
+                f'{encoding} {size / 1024:.1f} KiB ({size / sizes["identity"]:.0%})' for encoding, size in sizes.items()
+            )
+            encode = ', '.join(f'{encoder} {ms:.2f} ms' for encoder, ms in timings.items())
+            print(f'{name}:\n  bytes:  {wire}\n  encode: {encode}\n')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
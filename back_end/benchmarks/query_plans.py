@@ -0,0 +1,199 @@
+"""
+Benchmark of the hot lookup paths before and after the composite indexes and unique constraints
+(conference_roles 0002, preferences 0003, assign_paper_reviewers 0002, reviews 0006, notifications 0004).
+
+A throw-away test database is created, migrated back to the state without the indexes, filled with
+synthetic data and then migrated forward: for every query the EXPLAIN output and the average time
+are printed for both states.
+
+Usage (from the back_end directory):
+
+    python benchmarks/query_plans.py [--scale 1] [--repeat 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back_end.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.migrations.executor import MigrationExecutor  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from assign_paper_reviewers.models import PaperReviewAssignment  # noqa: E402
+from conference.models import Conference  # noqa: E402
+from conference_roles.models import ConferenceRole  # noqa: E402
+from notifications.models import Notification  # noqa: E402
+from papers.models import Paper  # noqa: E402
+from preferences.models import Preference  # noqa: E402
+from reviews.models import Review  # noqa: E402
+from users.models import User  # noqa: E402
+
+BEFORE = [
+    ('conference_roles', '0001_initial'),
+    ('preferences', '0002_alter_preference_preference'),
+    ('assign_paper_reviewers', '0001_initial'),
+    ('reviews', '0005_remove_reviewitem_paper_reviewitem_review'),
+    ('notifications', '0003_notification_updated_at'),
+]
+AFTER = [
+    ('conference_roles', '0002_conferencerole_indexes_and_unique'),
+    ('preferences', '0003_preference_unique'),
+    ('assign_paper_reviewers', '0002_assignment_indexes_and_unique'),
+    ('reviews', '0006_review_paper_user_idx'),
+    ('notifications', '0004_notification_receiver_created_idx'),
+]
+
+
+def migrate(targets):
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(targets)
+
+
+def seed(scale):
+    rng = random.Random(42)
+    n_users, n_conferences, papers_per_conference = 2000 * scale, 50 * scale, 100
+    now = timezone.now()
+
+    users = User.objects.bulk_create([
+        User(first_name=f'User{i}', last_name='Bench', email=f'user{i}@example.com', password='x')
+        for i in range(n_users)
+    ], batch_size=1000)
+    conferences = Conference.objects.bulk_create([
+        Conference(title=f'Conference {i}', admin_id=rng.choice(users), deadline=now, description='', papers_deadline=now)
+        for i in range(n_conferences)
+    ])
+
+    roles, papers = [], []
+    for conference in conferences:
+        reviewers = rng.sample(users, 40)
+        roles += [ConferenceRole(user=user, conference=conference, role='reviewer') for user in reviewers]
+        roles += [ConferenceRole(user=user, conference=conference, role='author') for user in rng.sample(users, 60)]
+        papers += [
+            Paper(title=f'Paper {conference.id}-{i}', conference=conference, author_id=rng.choice(users), status_id='submitted')
+            for i in range(papers_per_conference)
+        ]
+        conference.bench_reviewers = reviewers
+    ConferenceRole.objects.bulk_create(roles, batch_size=1000)
+    papers = Paper.objects.bulk_create(papers, batch_size=1000)
+
+    conferences_by_id = {conference.id: conference for conference in conferences}
+    preferences, assignments, reviews = [], [], []
+    for paper in papers:
+        reviewers = conferences_by_id[paper.conference_id].bench_reviewers
+        for reviewer in rng.sample(reviewers, 10):
+            preferences.append(Preference(paper=paper, reviewer=reviewer, preference=rng.choice(['interested', 'not_interested'])))
+        for reviewer in rng.sample(reviewers, 3):
+            assignments.append(PaperReviewAssignment(paper=paper, reviewer=reviewer, conference_id=paper.conference_id))
+            reviews.append(Review(paper=paper, user=reviewer, comment_text='', score=1, confidence_level=1))
+    Preference.objects.bulk_create(preferences, batch_size=1000)
+    PaperReviewAssignment.objects.bulk_create(assignments, batch_size=1000)
+    Review.objects.bulk_create(reviews, batch_size=1000)
+
+    Notification.objects.bulk_create([
+        Notification(user_sender=rng.choice(users), user_receiver=rng.choice(users), conference=rng.choice(conferences), type=1)
+        for _ in range(20000 * scale)
+    ], batch_size=1000)
+
+    return {
+        'users': [user.id for user in users],
+        'conferences': [conference.id for conference in conferences],
+        'papers': [(paper.id, paper.conference_id) for paper in papers],
+        'assignments': [(a.paper_id, a.reviewer_id, a.conference_id) for a in assignments],
+    }
+
+
+def queries(ids, rng):
+    """Ritorna le query dei percorsi caldi, con parametri casuali presi dai dati generati."""
+    def role_exists():
+        paper_id, user_id, conference_id = rng.choice(ids['assignments'])
+        return ConferenceRole.objects.filter(user_id=user_id, conference_id=conference_id, role='reviewer')
+
+    def conference_reviewers():
+        return ConferenceRole.objects.filter(conference_id=rng.choice(ids['conferences']), role='reviewer')
+
+    def preference():
+        paper_id, user_id, _ = rng.choice(ids['assignments'])
+        return Preference.objects.filter(reviewer_id=user_id, paper_id=paper_id)
+
+    def reviewer_assignments():
+        _, user_id, conference_id = rng.choice(ids['assignments'])
+        return PaperReviewAssignment.objects.filter(reviewer_id=user_id, conference_id=conference_id)
+
+    def paper_assignments():
+        paper_id, _, conference_id = rng.choice(ids['assignments'])
+        return PaperReviewAssignment.objects.filter(paper_id=paper_id, conference_id=conference_id)
+
+    def review_exists():
+        paper_id, user_id, _ = rng.choice(ids['assignments'])
+        return Review.objects.filter(paper_id=paper_id, user_id=user_id)
+
+    def received_notifications():
+        return Notification.objects.filter(user_receiver_id=rng.choice(ids['users'])).order_by('-created_at')[:20]
+
+    return [
+        ('ConferenceRole (user, conference, role)', role_exists),
+        ('ConferenceRole (conference, role)', conference_reviewers),
+        ('Preference (reviewer, paper)', preference),
+        ('PaperReviewAssignment (reviewer, conference)', reviewer_assignments),
+        ('PaperReviewAssignment (paper, conference)', paper_assignments),
+        ('Review (paper, user)', review_exists),
+        ('Notification (user_receiver, -created_at)', received_notifications),
+    ]
+
+
+def measure(ids, repeat):
+    with connection.cursor() as cursor:
+        # Statistiche aggiornate per il query planner
+        cursor.execute('ANALYZE')
+    results = {}
+    for name, build in queries(ids, random.Random(7)):
+        plan = build().explain()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(build())
+        results[name] = (plan, (time.perf_counter() - start) / repeat * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='Moltiplicatore della quantità di dati generati')
+    parser.add_argument('--repeat', type=int, default=200, help='Esecuzioni di ogni query per la misura del tempo')
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        migrate(BEFORE)
+        start = time.perf_counter()
+        ids = seed(args.scale)
+        print(f'Seeded {len(ids["papers"])} papers, {len(ids["assignments"])} assignments '
+              f'in {time.perf_counter() - start:.1f}s ({connection.vendor})\n')
+
+        before = measure(ids, args.repeat)
+        start = time.perf_counter()
+        migrate(AFTER)
+        print(f'Indexes and constraints created in {time.perf_counter() - start:.2f}s\n')
+        after = measure(ids, args.repeat)
+
+        for name in before:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f'{name}: {ms_before:.3f} ms -> {ms_after:.3f} ms')
+            print(f'  before: {plan_before}')
+            print(f'  after:  {plan_after}\n')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
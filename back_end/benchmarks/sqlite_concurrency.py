@@ -0,0 +1,125 @@
+"""
+Concurrency benchmark of the SQLite performance mode (DB_SQLITE_TUNING, see SQLITE_PRAGMAS in settings.py).
+
+Reader threads run the kind of SELECTs the list endpoints do while writer threads update a session
+table, as every authenticated request does. The same workload runs on a temporary database file with
+the default rollback journal and then with the tuned PRAGMAs; reads/s, writes/s and
+"database is locked" errors are printed for both.
+
+Usage (from the back_end directory):
+
+    python benchmarks/sqlite_concurrency.py [--readers 8] [--writers 4] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import runpy
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SETTINGS_FILE = Path(__file__).resolve().parent.parent / 'back_end' / 'settings.py'
+
+
+def tuned_pragmas():
+    # Stessi PRAGMA che il signal connection_created applica con DB_SQLITE_TUNING=true
+    os.environ['DB_ENGINE'] = 'sqlite'
+    os.environ['DB_SQLITE_TUNING'] = 'true'
+    return runpy.run_path(str(SETTINGS_FILE))['SQLITE_PRAGMAS']
+
+
+def connect(path, pragmas):
+    # isolation_level=None: autocommit, le transazioni sono aperte esplicitamente come fa Django
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def setup(path, pragmas, rows):
+    connection = connect(path, pragmas)
+    connection.executescript('''
+        CREATE TABLE session (session_key TEXT PRIMARY KEY, session_data TEXT, expire_date TEXT);
+        CREATE TABLE paper (id INTEGER PRIMARY KEY, title TEXT, conference_id INTEGER, status TEXT);
+        CREATE INDEX paper_conference ON paper (conference_id);
+    ''')
+    connection.execute('BEGIN')
+    connection.executemany('INSERT INTO session VALUES (?, ?, ?)', ((f'key{i}', 'x' * 200, '2030-01-01') for i in range(1000)))
+    connection.executemany('INSERT INTO paper VALUES (?, ?, ?, ?)', ((i, f'Paper {i}', i % 50, 'submitted') for i in range(rows)))
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def run(path, pragmas, readers, writers, seconds):
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def reader(seed):
+        rng = random.Random(seed)
+        connection = connect(path, pragmas)
+        done = 0
+        while time.perf_counter() < stop:
+            connection.execute(
+                'SELECT id, title, status FROM paper WHERE conference_id = ? ORDER BY id LIMIT 20',
+                (rng.randrange(50),)
+            ).fetchall()
+            connection.execute('SELECT session_data FROM session WHERE session_key = ?', (f'key{rng.randrange(1000)}',)).fetchone()
+            done += 1
+        connection.close()
+        with lock:
+            counts['reads'] += done
+
+    def writer(seed):
+        rng = random.Random(seed)
+        connection = connect(path, pragmas)
+        done = locked = 0
+        while time.perf_counter() < stop:
+            try:
+                connection.execute('BEGIN')
+                connection.execute('UPDATE session SET session_data = ? WHERE session_key = ?',
+                                   ('y' * 200, f'key{rng.randrange(1000)}'))
+                connection.execute('COMMIT')
+                done += 1
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                locked += 1
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+        connection.close()
+        with lock:
+            counts['writes'] += done
+            counts['locked'] += locked
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: value / seconds if name != 'locked' else value for name, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=50000, help='Righe della tabella paper')
+    args = parser.parse_args()
+
+    modes = [('default (rollback journal)', {}), ('tuned (DB_SQLITE_TUNING)', tuned_pragmas())]
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per mode, SQLite {sqlite3.sqlite_version}\n')
+    for name, pragmas in modes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'bench.sqlite3')
+            setup(path, pragmas, args.rows)
+            result = run(path, pragmas, args.readers, args.writers, args.seconds)
+        print(f'{name:28} {result["reads"]:10.0f} reads/s {result["writes"]:8.0f} writes/s {result["locked"]:6d} locked errors')
+
+
+if __name__ == '__main__':
+    main()
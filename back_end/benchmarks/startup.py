@@ -0,0 +1,112 @@
+"""
+Cold-start benchmark: what a new worker process (gunicorn/uvicorn recycling, autoscaling, manage.py
+commands, test runs) pays before it can answer.
+
+Every measure runs in a fresh Python process and reports:
+- django.setup(): settings, apps and models;
+- import of back_end.urls: every view module and its dependencies;
+- time to first request: from process start to the first response of the WSGI handler for --path;
+- whether PuLP was imported (it should only be imported by the first automatic assignment),
+  and how long `import pulp` alone takes, which is the cost saved at startup.
+
+Usage (from the back_end directory):
+
+    python benchmarks/startup.py [--runs 5] [--path /metrics] [--importtime 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACK_END_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = r'''
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back_end.settings')
+import django
+django.setup()
+setup_done = time.perf_counter()
+import back_end.urls
+urls_done = time.perf_counter()
+
+from io import BytesIO
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': PATH, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+    'REMOTE_ADDR': '127.0.0.1',
+    'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0),
+    'wsgi.multithread': True, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+statuses = []
+body = b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+first_request_done = time.perf_counter()
+print(json.dumps({
+    'setup': setup_done - start,
+    'urls': urls_done - setup_done,
+    'first_request': first_request_done - start,
+    'status': statuses[0],
+    'pulp_loaded': 'pulp' in sys.modules,
+    'modules': len(sys.modules),
+}))
+'''
+
+
+def run_child(code, extra_args=()):
+    # /metrics è negato se il client non è in METRICS_ALLOWED_IPS
+    env = dict(os.environ, LOG_LEVEL='WARNING', METRICS_ALLOWED_IPS='127.0.0.1')
+    result = subprocess.run([sys.executable, *extra_args, '-c', code], cwd=BACK_END_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return result
+
+
+def pulp_import_time():
+    code = 'import time; start = time.perf_counter(); import pulp; print(time.perf_counter() - start)'
+    return float(run_child(code).stdout.strip())
+
+
+def import_profile(top):
+    """Moduli con il tempo di import cumulativo più alto (python -X importtime) per import back_end.urls."""
+    code = "import os, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back_end.settings'); django.setup(); import back_end.urls"
+    rows = []
+    for line in run_child(code, ['-X', 'importtime']).stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # import time:  <self us> | <cumulative us> | <nome indentato>
+        _, cumulative_us, name = line.split('|')
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Processi avviati per ogni misura')
+    parser.add_argument('--path', default='/metrics', help='URL della prima richiesta')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help='Mostra gli N moduli più lenti da importare (python -X importtime)')
+    args = parser.parse_args()
+
+    code = f'PATH = {args.path!r}\n' + CHILD
+    results = [json.loads(run_child(code).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+
+    print(f'{args.runs} cold starts, first request GET {args.path} -> {results[0]["status"]}\n')
+    for key, label in [('setup', 'django.setup()'), ('urls', 'import back_end.urls'), ('first_request', 'time to first request')]:
+        values = [result[key] * 1000 for result in results]
+        print(f'{label:24} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms')
+    print(f'{"modules loaded":24} {results[0]["modules"]}')
+    print(f'{"pulp imported":24} {results[0]["pulp_loaded"]}')
+    print(f'{"import pulp alone":24} {pulp_import_time() * 1000:8.1f} ms (paid by the first automatic assignment only)')
+
+    if args.importtime:
+        print('\nSlowest imports (cumulative):')
+        for cumulative_us, name in import_profile(args.importtime):
+            print(f'  {cumulative_us / 1000:8.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    main()
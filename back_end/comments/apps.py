@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class CommentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'comments'
\ No newline at end of file
+    name = 'comments'
+
+    def ready(self):
+        # Registra i signal che mantengono path e reply_count dei thread
+        from . import signals  # noqa: F401
@@ -0,0 +1,145 @@
+import re
+
+from django.utils.dateparse import parse_datetime
+
+from api.responses import dumps
+from .models import Comment
+
+PATH_DIGITS = 10
+COMMENT_MAX_DEPTH = 20  # path è lungo al massimo 255 caratteri: 11 per livello
+_path_re = re.compile(r'^(\d{%d}/)+$' % PATH_DIGITS)
+
+# Colonne lette per l'elenco e l'export: values() evita di istanziare i modelli e di caricare review e user
+COMMENT_FIELDS = ('id', 'review_id', 'user_id', 'comment_text', 'created_at')
+
+
+def serialize_comment_row(row):
+    return {
+        'id': row['id'],
+        'review_id': row['review_id'],
+        'user_id': row['user_id'],
+        'comment_text': row['comment_text'],
+        'created_at': row['created_at'].isoformat()
+    }
+
+
+def filter_comments(params):
+    """
+    Applica ai commenti i filtri di `params` (conference_id, review_id, user_id, created_after, created_before).
+    Ritorna (queryset, None) oppure (None, messaggio di errore).
+    """
+    comments = Comment.objects.all()
+    for param, lookup in (('conference_id', 'review__paper__conference_id'), ('review_id', 'review_id'), ('user_id', 'user_id')):
+        value = params.get(param)
+        if value is None:
+            continue
+        if not value.isdigit():
+            return None, f'Invalid {param}'
+        comments = comments.filter(**{lookup: int(value)})
+
+    for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+        value = params.get(param)
+        if value is None:
+            continue
+        try:
+            moment = parse_datetime(value)
+        except ValueError:
+            moment = None
+        if moment is None:
+            return None, f'Invalid {param}: use an ISO 8601 datetime'
+        comments = comments.filter(**{lookup: moment})
+    return comments, None
+
+
+async def stream_comments(comments, output_format='json', chunk_size=2000):
+    """
+    Genera l'export dei commenti un blocco alla volta: aiterator(chunk_size) legge dal database a blocchi
+    senza tenere in memoria l'intero queryset. `output_format` è 'json' (un array) o 'ndjson' (un oggetto per riga).
+    Il generatore è async: sotto ASGI Django consumerebbe per intero un iteratore sincrono prima di inviarlo.
+    """
+    rows = comments.order_by('id').values(*COMMENT_FIELDS).aiterator(chunk_size=chunk_size)
+    if output_format == 'ndjson':
+        buffer = []
+        async for row in rows:
+            buffer.append(dumps(serialize_comment_row(row)))
+            if len(buffer) >= chunk_size:
+                yield b'\n'.join(buffer) + b'\n'
+                buffer = []
+        if buffer:
+            yield b'\n'.join(buffer) + b'\n'
+        return
+
+    yield b'['
+    buffer, first = [], True
+    async for row in rows:
+        buffer.append(dumps(serialize_comment_row(row)))
+        if len(buffer) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(buffer)
+            buffer, first = [], False
+    if buffer:
+        yield (b'' if first else b',') + b','.join(buffer)
+    yield b']'
+
+
+# Colonne dei thread: i dati dell'autore arrivano con una JOIN, senza una query per commento
+THREAD_FIELDS = (
+    'id', 'review_id', 'parent_id', 'path', 'reply_count', 'comment_text', 'created_at',
+    'user_id', 'user__first_name', 'user__last_name', 'user__email',
+)
+
+
+def build_path(parent_path, comment_id):
+    return f'{parent_path}{comment_id:0{PATH_DIGITS}d}/'
+
+
+def subtree_filter(path):
+    """
+    Lookup dei commenti il cui path inizia con `path` (il commento e tutte le sue risposte), scritto come
+    intervallo invece che con startswith così che anche SQLite usi l'indice (review, path).
+    I path contengono solo cifre e '/', che precedono '~'.
+    """
+    return {'path__gte': path, 'path__lt': path + '~'}
+
+
+def is_valid_path(path):
+    return bool(_path_re.match(path))
+
+
+def serialize_thread_row(row):
+    return {
+        'id': row['id'],
+        'review_id': row['review_id'],
+        'parent_id': row['parent_id'],
+        'depth': row['path'].count('/') - 1,
+        'reply_count': row['reply_count'],
+        'user_id': row['user_id'],
+        'user': {
+            'id': row['user_id'],
+            'first_name': row['user__first_name'],
+            'last_name': row['user__last_name'],
+            'email': row['user__email']
+        },
+        'comment_text': row['comment_text'],
+        'created_at': row['created_at'].isoformat()
+    }
+
+
+def parse_page_size(params, default=50, maximum=200):
+    """Ritorna la dimensione della pagina richiesta, o None se non è valida."""
+    try:
+        page_size = min(int(params.get('page_size', default)), maximum)
+    except ValueError:
+        return None
+    return page_size if page_size >= 1 else None
+
+
+def thread_page(comments, page_size, order=('path',)):
+    """
+    Una pagina di commenti in ordine di thread (depth-first), letta con una sola query.
+    Ritorna (commenti serializzati, ultima riga se ci sono altre pagine altrimenti None).
+    """
+    # Una riga in più per sapere se ci sono altre pagine senza fare COUNT(*)
+    rows = list(comments.order_by(*order).values(*THREAD_FIELDS)[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return [serialize_thread_row(row) for row in rows], (rows[-1] if has_more else None)
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_alter_comment_id'),
+        ('reviews', '0006_review_paper_user_idx'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='comment_created_at_idx'),
+        ),
+    ]
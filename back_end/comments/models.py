@@ -5,8 +5,26 @@ from reviews.models import Review
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name="comments") ## Paper can be taken from Review
+    # Risposta a un altro commento della stessa review; cancellando un commento si cancellano anche le risposte
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name="replies")
+    # Materialized path: id degli antenati e del commento, a 10 cifre, es. "0000000012/0000000045/".
+    # Ordinando per path si ottiene il thread in ordine depth-first; un sottoalbero è un intervallo di path
+    path = models.CharField(max_length=255, blank=True, default='')
+    reply_count = models.PositiveIntegerField(default=0)  # Risposte dirette, aggiornato dai signal
     comment_text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Filtri per intervallo di date di comments/list/ e dell'export
+            models.Index(fields=['created_at'], name='comment_created_at_idx'),
+            # Thread di una review e sottoalberi: una range scan su (review, path)
+            models.Index(fields=['review', 'path'], name='comment_review_path_idx'),
+        ]
+
+    @property
+    def depth(self):
+        return self.path.count('/') - 1
+
     def __str__(self):
-        return f"Comment by {self.user.first_name} {self.user.last_name} on {self.review.paper.title} review"
\ No newline at end of file
+        return f"Comment by {self.user.first_name} {self.user.last_name} on {self.review.paper.title} review"
@@ -0,0 +1,25 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .helpers import build_path
+from .models import Comment
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Il path contiene l'id del commento: viene scritto subito dopo l'INSERT, insieme al contatore del padre."""
+    if not created or instance.path:
+        return
+    parent_path = instance.parent.path if instance.parent_id else ''
+    instance.path = build_path(parent_path, instance.id)
+    Comment.objects.filter(id=instance.id).update(path=instance.path)
+    if instance.parent_id:
+        Comment.objects.filter(id=instance.parent_id).update(reply_count=F('reply_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.parent_id:
+        # Se anche il padre è stato cancellato (cascade) l'UPDATE non trova righe
+        Comment.objects.filter(id=instance.parent_id, reply_count__gt=0).update(reply_count=F('reply_count') - 1)
@@ -1,7 +1,10 @@
 from django.utils import timezone
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 import json
+from unittest import mock
 
 from users.models import User
 from reviews.models import Review
@@ -107,4 +110,205 @@ class CommentTests(TestCase):
 
 #        comments_text = [comment["comment_text"] for comment in response_data]
 #        self.assertIn("Primo commento", comments_text)
-#        self.assertIn("Secondo commento", comments_text)
\ No newline at end of file
+#        self.assertIn("Secondo commento", comments_text)
+
+class CommentListingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(first_name="John", last_name="Doe", email="john@example.com", password="x")
+        self.other_user = User.objects.create(first_name="Jane", last_name="Roe", email="jane@example.com", password="x")
+        self.reviews = []
+        for title in ("First Conference", "Second Conference"):
+            conference = Conference.objects.create(
+                title=title, admin_id=self.author, description="Conference description",
+                deadline=timezone.now() + timezone.timedelta(days=7)
+            )
+            paper = Paper.objects.create(title="Paper", conference=conference, author_id=self.author, status_id='submitted')
+            self.reviews.append(Review.objects.create(
+                paper=paper, user=self.author, comment_text="Review", score=3, confidence_level=2
+            ))
+        self.first_conference = self.reviews[0].paper.conference
+
+        start = timezone.now() - timezone.timedelta(days=10)
+        self.comments = []
+        for i in range(7):
+            comment = Comment.objects.create(
+                user=self.author if i % 2 else self.other_user,
+                review=self.reviews[i % 2],
+                comment_text=f"Comment {i}"
+            )
+            # created_at è auto_now_add: le date vanno impostate dopo la creazione
+            Comment.objects.filter(id=comment.id).update(created_at=start + timezone.timedelta(days=i))
+            self.comments.append(comment)
+
+    async def _export(self, **params):
+        response = await self.async_client.get(reverse('get_all_comments'), params)
+        # Iteratore async: sotto ASGI l'export viene inviato un blocco alla volta
+        self.assertTrue(response.is_async)
+        return response, b''.join([chunk async for chunk in response.streaming_content])
+
+    @override_settings(COMMENTS_EXPORT_CHUNK_SIZE=2)
+    async def test_export_json_array(self):
+        response, content = await self._export()
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(content)
+        self.assertEqual([comment['id'] for comment in data], [comment.id for comment in self.comments])
+        self.assertEqual(set(data[0]), {'id', 'review_id', 'user_id', 'comment_text', 'created_at'})
+
+    @override_settings(COMMENTS_EXPORT_CHUNK_SIZE=3)
+    async def test_export_ndjson(self):
+        response, content = await self._export(output='ndjson', conference_id=self.first_conference.id)
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.decode('utf-8').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [comment.id for comment in self.comments[0::2]])
+
+    async def test_export_empty(self):
+        await Comment.objects.all().adelete()
+        _, content = await self._export()
+        self.assertEqual(json.loads(content), [])
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_export_reads_from_replica(self):
+        # Lo stream viene letto dopo l'uscita da @read_replica: il queryset deve avere già la replica
+        with mock.patch('comments.views.stream_comments', return_value=iter([b'[]'])) as stream:
+            self.client.get(reverse('get_all_comments'))
+
+        self.assertEqual(stream.call_args.args[0].db, 'replica1')
+
+    def test_export_invalid_format(self):
+        self.assertEqual(self.client.get(reverse('get_all_comments'), {'output': 'xml'}).status_code, 400)
+
+    def test_list_cursor_pagination(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('list_comments'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(queries.captured_queries), 1)
+            seen += [comment['id'] for comment in response.json()['comments']]
+            cursor = response.json()['next_cursor']
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [comment.id for comment in self.comments])
+
+    def test_list_filters(self):
+        url = reverse('list_comments')
+        by_user = self.client.get(url, {'user_id': self.author.id}).json()['comments']
+        self.assertEqual([c['id'] for c in by_user], [c.id for c in self.comments[1::2]])
+
+        by_review = self.client.get(url, {'review_id': self.reviews[1].id}).json()['comments']
+        self.assertEqual(len(by_review), 3)
+
+        start = Comment.objects.get(id=self.comments[2].id).created_at
+        end = Comment.objects.get(id=self.comments[5].id).created_at
+        in_range = self.client.get(url, {'created_after': start.isoformat(), 'created_before': end.isoformat()}).json()['comments']
+        self.assertEqual([c['id'] for c in in_range], [c.id for c in self.comments[2:5]])
+
+    def test_list_invalid_parameters(self):
+        url = reverse('list_comments')
+        for params in ({'cursor': 'abc'}, {'page_size': 0}, {'user_id': 'x'}, {'created_after': 'yesterday'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(first_name="John", last_name="Doe", email="john@example.com", password="x")
+        conference = Conference.objects.create(
+            title="Conference", admin_id=self.user, description="Conference description",
+            deadline=timezone.now() + timezone.timedelta(days=7)
+        )
+        self.paper = Paper.objects.create(title="Paper", conference=conference, author_id=self.user, status_id='submitted')
+        self.review = Review.objects.create(paper=self.paper, user=self.user, comment_text="Review", score=3, confidence_level=2)
+        self.other_review = Review.objects.create(paper=self.paper, user=self.user, comment_text="Review", score=4, confidence_level=2)
+
+        # a
+        # ├── a1
+        # │   └── a1x
+        # └── a2
+        # b
+        self.a = self._comment("a")
+        self.a1 = self._comment("a1", parent=self.a)
+        self.b = self._comment("b")
+        self.a1x = self._comment("a1x", parent=self.a1)
+        self.a2 = self._comment("a2", parent=self.a)
+        self.thread_order = [self.a, self.a1, self.a1x, self.a2, self.b]
+
+    def _comment(self, text, parent=None, review=None):
+        return Comment.objects.create(user=self.user, review=review or self.review, parent=parent, comment_text=text)
+
+    def _ids(self, response):
+        return [comment['id'] for comment in response.json()['comments']]
+
+    def _walk(self, url, page_size):
+        ids, cursor = [], None
+        while True:
+            response = self.client.get(url, {'page_size': page_size, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            ids += self._ids(response)
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_paths_and_reply_counts(self):
+        self.a.refresh_from_db()
+        self.a1x.refresh_from_db()
+        self.assertEqual(self.a.reply_count, 2)
+        self.assertEqual(self.a1x.depth, 2)
+        self.assertTrue(self.a1x.path.startswith(self.a1.path))
+
+        self.a2.delete()
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.reply_count, 1)
+
+    def test_review_comments_in_thread_order(self):
+        url = reverse('get_comments_by_review', args=[self.review.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(self._ids(response), [c.id for c in self.thread_order])
+        self.assertEqual(len(queries.captured_queries), 1)
+        first = response.json()['comments'][0]
+        self.assertEqual((first['depth'], first['reply_count'], first['user']['email']), (0, 2, "john@example.com"))
+        self.assertEqual(self._walk(url, 2), [c.id for c in self.thread_order])
+
+    def test_subtree(self):
+        url = reverse('get_comment_thread', args=[self.a.id])
+        self.assertEqual(self._ids(self.client.get(url)), [self.a.id, self.a1.id, self.a1x.id, self.a2.id])
+        self.assertEqual(self._walk(url, 1), [self.a.id, self.a1.id, self.a1x.id, self.a2.id])
+        self.assertEqual(self._ids(self.client.get(reverse('get_comment_thread', args=[self.a1.id]))), [self.a1.id, self.a1x.id])
+        self.assertEqual(self.client.get(reverse('get_comment_thread', args=[999])).status_code, 404)
+
+    def test_deleting_a_comment_deletes_its_replies(self):
+        self.a1.delete()
+        self.assertFalse(Comment.objects.filter(id=self.a1x.id).exists())
+
+    def test_paper_comments_across_reviews(self):
+        other = self._comment("other", review=self.other_review)
+        url = reverse('get_comments_by_paper', args=[self.paper.id])
+
+        self.assertEqual(self._walk(url, 2), [c.id for c in self.thread_order] + [other.id])
+        self.assertEqual(self.client.get(url, {'cursor': 'bad'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('get_comments_by_paper', args=[999])).status_code, 404)
+
+    def test_create_reply(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['_auth_user_id'] = self.user.id
+        session.save()
+        url = reverse('create_comment')
+
+        response = self.client.post(url, json.dumps({
+            'review_id': self.review.id, 'comment_text': "reply", 'parent_id': self.a1x.id
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['parent_id'], response.json()['depth']), (self.a1x.id, 3))
+
+        response = self.client.post(url, json.dumps({
+            'review_id': self.other_review.id, 'comment_text': "reply", 'parent_id': self.a.id
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
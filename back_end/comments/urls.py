@@ -4,8 +4,10 @@ from . import views
 urlpatterns = [
     path('create/', views.create_comment, name='create_comment'),
     path('allthecomments/list/', views.get_all_comments, name='get_all_comments'),
+    path('list/', views.list_comments, name='list_comments'),
     path('<int:comment_id>/', views.get_comment_by_id, name='get_specific_comment'),
     path('<int:comment_id>/update/', views.update_comment, name='update_comment'),
+    path('<int:comment_id>/thread/', views.get_comment_thread, name='get_comment_thread'),
     path('paper/<int:paper_id>/get_comments', views.get_comments_by_paper, name='get_comments_by_paper'),
     path('review/<int:review_id>/get_comments', views.get_comments_by_review, name='get_comments_by_review'),
     path('delete/<int:comment_id>/', views.delete_comment, name='delete_comment'),
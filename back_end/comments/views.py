@@ -1,12 +1,23 @@
-from django.http import JsonResponse
+from api.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import openapi
+from api.schema import swagger_auto_schema
 from rest_framework.decorators import api_view
 from rest_framework.utils import json
+from django.conf import settings
+from django.db import router
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
 from comments.models import Comment
+from database.decorators import read_replica
+from api.throttling import rate_limit
+from .helpers import (
+    COMMENT_FIELDS, COMMENT_MAX_DEPTH, filter_comments, is_valid_path, parse_page_size, serialize_comment_row,
+    stream_comments, subtree_filter, thread_page,
+)
+from papers.models import Paper
 from reviews.models import Review
 from users.models import User
 from users.decorators import get_user
@@ -20,14 +31,15 @@ from users.decorators import get_user
         type=openapi.TYPE_OBJECT,
         properties={
             'id_review': openapi.Schema(type=openapi.TYPE_INTEGER, description='ID of the review'),
-            'text': openapi.Schema(type=openapi.TYPE_STRING, description='Text of the comment')
+            'text': openapi.Schema(type=openapi.TYPE_STRING, description='Text of the comment'),
+            'parent_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='ID of the comment this one replies to (optional)')
         },
         required=['id_review', 'text']
     ),
     responses={
         201: openapi.Response(description="Comment added successfully"),
-        400: openapi.Response(description="Missing fields"),
-        404: openapi.Response(description="Review not found"),
+        400: openapi.Response(description="Missing fields, parent on another review or thread too deep"),
+        404: openapi.Response(description="Review or parent comment not found"),
         405: openapi.Response(description="Only POST requests are allowed")
     }
 )
@@ -54,6 +66,19 @@ def create_comment(request):
             except Review.DoesNotExist:
                 return JsonResponse({'error': 'Review not found'}, status=404)
 
+            # Risposta a un altro commento: deve essere della stessa review
+            parent = None
+            parent_id = data.get('parent_id')
+            if parent_id:
+                try:
+                    parent = Comment.objects.get(id=parent_id)
+                except Comment.DoesNotExist:
+                    return JsonResponse({'error': 'Parent comment not found'}, status=404)
+                if parent.review_id != review.id:
+                    return JsonResponse({'error': 'Parent comment belongs to another review'}, status=400)
+                if parent.depth + 1 >= COMMENT_MAX_DEPTH:
+                    return JsonResponse({'error': 'Thread too deep'}, status=400)
+
             # Get the logged-in user
             user = request.user
 
@@ -61,6 +86,7 @@ def create_comment(request):
             comment = Comment.objects.create(
                 user=user,
                 review=review,
+                parent=parent,
                 comment_text=comment_text,
                 created_at=timezone.now()
             )
@@ -68,6 +94,8 @@ def create_comment(request):
             return JsonResponse({
                 'id': comment.id,
                 'review_id': comment.review.id,
+                'parent_id': comment.parent_id,
+                'depth': comment.depth,
                 'user_id': comment.user.id,
                 'comment_text': comment.comment_text,
                 'created_at': comment.created_at.isoformat()
@@ -80,36 +108,103 @@ def create_comment(request):
 
 
 
-## funzione che restituisce tutti i commenti di una recensione
+FILTER_PARAMETERS = [
+    openapi.Parameter('conference_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Only comments on reviews of this conference'),
+    openapi.Parameter('review_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Only comments on this review'),
+    openapi.Parameter('user_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Only comments written by this user'),
+    openapi.Parameter('created_after', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME,
+                      description='Only comments created at or after this ISO 8601 datetime'),
+    openapi.Parameter('created_before', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME,
+                      description='Only comments created before this ISO 8601 datetime'),
+]
+
+
+## funzione che esporta tutti i commenti in streaming
 @swagger_auto_schema(
     method='get',
-    operation_description="Retrieve all comments.",
+    operation_description="Export all comments as a streamed JSON array (or NDJSON with `output=ndjson`). "
+                          "Rows are read from the database in chunks, so the export never holds the whole table in memory. "
+                          "For interactive use prefer the paginated `comments/list/`.",
+    manual_parameters=FILTER_PARAMETERS + [
+        openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['json', 'ndjson'],
+                          description='json (default): a single array; ndjson: one comment per line'),
+    ],
     responses={
         200: openapi.Response(description="List of comments"),
+        400: openapi.Response(description="Invalid filter or format"),
     }
 )
 @api_view(['GET'])
+@rate_limit('get_all_comments', rate='30/m', concurrency=2, global_concurrency=4)
+@read_replica
 def get_all_comments(request):
     """
-    Retrieve all comments.
+    Export all comments, streamed.
     """
     if request.method == 'GET':
-        comments = Comment.objects.all()
-        comments_data = [
-            {
-                'id': comment.id,
-                'review_id': comment.review.id,
-                'user_id': comment.user.id,
-                'comment_text': comment.comment_text,
-                'created_at': comment.created_at.isoformat()
-            }
-            for comment in comments
-        ]
-        return JsonResponse(comments_data, safe=False, status=200)
+        # 'output' e non 'format': DRF usa ?format= per la negoziazione del renderer
+        output_format = request.GET.get('output', 'json')
+        if output_format not in ('json', 'ndjson'):
+            return JsonResponse({'error': 'Invalid output: use json or ndjson'}, status=400)
+        comments, error = filter_comments(request.GET)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        # Lo stream viene letto dopo l'uscita da @read_replica: il database va scelto adesso
+        comments = comments.using(router.db_for_read(Comment))
+        chunk_size = getattr(settings, 'COMMENTS_EXPORT_CHUNK_SIZE', 2000)
+        return StreamingHttpResponse(
+            stream_comments(comments, output_format, chunk_size),
+            content_type='application/x-ndjson' if output_format == 'ndjson' else 'application/json',
+            status=200
+        )
 
     return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
 
 
+## funzione che restituisce i commenti filtrati, una pagina alla volta
+@swagger_auto_schema(
+    method='get',
+    operation_description="List comments with cursor pagination, oldest first. "
+                          "Pass the returned `next_cursor` as `cursor` to get the next page; it is null on the last page.",
+    manual_parameters=FILTER_PARAMETERS + [
+        openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Cursor returned by the previous page'),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Comments per page (max 200)'),
+    ],
+    responses={
+        200: openapi.Response(description="A page of comments"),
+        400: openapi.Response(description="Invalid filter, cursor or page size"),
+    }
+)
+@api_view(['GET'])
+@read_replica
+def list_comments(request):
+    comments, error = filter_comments(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    page_size = parse_page_size(request.GET)
+    if page_size is None:
+        return JsonResponse({'error': 'Invalid page_size'}, status=400)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        if not cursor.isdigit():
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        # Keyset pagination sull'id: il costo di una pagina non dipende da quante ne sono state lette prima
+        comments = comments.filter(id__gt=int(cursor))
+
+    # Una riga in più per sapere se ci sono altre pagine senza fare COUNT(*)
+    rows = list(comments.order_by('id').values(*COMMENT_FIELDS)[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    return JsonResponse({
+        'comments': [serialize_comment_row(row) for row in rows],
+        'next_cursor': str(rows[-1]['id']) if has_more else None
+    }, status=200)
+
+
 ## funzione che restituisce un commento specifico
 @swagger_auto_schema(
     method='get',
@@ -201,99 +296,134 @@ def update_comment(request, comment_id):
     return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
 
 
-## funzione che restituisce tutti i commenti di un paper (SIP 125
+THREAD_PAGE_PARAMETERS = [
+    openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Cursor returned by the previous page'),
+    openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Comments per page (default 50, max 200)'),
+]
+THREAD_PAGE_DESCRIPTION = (
+    "Comments come in thread order: every comment is followed by its replies (depth-first), with `parent_id`, "
+    "`depth` and `reply_count` to rebuild the tree. Pass the returned `next_cursor` as `cursor` to get the next page; "
+    "it is null on the last page."
+)
+
+
+## funzione che restituisce i commenti di un paper, thread per thread (SIP 125
 @swagger_auto_schema(
     method='get',
-    operation_description="Retrieve all comments for a specific paper.",
+    operation_description="Retrieve the comments on the reviews of a paper. " + THREAD_PAGE_DESCRIPTION,
+    manual_parameters=THREAD_PAGE_PARAMETERS,
     responses={
-        200: openapi.Response(description="List of comments for the paper"),
+        200: openapi.Response(description="A page of comments for the paper"),
+        400: openapi.Response(description="Invalid cursor or page size"),
         404: openapi.Response(description="Paper not found"),
     }
 )
 @api_view(['GET'])
+@read_replica
 def get_comments_by_paper(request, paper_id):
     """
-    Retrieve all comments for a specific paper.
+    Retrieve the comments for a specific paper, one page at a time.
     """
     if request.method == 'GET':
-        try:
-            # Verifica se il paper esiste
-            reviews = Review.objects.filter(paper_id=paper_id)
-
-            if not reviews.exists():
-                return JsonResponse({'error': 'Paper not found'}, status=404)
-
-            # Recupera tutti i commenti associati al paper
-            comments = Comment.objects.filter(review__in=reviews)
-
-            # Serializza i commenti
-            comments_data = [
-                {
-                    'id': comment.id,
-                    'review_id': comment.review.id,
-                    'user_id': comment.user.id,
-                    'comment_text': comment.comment_text,
-                    'created_at': comment.created_at.isoformat()
-                }
-                for comment in comments
-            ]
-
-            return JsonResponse(comments_data, safe=False, status=200)
-
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+        page_size = parse_page_size(request.GET)
+        if page_size is None:
+            return JsonResponse({'error': 'Invalid page_size'}, status=400)
+
+        comments = Comment.objects.filter(review__paper_id=paper_id)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            # Cursore "review_id:path": le review sono ordinate per id, i commenti di ognuna per path
+            review_id, _, path = cursor.partition(':')
+            if not review_id.isdigit() or not is_valid_path(path):
+                return JsonResponse({'error': 'Invalid cursor'}, status=400)
+            comments = comments.filter(Q(review_id__gt=int(review_id)) | Q(review_id=int(review_id), path__gt=path))
+
+        comments_data, last = thread_page(comments, page_size, order=('review_id', 'path'))
+        # Il paper viene cercato solo se non ha commenti, invece che con una query in più a ogni richiesta
+        if not comments_data and not cursor and not Paper.objects.filter(id=paper_id).exists():
+            return JsonResponse({'error': 'Paper not found'}, status=404)
+
+        return JsonResponse({
+            'comments': comments_data,
+            'next_cursor': f"{last['review_id']}:{last['path']}" if last else None
+        }, status=200)
 
     return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
 
+
 @swagger_auto_schema(
     method='get',
-    operation_description="Retrieve all comments for a specific review.",
+    operation_description="Retrieve the comments for a specific review. " + THREAD_PAGE_DESCRIPTION,
+    manual_parameters=THREAD_PAGE_PARAMETERS,
     responses={
-        200: openapi.Response(description="List of comments for the review"),
-        404: openapi.Response(description="Paper not found"),
+        200: openapi.Response(description="A page of comments for the review"),
+        400: openapi.Response(description="Invalid cursor or page size"),
     }
 )
 @api_view(['GET'])
+@read_replica
 def get_comments_by_review(request, review_id):
     """
-    Retrieve all comments for a specific paper.
+    Retrieve the comments for a specific review, one page at a time.
     """
     if request.method == 'GET':
-        try:
-            # Verifica se la review esiste
-            #review = Review.objects.get(id = review_id)
-
-            #if not review.exists():
-            #    return JsonResponse({'error': 'Paper not found'}, status=404)
-
-            # Recupera tutti i commenti associati alla review
-            comments = Comment.objects.filter(review_id=review_id)
-
-            # Serializza i commenti
-            comments_data = [
-                {
-                    "id": comment.id,
-                    "review_id": comment.review.id,
-                    "user": {
-                        "id": comment.user.id,
-                        "first_name": comment.user.first_name,
-                        "last_name": comment.user.last_name,
-                        "email": comment.user.email
-                    },
-                    "comment_text": comment.comment_text,
-                    "created_at": comment.created_at.isoformat()
-                }
-                for comment in comments
-            ]
-
-            return JsonResponse(comments_data, safe=False, status=200)
-
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+        page_size = parse_page_size(request.GET)
+        if page_size is None:
+            return JsonResponse({'error': 'Invalid page_size'}, status=400)
+
+        comments = Comment.objects.filter(review_id=review_id)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            if not is_valid_path(cursor):
+                return JsonResponse({'error': 'Invalid cursor'}, status=400)
+            comments = comments.filter(path__gt=cursor)
+
+        comments_data, last = thread_page(comments, page_size)
+        return JsonResponse({
+            'comments': comments_data,
+            'next_cursor': last['path'] if last else None
+        }, status=200)
 
     return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
 
 
+## funzione che restituisce un commento con tutte le sue risposte
+@swagger_auto_schema(
+    method='get',
+    operation_description="Retrieve a comment followed by all its replies, at any depth. " + THREAD_PAGE_DESCRIPTION,
+    manual_parameters=THREAD_PAGE_PARAMETERS,
+    responses={
+        200: openapi.Response(description="A page of the thread"),
+        400: openapi.Response(description="Invalid cursor or page size"),
+        404: openapi.Response(description="Comment not found"),
+    }
+)
+@api_view(['GET'])
+@read_replica
+def get_comment_thread(request, comment_id):
+    page_size = parse_page_size(request.GET)
+    if page_size is None:
+        return JsonResponse({'error': 'Invalid page_size'}, status=400)
+
+    root = Comment.objects.filter(id=comment_id).values('review_id', 'path').first()
+    if root is None:
+        return JsonResponse({'error': 'Comment not found'}, status=404)
+
+    # Il sottoalbero è l'intervallo di path che iniziano con quello del commento
+    comments = Comment.objects.filter(review_id=root['review_id'], **subtree_filter(root['path']))
+    cursor = request.GET.get('cursor')
+    if cursor:
+        if not is_valid_path(cursor):
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        comments = comments.filter(path__gt=cursor)
+
+    comments_data, last = thread_page(comments, page_size)
+    return JsonResponse({
+        'comments': comments_data,
+        'next_cursor': last['path'] if last else None
+    }, status=200)
+
+
 ## delete di un commento
 @swagger_auto_schema(
     method='delete',
@@ -0,0 +1,56 @@
+"""
+Assegnazione automatica dei revisori ai paper come problema di programmazione lineare intera (PuLP).
+
+PuLP (e il solver CBC) viene importato solo alla prima assegnazione: worker, comandi di manage.py
+e test che non la usano non ne pagano il tempo di import.
+"""
+
+# Punteggio di ogni assegnamento in base alla preferenza del revisore; senza preferenza vale 1
+INTERESTED_BONUS = 2
+NOT_INTERESTED_PENALTY = 5
+
+
+def _assignment_score(preference, penalty_weight):
+    if preference == 'interested':
+        return INTERESTED_BONUS
+    if preference == 'not_interested':
+        return -penalty_weight
+    return 1
+
+
+def solve_assignment(paper_ids, reviewer_ids, preferences, max_papers_per_reviewer, required_reviewers_per_paper,
+                     penalty_weight=NOT_INTERESTED_PENALTY):
+    """
+    Ritorna le coppie (paper_id, reviewer_id) dell'assegnamento che massimizza la soddisfazione totale
+    dei revisori, o None se non esiste un assegnamento ottimo che rispetti i vincoli.
+    `preferences` è un dizionario {(paper_id, reviewer_id): 'interested' | 'not_interested'}.
+    """
+    import pulp
+
+    # LpMaximize: massimizza la funzione obiettivo
+    prob = pulp.LpProblem("Paper_Assignment", pulp.LpMaximize)
+
+    # Variabili binarie: assignments[(p, r)] = 1 se il paper p è assegnato al revisore r, 0 altrimenti
+    assignments = pulp.LpVariable.dicts("assign", ((p, r) for p in paper_ids for r in reviewer_ids), cat='Binary')
+
+    # Funzione obiettivo: +2 se il revisore è interessato, +1 se neutrale, -penalty_weight se non interessato.
+    # Assegnare un paper a un revisore non interessato non è vietato, ma non sarà mai la scelta ottimale
+    prob += pulp.lpSum(
+        _assignment_score(preferences.get((p, r)), penalty_weight) * assignments[(p, r)]
+        for p in paper_ids for r in reviewer_ids
+    )
+
+    # Constraint 1: ogni paper deve avere almeno required_reviewers_per_paper revisori
+    for p in paper_ids:
+        prob += pulp.lpSum(assignments[(p, r)] for r in reviewer_ids) >= required_reviewers_per_paper
+
+    # Constraint 2: ogni reviewer può avere al massimo max_papers_per_reviewer da recensire
+    for r in reviewer_ids:
+        prob += pulp.lpSum(assignments[(p, r)] for p in paper_ids) <= max_papers_per_reviewer
+
+    # msg=False: il solver non scrive il proprio log su stdout
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+
+    if pulp.LpStatus[prob.status] != 'Optimal':
+        return None
+    return [(p, r) for p in paper_ids for r in reviewer_ids if pulp.value(assignments[(p, r)]) == 1]
@@ -1,74 +1,259 @@
-from django.core.mail import EmailMultiAlternatives
+import codecs
+import csv
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.core.validators import validate_email
+
+from emails.helpers import build_email, enqueue_email, enqueue_emails
+from emails.rendering import render_email, render_email_batch
+from notifications.models import Notification
+from notifications.signals import push_bulk_notifications
+from reviews.models import ReviewTemplateItem
+from users.models import User
+from conference_roles.models import ConferenceRole
+from .models import Conference
 
 def send_invitation_email(to_email, conference_title, admin_user):
-    subject = f'Invite to be a reviewer for the conference "{conference_title}"'
-    from_email = 'submissionispossible6@gmail.com'
-    text_content = f'You have been invited by {admin_user.first_name} {admin_user.last_name} to be a reviewer for the conference "{conference_title}".'
-
-    email_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                background-color: #f4f4f4;
-                color: #333;
-            }}
-            .container {{
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-                background-color: #F2E3EB;
-                border-radius: 10px;
-                box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
-            }}
-            .header {{
-                text-align: center;
-                padding: 10px 0;
-                background-color: #873F7E;
-                color: #fff;
-                border-radius: 10px 10px 0 0;
-            }}
-            .content {{
-                padding: 20px;
-            }}
-            .button {{
-                display: block;
-                width: 200px;
-                margin: 20px auto;
-                padding: 10px;
-                text-align: center;
-                background-color: #D7AEEE;
-                color: #333;
-                text-decoration: underline;
-                border-radius: 5px;
-                border: 1px solid #D7AEEE;
-            }}
-            .button:hover {{
-                background-color: #ffcccc;
-                border-color: #ffcccc;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Invite to a Conference</h1>
-            </div>
-            <div class="content">
-                <p>Hello,</p>
-                <p>You have been invited by {admin_user.first_name} {admin_user.last_name} to be a reviewer for the conference "<strong>{conference_title}</strong>".</p>
-                <p>For more information, please visit our website:</p>
-                <a href="http://http://localhost:5173/login" class="button">Go to SubmissionIsPossible</a>
-                <p>Thank you,</p>
-                <p>The SubmissionIsPossible Team</p>
-            </div>
-        </div>
-    </body>
-    </html>
+    subject, text_content, email_content = render_email('reviewer_invitation', {
+        'conference_title': conference_title,
+        'admin_user': admin_user,
+    })
+
+    # The email is queued and sent asynchronously by the process_email_queue worker
+    enqueue_email(subject, text_content, to_email, html_content=email_content)
+
+
+def send_invitation_emails(to_emails, conference_title, admin_user):
+    # Renders every invitation with the same shared context and queues them with a single INSERT
+    rendered = render_email_batch('reviewer_invitation', {
+        'conference_title': conference_title,
+        'admin_user': admin_user,
+    }, [{'to_email': to_email} for to_email in to_emails])
+
+    enqueue_emails([
+        build_email(subject, text_content, to_email, html_content=email_content)
+        for to_email, (subject, text_content, email_content) in zip(to_emails, rendered)
+    ])
+
+
+# Size of the chunks used for `email__in` lookups, so that very large invitation rounds
+# stay below the database limit on query parameters
+EMAIL_LOOKUP_CHUNK_SIZE = 500
+
+
+def resolve_reviewers(reviewers):
+    """
+    Resolves the `reviewers` payload ([{"email": ...}, ...]) with chunked `email__in` queries.
+    Returns (users, unknown_emails, duplicate_emails); users keep the order of the request.
+    """
+    emails = []
+    seen = set()
+    duplicates = []
+    for reviewer in reviewers or []:
+        email = reviewer.get('email') if isinstance(reviewer, dict) else None
+        if not email:
+            continue
+        if email in seen:
+            duplicates.append(email)
+            continue
+        seen.add(email)
+        emails.append(email)
+
+    users_by_email = {}
+    for start in range(0, len(emails), EMAIL_LOOKUP_CHUNK_SIZE):
+        chunk = emails[start:start + EMAIL_LOOKUP_CHUNK_SIZE]
+        users_by_email.update((user.email, user) for user in User.objects.filter(email__in=chunk))
+
+    users = [users_by_email[email] for email in emails if email in users_by_email]
+    unknown = [email for email in emails if email not in users_by_email]
+    return users, unknown, duplicates
+
+
+def find_invited_reviewers(admin_user, conference, users):
+    """Returns the users among `users` that already have a reviewer invitation for the conference."""
+    invited_ids = set()
+    user_ids = [user.id for user in users]
+    for start in range(0, len(user_ids), EMAIL_LOOKUP_CHUNK_SIZE):
+        invited_ids.update(Notification.objects.filter(
+            user_sender=admin_user,
+            user_receiver_id__in=user_ids[start:start + EMAIL_LOOKUP_CHUNK_SIZE],
+            conference=conference,
+            type=1  # reviewer type
+        ).values_list('user_receiver_id', flat=True))
+    return [user for user in users if user.id in invited_ids]
+
+
+def create_reviewer_invitations(admin_user, conference, users):
     """
+    Creates the pending reviewer notifications with a single INSERT and queues the invitation emails.
+    Must be called inside a transaction, so that notifications and queued emails are committed together.
+    """
+    # Create only the notifications, the role will be created after acceptance
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_sender=admin_user,
+            user_receiver=user,
+            conference=conference,
+            status=0,  # pending
+            type=1  # reviewer type
+        )
+        for user in users
+    ])
+    push_bulk_notifications(notifications)
+    send_invitation_emails([user.email for user in users], conference.title, admin_user)
+    return notifications
+
+
+# Encodings tried, in order, when importing a CSV of reviewers (iso-8859-1 never fails, so it is the last resort)
+CSV_ENCODINGS = ['utf-8-sig', 'cp1252', 'iso-8859-1']
+CSV_CHUNK_SIZE = 64 * 1024
+CSV_LINE_END = re.compile(r'\r\n|\n|\r')
+# Unknown, duplicate and invalid emails returned per list by upload_reviewers_csv; the ones beyond
+# are only counted. The matched emails are always returned in full: clients send them back to
+# create_conference/edit_conference to invite the reviewers
+CSV_MAX_REPORTED_EMAILS = 1000
+
+
+CONFERENCE_STATUSES = ['none', 'single_blind', 'double_blind']
+
 
-    msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email])
-    msg.attach_alternative(email_content, "text/html")
-    msg.send()
+def validate_conference_data(data):
+    """Ritorna l'errore da restituire per i dati di create_conference, o None se sono validi."""
+    if not (data.get('title') and data.get('deadline') and data.get('description') and data.get('papers_deadline')):
+        return 'Missing required fields'
+    if data.get('reviewers') is None:
+        return 'Reviewers must be provided'
+    ## la submission deadline deve essere prima della deadline della conferenza
+    if data['deadline'] < data['papers_deadline']:
+        return 'Submission deadline must be before conference deadline'
+    if data.get('status') not in CONFERENCE_STATUSES:
+        return 'Invalid status'
+    return None
+
+
+def create_conference_with_reviewers(admin_user, data, reviewer_users):
+    """Crea in un'unica transazione la conferenza, il ruolo di admin, gli inviti ai revisori e il template delle review."""
+    with transaction.atomic():
+        conference = Conference.objects.create(
+            title=data['title'],
+            admin_id=admin_user,
+            created_at=timezone.now(),
+            deadline=data['deadline'],
+            description=data['description'],
+            papers_deadline=data['papers_deadline'],
+            status=data['status']
+        )
+
+        ConferenceRole.objects.create(user=admin_user, conference=conference, role='admin')
+
+        # Invite the reviewers: notifications are bulk created and the emails are queued
+        create_reviewer_invitations(admin_user, conference, reviewer_users)
+
+        ReviewTemplateItem.objects.bulk_create([
+            ReviewTemplateItem(
+                conference = conference,
+                label = reviewTemplateItem.get('label'),
+                description = reviewTemplateItem.get('description'),
+                has_comment = reviewTemplateItem.get('has_comment'),
+                has_score = reviewTemplateItem.get('has_score')
+            )
+            for reviewTemplateItem in data.get('reviewTemplate') or []
+        ])
+    return conference
+
+
+def _decoded_lines(uploaded_file, encoding, chunk_size):
+    """
+    Decodes the uploaded file chunk by chunk and yields it line by line, without reading it all in memory.
+    Lines end only at \r\n, \n or \r, as csv expects: str.splitlines would also split a field on
+    characters such as \x0b, \x1c or \u2028.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in uploaded_file.chunks(chunk_size):
+        pending += decoder.decode(chunk)
+        start = 0
+        for match in CSV_LINE_END.finditer(pending):
+            # A final \r may be the first half of a \r\n split between two chunks
+            if match.group() == '\r' and match.end() == len(pending):
+                break
+            yield pending[start:match.end()]
+            start = match.end()
+        # The last line may continue in the next chunk
+        pending = pending[start:]
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def _sniff_dialect(uploaded_file, encoding, chunk_size):
+    uploaded_file.seek(0)
+    sample = next(iter(uploaded_file.chunks(chunk_size)), b'')[:4096]
+    try:
+        return csv.Sniffer().sniff(sample.decode(encoding, errors='ignore'), delimiters=',;\t|')
+    except csv.Error:
+        return csv.excel
+
+
+def _scan_reviewers_csv(uploaded_file, encoding, chunk_size, max_reported):
+    dialect = _sniff_dialect(uploaded_file, encoding, chunk_size)
+    uploaded_file.seek(0)
+
+    # Every matched email, at most `max_reported` emails per diagnostic list; every email is counted
+    result = {'matched': [], 'unknown': [], 'duplicates': [], 'invalid': []}
+    counts = dict.fromkeys(result, 0)
+    seen = set()
+    batch = []
+
+    def report(kind, email):
+        counts[kind] += 1
+        if kind == 'matched' or len(result[kind]) < max_reported:
+            result[kind].append(email)
+
+    def resolve(batch):
+        existing = set(User.objects.filter(email__in=batch).values_list('email', flat=True))
+        for email in batch:
+            report('matched' if email in existing else 'unknown', email)
+
+    for row in csv.reader(_decoded_lines(uploaded_file, encoding, chunk_size), dialect):
+        if not row or not row[0].strip():
+            continue
+        email = row[0].strip()  # Assuming email is in the first column
+        try:
+            validate_email(email)
+        except ValidationError:
+            report('invalid', email)
+            continue
+        if email in seen:
+            report('duplicates', email)
+            continue
+        seen.add(email)
+
+        batch.append(email)
+        if len(batch) >= EMAIL_LOOKUP_CHUNK_SIZE:
+            resolve(batch)
+            batch = []
+    if batch:
+        resolve(batch)
+
+    result['counts'] = counts
+    return result
+
+
+def import_reviewers_csv(uploaded_file, chunk_size=CSV_CHUNK_SIZE, max_reported=CSV_MAX_REPORTED_EMAILS):
+    """
+    Streams a CSV of reviewer emails (one per row, first column), validating the addresses and
+    resolving them against the existing users in chunked `email__in` queries.
+    Returns a dict with all the matched emails, the unknown, duplicate and invalid ones (the first
+    `max_reported` of each) and their total `counts`, or None if the file cannot be decoded.
+    """
+    for encoding in CSV_ENCODINGS:
+        try:
+            return _scan_reviewers_csv(uploaded_file, encoding, chunk_size, max_reported)
+        except UnicodeDecodeError:
+            # Restart from the beginning of the file with the next encoding
+            continue
+    return None
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from conference.teardown import process_scheduled_teardowns
+
+
+class Command(BaseCommand):
+    help = "Cancella a blocchi le conferenze grandi di cui è stata richiesta l'eliminazione (delete_conference ha risposto 202)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa le cancellazioni in attesa ed esce invece di restare in ascolto')
+        parser.add_argument('--batch-size', type=int, default=None, help='Numero di paper cancellati per transazione')
+        parser.add_argument('--interval', type=float, default=30.0, help='Secondi di attesa tra un controllo e il successivo')
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = process_scheduled_teardowns(batch_size=options['batch_size'])
+            if deleted:
+                self.stdout.write(f"Deleted {deleted} conference(s)")
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0005_conference_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conference',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -19,6 +19,7 @@ class Conference(models.Model):
     papers_deadline = models.DateTimeField(default=datetime.now)  # Deadline per la sottomissione dei paper
     automatic_assign_status = models.BooleanField(default=False)  # Stato di assegnazione automatica dei revisor
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='none')  # Stato del blinding della conferenza
+    deletion_requested_at = models.DateTimeField(null=True, blank=True)  # Cancellazione in corso (conferenze grandi, vedi teardown.py)
 
     def __str__(self):
         return self.title
\ No newline at end of file
@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.helpers import bump_versions
+from assign_paper_reviewers.models import PaperReviewAssignment
+from comments.models import Comment
+from conference_roles.models import ConferenceRole
+from notifications.helpers import invalidate_pending_counts, record_notification_removals
+from notifications.models import Notification
+from papers.helpers import delete_paper_files
+from papers.models import Paper
+from preferences.models import Preference
+from reviews.models import Review, ReviewItem, ReviewTemplateItem
+from .models import Conference
+
+
+# Receiver di pre_delete/post_delete dei modelli cancellati qui, che il DELETE set-based non emette:
+# ognuno va replicato a mano in teardown_conference (il test ConferenceTeardownSignalTests fallisce
+# se un modello ne riceve uno nuovo non elencato)
+REPLICATED_DELETE_RECEIVERS = {
+    # bump_versions sui tag della conferenza, dei paper e degli utenti con un ruolo
+    'api.signals.resource_changed',
+    # Aggiorna reply_count del padre: i commenti dei paper vengono cancellati tutti insieme
+    'comments.signals.comment_deleted',
+}
+TEARDOWN_MODELS = (
+    Comment, ReviewItem, Review, Preference, PaperReviewAssignment, Paper,
+    ReviewTemplateItem, ConferenceRole, Notification, Conference,
+)
+
+
+def _column(model, field):
+    return connection.ops.quote_name(model._meta.get_field(field).column)
+
+
+def _select(model, field, where, params):
+    """Sottoquery `SELECT pk FROM model WHERE field IN (where)`: ritorna (sql, params)."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    return f'SELECT {_column(model, model._meta.pk.name)} FROM {table} WHERE {_column(model, field)} IN ({where})', params
+
+
+def _set_delete(model, field, where, params):
+    """
+    DELETE set-based: `DELETE FROM model WHERE field IN (where)` in una sola istruzione SQL, senza caricare
+    le righe in Python né passare dal Collector di Django (quindi senza cascade né signal: i figli vanno
+    cancellati prima esplicitamente). Ritorna il numero di righe cancellate.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {_column(model, field)} IN ({where})', params)
+        return cursor.rowcount
+
+
+def _delete_papers(paper_ids_sql, params):
+    """Cancella i paper di `paper_ids_sql` e tutto ciò che dipende da loro."""
+    reviews = _select(Review, 'paper', paper_ids_sql, params)
+    _set_delete(Comment, 'review', *reviews)
+    _set_delete(ReviewItem, 'review', *reviews)
+    _set_delete(Review, 'paper', paper_ids_sql, params)
+    _set_delete(Preference, 'paper', paper_ids_sql, params)
+    _set_delete(PaperReviewAssignment, 'paper', paper_ids_sql, params)
+    _set_delete(Paper, 'id', paper_ids_sql, params)
+
+
+def _paper_tags(paper_ids):
+    return [f'paper:{paper_id}' for paper_id in paper_ids]
+
+
+def teardown_conference(conference_id, batch_size=None):
+    """
+    Cancella una conferenza con tutti i dati collegati usando DELETE set-based.
+
+    Senza `batch_size` tutto avviene in un'unica transazione. Con `batch_size` i paper (e le loro
+    review, commenti, preferenze e assegnazioni) vengono cancellati a blocchi, ognuno nella propria
+    transazione breve, così che una conferenza enorme non tenga i lock per minuti.
+    I PDF vengono rimossi in background dopo il commit di ogni transazione.
+    """
+    papers = Paper.objects.filter(conference_id=conference_id)
+    conference_papers = _select(Paper, 'conference', '%s', [conference_id])
+
+    if batch_size:
+        while True:
+            with transaction.atomic():
+                rows = list(papers.order_by('id').values_list('id', 'paper_file')[:batch_size])
+                if not rows:
+                    break
+                paper_ids = [paper_id for paper_id, _ in rows]
+                _delete_papers(', '.join(['%s'] * len(paper_ids)), paper_ids)
+                bump_versions([f'conference:{conference_id}'] + _paper_tags(paper_ids))
+                paper_files = [name for _, name in rows if name]
+                transaction.on_commit(lambda files=paper_files: delete_paper_files(files))
+
+    with transaction.atomic():
+        rows = list(papers.values_list('id', 'paper_file'))
+        _delete_papers(*conference_papers)
+        paper_files = [name for _, name in rows if name]
+        notifications = Notification.objects.filter(conference_id=conference_id)
+        # Le rimozioni vanno registrate per la sync
+        removed = list(notifications.values_list('user_receiver_id', 'id'))
+        record_notification_removals(removed)
+        notified_users = {user_id for user_id, _ in removed}
+        role_users = set(ConferenceRole.objects.filter(conference_id=conference_id).values_list('user_id', flat=True))
+
+        template_items = _select(ReviewTemplateItem, 'conference', '%s', [conference_id])
+        _set_delete(ReviewItem, 'templateItem', *template_items)
+        _set_delete(ReviewTemplateItem, 'conference', '%s', [conference_id])
+        _set_delete(PaperReviewAssignment, 'conference', '%s', [conference_id])
+        _set_delete(ConferenceRole, 'conference', '%s', [conference_id])
+        _set_delete(Notification, 'conference', '%s', [conference_id])
+        deleted = _set_delete(Conference, 'id', '%s', [conference_id])
+        # Replica di api.signals.resource_changed, che il DELETE set-based non emette
+        bump_versions(
+            ['conferences', f'conference:{conference_id}']
+            + _paper_tags(paper_id for paper_id, _ in rows)
+            + [f'user:{user_id}' for user_id in role_users]
+        )
+
+        transaction.on_commit(lambda: delete_paper_files(paper_files))
+        # I DELETE set-based non emettono signal: i contatori delle notifiche vanno invalidati qui
+        transaction.on_commit(lambda: invalidate_pending_counts(notified_users))
+
+    return bool(deleted)
+
+
+def schedule_conference_teardown(conference):
+    """Segna la conferenza come da cancellare: verrà eliminata a blocchi da `manage.py delete_conferences`."""
+    conference.deletion_requested_at = timezone.now()
+    conference.save(update_fields=['deletion_requested_at'])
+
+
+def should_teardown_async(conference):
+    threshold = getattr(settings, 'CONFERENCE_TEARDOWN_ASYNC_THRESHOLD', 500)
+    return Paper.objects.filter(conference=conference).count() > threshold
+
+
+def process_scheduled_teardowns(batch_size=None):
+    """Cancella le conferenze segnate da schedule_conference_teardown. Ritorna quante ne ha cancellate."""
+    batch_size = batch_size or getattr(settings, 'CONFERENCE_TEARDOWN_BATCH_SIZE', 200)
+    conference_ids = list(
+        Conference.objects.filter(deletion_requested_at__isnull=False)
+        .order_by('deletion_requested_at')
+        .values_list('id', flat=True)
+    )
+    for conference_id in conference_ids:
+        teardown_conference(conference_id, batch_size=batch_size)
+    return len(conference_ids)
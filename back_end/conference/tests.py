@@ -1,7 +1,7 @@
 import json
 from django.urls import reverse
 from django.utils import timezone
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, Client
 from rest_framework.test import APITestCase
 
 from .models import Conference
@@ -11,6 +11,25 @@ from papers.models import Paper
 from assign_paper_reviewers.models import PaperReviewAssignment
 from preferences.models import Preference
 from notifications.models import Notification
+from emails.models import OutgoingEmail
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from .assignment import solve_assignment
+from .helpers import import_reviewers_csv
+from papers import helpers as paper_helpers
+from api.helpers import bump_versions
+from .teardown import REPLICATED_DELETE_RECEIVERS, TEARDOWN_MODELS, teardown_conference
+from comments.models import Comment
+from reviews.models import Review, ReviewItem, ReviewTemplateItem
+from django.core.management import call_command
+from django.test import override_settings
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
 
 class ConferenceCreationTests(TestCase):
     def setUp(self):
@@ -209,6 +228,38 @@ class ConferenceCreationTests(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json()['error'], 'Missing required fields')
 
+    async def test_create_conference_async(self):
+        """Test per la variante async di create_conference"""
+        await self.async_client.aforce_login(self.admin_user)
+        payload = {
+            "title": "Async Conference",
+            "deadline": (timezone.now() + timezone.timedelta(days=7)).isoformat(),
+            "description": "Description of the async conference",
+            "reviewers": [{"email": self.reviewer.email}, {"email": self.reviewer.email}],
+            "papers_deadline": (timezone.now() + timezone.timedelta(days=5)).isoformat(),
+            "status": "single_blind",
+            "reviewTemplate": [{"label": "Originality", "description": "", "has_comment": True, "has_score": True}]
+        }
+        response = await self.async_client.post(reverse('create_conference_async'), json.dumps(payload),
+                                                 content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["invited_reviewers"], 1)
+        conference_id = response.json()["conference_id"]
+        self.assertTrue(await ConferenceRole.objects.filter(user=self.admin_user, conference_id=conference_id, role='admin').aexists())
+        self.assertEqual(await Notification.objects.filter(conference_id=conference_id, user_receiver=self.reviewer).acount(), 1)
+        self.assertEqual(await ReviewTemplateItem.objects.filter(conference_id=conference_id).acount(), 1)
+        self.assertEqual(await OutgoingEmail.objects.filter(to_email=self.reviewer.email).acount(), 1)
+
+    async def test_create_conference_async_validation(self):
+        await self.async_client.aforce_login(self.admin_user)
+        response = await self.async_client.post(reverse('create_conference_async'), json.dumps({
+            "title": "Async Conference", "deadline": "2030-01-01", "description": "x",
+            "reviewers": [], "papers_deadline": "2030-01-02", "status": "none"
+        }), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Submission deadline must be before conference deadline")
+
 class DeleteConferenceTestCase(TestCase):
     def setUp(self):
         self.client = Client()
@@ -580,6 +631,24 @@ class AutomaticAssignReviewersTest(TestCase):
         for paper in [self.paper1, self.paper2, self.paper3]:
             self.assertEqual(assignments.filter(paper=paper).count(), 2)
 
+    def test_solve_assignment_prefers_interested_reviewers(self):
+        preferences = {(1, 10): 'interested', (1, 11): 'not_interested', (2, 11): 'interested'}
+        solution = solve_assignment([1, 2], [10, 11], preferences, max_papers_per_reviewer=1, required_reviewers_per_paper=1)
+        self.assertEqual(sorted(solution), [(1, 10), (2, 11)])
+
+    def test_solve_assignment_infeasible(self):
+        self.assertIsNone(solve_assignment([1, 2, 3], [10], {}, max_papers_per_reviewer=2, required_reviewers_per_paper=1))
+
+    def test_pulp_not_imported_at_startup(self):
+        # In un processo nuovo: nei test PuLP può essere già stato importato da un altro test
+        code = (
+            "import os, sys, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'back_end.settings'); "
+            "django.setup(); import back_end.urls; print('pulp' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), 'False')
+
 class GetPaperInConferenceReviewer(TestCase):
     def setUp(self):
         self.admin = User.objects.create(first_name='Admin', last_name='User', email='admin@example.com', password='adminpass')
@@ -685,3 +754,381 @@ class GetPaperInConferenceReviewer(TestCase):
         paper_ids = [paper['id'] for paper in papers]
         self.assertIn(self.paper1.id, paper_ids)
         self.assertIn(self.paper2.id, paper_ids)
+
+
+class BulkReviewerInvitationTests(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create(
+            first_name="Admin",
+            last_name="User",
+            email="admin@example.com",
+            password="securepassword"
+        )
+        self.reviewers = [
+            User.objects.create(
+                first_name=f"Reviewer{i}",
+                last_name="User",
+                email=f"reviewer{i}@example.com",
+                password="reviewerpass"
+            )
+            for i in range(60)
+        ]
+
+        self.client.force_login(self.admin_user)
+        session = self.client.session
+        session['_auth_user_id'] = self.admin_user.id
+        session.save()
+
+    def _create_payload(self, reviewers):
+        return {
+            "title": "Test Conference",
+            "deadline": (timezone.now() + timezone.timedelta(days=7)).isoformat(),
+            "description": "Description of the test conference",
+            "reviewers": [{"email": reviewer.email} for reviewer in reviewers],
+            "papers_deadline": (timezone.now() + timezone.timedelta(days=5)).isoformat(),
+            "status": "none"
+        }
+
+    def _create_conference(self, reviewers):
+        return self.client.post(
+            reverse('create_conference'),
+            data=json.dumps(self._create_payload(reviewers)),
+            content_type="application/json"
+        )
+
+    def test_create_conference_invites_all_reviewers(self):
+        """Test per verificare che tutte le notifiche e le email di invito vengano create"""
+        response = self._create_conference(self.reviewers)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["invited_reviewers"], 60)
+        conference_id = response.json()["conference_id"]
+        self.assertEqual(Notification.objects.filter(conference_id=conference_id, type=1, status=0).count(), 60)
+        self.assertEqual(OutgoingEmail.objects.filter(status='pending').count(), 60)
+
+    def test_create_conference_query_count_does_not_grow_with_reviewers(self):
+        """Test per verificare che il numero di query non dipenda dal numero di revisori invitati"""
+        # Il contatore degli ETag dell'admin viene creato alla prima modifica: lo si crea prima della misura
+        bump_versions([f'user:{self.admin_user.id}'])
+        with CaptureQueriesContext(connection) as few:
+            self._create_conference(self.reviewers[:2])
+        with CaptureQueriesContext(connection) as many:
+            self._create_conference(self.reviewers)
+
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_create_conference_duplicate_reviewers(self):
+        """Test per verificare che le email duplicate generino un solo invito"""
+        response = self._create_conference([self.reviewers[0], self.reviewers[0], self.reviewers[1]])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["duplicate_reviewers"], [self.reviewers[0].email])
+        self.assertEqual(Notification.objects.filter(conference_id=response.json()["conference_id"]).count(), 2)
+
+    def test_create_conference_self_invite_creates_nothing(self):
+        """Test per verificare che invitare se stessi non lasci una conferenza creata a metà"""
+        response = self._create_conference([self.reviewers[0], self.admin_user])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Cannot invite yourself as a reviewer")
+        self.assertFalse(Conference.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_edit_conference_already_invited(self):
+        """Test per verificare che un revisore già invitato venga segnalato senza creare nuovi inviti"""
+        conference_id = self._create_conference(self.reviewers[:1]).json()["conference_id"]
+
+        response = self.client.patch(
+            reverse('edit_conference'),
+            data=json.dumps({
+                "conference_id": conference_id,
+                "reviewers": [{"email": self.reviewers[1].email}, {"email": self.reviewers[0].email}]
+            }),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], f"Reviewer {self.reviewers[0].email} is already invited")
+        self.assertEqual(Notification.objects.filter(conference_id=conference_id).count(), 1)
+
+    def test_edit_conference_invites_new_reviewers(self):
+        """Test per l'invito in blocco di nuovi revisori durante la modifica della conferenza"""
+        conference_id = self._create_conference([]).json()["conference_id"]
+
+        response = self.client.patch(
+            reverse('edit_conference'),
+            data=json.dumps({
+                "conference_id": conference_id,
+                "reviewers": [{"email": reviewer.email} for reviewer in self.reviewers]
+            }),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Notification.objects.filter(conference_id=conference_id, type=1).count(), 60)
+        self.assertEqual(OutgoingEmail.objects.count(), 60)
+        self.assertTrue(all('"Test Conference"' in subject for subject in OutgoingEmail.objects.values_list('subject', flat=True)))
+
+
+class UploadReviewersCsvTests(TestCase):
+    def setUp(self):
+        self.url = reverse('upload_reviewers_csv')
+        for i in range(3):
+            User.objects.create(
+                first_name=f"Reviewer{i}",
+                last_name="User",
+                email=f"reviewer{i}@example.com",
+                password="reviewerpass"
+            )
+
+    def _upload(self, content, name='reviewers.csv'):
+        return self.client.post(self.url, {'csv_file': SimpleUploadedFile(name, content, content_type='text/csv')})
+
+    def test_upload_classifies_emails(self):
+        """Test per la classificazione delle email in esistenti, sconosciute, duplicate e non valide"""
+        content = (
+            "email\n"
+            "reviewer0@example.com\n"
+            "reviewer1@example.com\n"
+            "nobody@example.com\n"
+            "reviewer0@example.com\n"
+            "not-an-email\n"
+        ).encode('utf-8')
+
+        response = self._upload(content)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['emails'], ['reviewer0@example.com', 'reviewer1@example.com'])
+        self.assertEqual(data['unknown'], ['nobody@example.com'])
+        self.assertEqual(data['duplicates'], ['reviewer0@example.com'])
+        self.assertEqual(data['invalid'], ['email', 'not-an-email'])
+        self.assertEqual(data['counts'], {'emails': 2, 'unknown': 1, 'duplicates': 1, 'invalid': 2})
+
+    def test_upload_reports_counts_beyond_cap(self):
+        """Test per le liste limitate: oltre il limite le email vengono solo contate"""
+        content = "\n".join(
+            ["not-an-email"] * 3 + ["reviewer0@example.com"] * 3 + ["reviewer1@example.com", "reviewer2@example.com"]
+        ).encode('utf-8')
+
+        result = import_reviewers_csv(SimpleUploadedFile('reviewers.csv', content), max_reported=1)
+
+        self.assertEqual(result['invalid'], ['not-an-email'])
+        self.assertEqual(result['duplicates'], ['reviewer0@example.com'])
+        # Le email da invitare non vengono mai troncate
+        self.assertEqual(result['matched'], ['reviewer0@example.com', 'reviewer1@example.com', 'reviewer2@example.com'])
+        self.assertEqual(result['counts'], {'matched': 3, 'unknown': 0, 'duplicates': 2, 'invalid': 3})
+
+    def test_upload_keeps_fields_with_unicode_line_separators(self):
+        """Test per i caratteri che str.splitlines considera fine riga (\\x0b, \\x1c, \\u2028) dentro un campo"""
+        content = (
+            'reviewer0@example.com,"note\x0bwith\x1cseparators"\r\n'
+            'reviewer1@example.com,line\u2028break\r'
+            'reviewer2@example.com\n'
+        ).encode('utf-8')
+        uploaded = SimpleUploadedFile('reviewers.csv', content)
+
+        # Blocchi da 1 byte: anche \r\n e i caratteri multibyte vengono spezzati tra due blocchi
+        result = import_reviewers_csv(uploaded, chunk_size=1)
+
+        self.assertEqual(result['matched'], ['reviewer0@example.com', 'reviewer1@example.com', 'reviewer2@example.com'])
+        self.assertEqual(result['invalid'], [])
+
+    def test_upload_cp1252_file(self):
+        """Test per un file non UTF-8 (cp1252)"""
+        content = "reviewer2@example.com;Müller\nreviewer1@example.com;Café\n".encode('cp1252')
+
+        response = self._upload(content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['emails'], ['reviewer2@example.com', 'reviewer1@example.com'])
+
+    def test_upload_without_valid_emails(self):
+        """Test per un file senza indirizzi email validi"""
+        response = self._upload(b"name\nfoo\nbar\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'No valid email addresses found in CSV')
+
+    def test_upload_not_csv(self):
+        """Test per un file che non è un CSV"""
+        response = self._upload(b"reviewer0@example.com\n", name='reviewers.txt')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'File must be a CSV')
+
+    def test_import_streams_large_file_in_chunks(self):
+        """Test per l'import di un file grande letto a piccoli blocchi, con righe spezzate tra un blocco e l'altro"""
+        rows = [f"user{i}@example.com" for i in range(2000)] + ["reviewer0@example.com"]
+        uploaded = SimpleUploadedFile('reviewers.csv', "\r\n".join(rows).encode('utf-8'))
+
+        with CaptureQueriesContext(connection) as queries:
+            result = import_reviewers_csv(uploaded, chunk_size=37)
+
+        self.assertEqual(result['matched'], ['reviewer0@example.com'])
+        # Solo le prime CSV_MAX_REPORTED_EMAILS vengono restituite, ma tutte vengono contate
+        self.assertEqual(len(result['unknown']), 1000)
+        self.assertEqual(result['unknown'][-1], 'user999@example.com')
+        self.assertEqual(result['counts'], {'matched': 1, 'unknown': 2000, 'duplicates': 0, 'invalid': 0})
+        self.assertEqual(result['invalid'], [])
+        # Le email vengono risolte a blocchi di EMAIL_LOOKUP_CHUNK_SIZE
+        self.assertEqual(len(queries.captured_queries), 5)
+
+
+class ConferenceTeardownTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.media_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.media_override.enable()
+
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        self.reviewer = User.objects.create(first_name="Reviewer", last_name="User", email="reviewer@example.com", password="x")
+        self.conference = self._conference_with_data("Doomed Conference", papers=3)
+        self.other = self._conference_with_data("Surviving Conference", papers=2)
+
+        self.client.force_login(self.admin)
+        session = self.client.session
+        session['_auth_user_id'] = self.admin.id
+        session.save()
+
+    def tearDown(self):
+        self.media_override.disable()
+        self.media.cleanup()
+
+    def _conference_with_data(self, title, papers):
+        conference = Conference.objects.create(
+            title=title,
+            admin_id=self.admin,
+            deadline=timezone.now() + timezone.timedelta(days=7),
+            description="Description"
+        )
+        ConferenceRole.objects.create(user=self.admin, conference=conference, role='admin')
+        ConferenceRole.objects.create(user=self.reviewer, conference=conference, role='reviewer')
+        Notification.objects.create(user_sender=self.admin, user_receiver=self.reviewer, conference=conference, type=1)
+        template_item = ReviewTemplateItem.objects.create(
+            conference=conference, label="Originality", description="", has_comment=True, has_score=True
+        )
+        for i in range(papers):
+            paper = Paper.objects.create(
+                title=f"{title} paper {i}",
+                conference=conference,
+                author_id=self.admin,
+                status_id='submitted',
+                paper_file=SimpleUploadedFile(f"paper{i}.pdf", b"%PDF-1.4 test", content_type="application/pdf")
+            )
+            Preference.objects.create(paper=paper, reviewer=self.reviewer, preference='interested')
+            PaperReviewAssignment.objects.create(paper=paper, reviewer=self.reviewer, conference=conference)
+            review = Review.objects.create(paper=paper, user=self.reviewer, comment_text="Good", score=3, confidence_level=2)
+            ReviewItem.objects.create(review=review, templateItem=template_item, comment="Ok", score=3)
+            Comment.objects.create(user=self.admin, review=review, comment_text="Thanks")
+        return conference
+
+    def _paper_files(self, conference):
+        return [paper.paper_file.path for paper in Paper.objects.filter(conference=conference)]
+
+    def _assert_deleted(self, conference_id, files):
+        self.assertFalse(Conference.objects.filter(id=conference_id).exists())
+        self.assertFalse(Paper.objects.filter(conference_id=conference_id).exists())
+        self.assertFalse(Review.objects.filter(paper__conference_id=conference_id).exists())
+        self.assertFalse(ReviewItem.objects.filter(templateItem__conference_id=conference_id).exists())
+        self.assertFalse(Comment.objects.filter(review__paper__conference_id=conference_id).exists())
+        self.assertFalse(ConferenceRole.objects.filter(conference_id=conference_id).exists())
+        self.assertFalse(Notification.objects.filter(conference_id=conference_id).exists())
+        self.assertFalse(ReviewTemplateItem.objects.filter(conference_id=conference_id).exists())
+        # Aspetta che il thread in background abbia rimosso i PDF
+        paper_helpers._file_cleanup_executor.submit(lambda: None).result()
+        for path in files:
+            self.assertFalse(os.path.exists(path))
+
+    def _assert_other_conference_intact(self):
+        self.assertEqual(Paper.objects.filter(conference=self.other).count(), 2)
+        self.assertEqual(Review.objects.filter(paper__conference=self.other).count(), 2)
+        self.assertEqual(Comment.objects.filter(review__paper__conference=self.other).count(), 2)
+        self.assertEqual(Preference.objects.filter(paper__conference=self.other).count(), 2)
+        self.assertEqual(Notification.objects.filter(conference=self.other).count(), 1)
+        for path in self._paper_files(self.other):
+            self.assertTrue(os.path.exists(path))
+
+    def test_teardown_deletes_everything_in_one_transaction(self):
+        """Test per la cancellazione set-based di una conferenza e di tutti i dati collegati"""
+        files = self._paper_files(self.conference)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(teardown_conference(self.conference.id))
+
+        self._assert_deleted(self.conference.id, files)
+        self._assert_other_conference_intact()
+
+    def test_teardown_query_count_does_not_depend_on_size(self):
+        """Test per verificare che il numero di query non cresca con il numero di paper"""
+        big = self._conference_with_data("Big Conference", papers=10)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            teardown_conference(self.conference.id)
+        with CaptureQueriesContext(connection) as big_queries:
+            teardown_conference(big.id)
+
+        self.assertEqual(len(small_queries.captured_queries), len(big_queries.captured_queries))
+
+    def test_batched_teardown(self):
+        """Test per la cancellazione a blocchi, una transazione per blocco di paper"""
+        files = self._paper_files(self.conference)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            teardown_conference(self.conference.id, batch_size=2)
+
+        self._assert_deleted(self.conference.id, files)
+        self._assert_other_conference_intact()
+        # 2 blocchi di paper + la transazione finale (PDF e contatori)
+        self.assertEqual(len(callbacks), 4)
+
+    def test_delete_view_uses_teardown(self):
+        """Test per delete_conference, che cancella subito le conferenze piccole"""
+        files = self._paper_files(self.conference)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('delete_conference'), data={'conference_id': self.conference.id}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self._assert_deleted(self.conference.id, files)
+
+    @override_settings(CONFERENCE_TEARDOWN_ASYNC_THRESHOLD=2)
+    def test_large_conference_is_deleted_in_background(self):
+        """Test per le conferenze grandi, cancellate dal worker delete_conferences"""
+        files = self._paper_files(self.conference)
+
+        response = self.client.delete(reverse('delete_conference'), data={'conference_id': self.conference.id}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'message': 'Conference deletion scheduled'})
+        self.conference.refresh_from_db()
+        self.assertIsNotNone(self.conference.deletion_requested_at)
+        titles = [c['title'] for c in self.client.get(reverse('get_conferences')).json()['conferences']]
+        self.assertNotIn("Doomed Conference", titles)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('delete_conferences', '--once', '--batch-size', '2', stdout=StringIO())
+
+        self._assert_deleted(self.conference.id, files)
+        self._assert_other_conference_intact()
+
+
+class ConferenceTeardownSignalTests(SimpleTestCase):
+    """teardown_conference non passa dal Collector: signal e cascade dei modelli cancellati vanno replicati a mano."""
+
+    def test_delete_receivers_are_replicated(self):
+        for model in TEARDOWN_MODELS:
+            for signal in (pre_delete, post_delete):
+                # _live_receivers è privato, ma qui basta che il test fallisca se cambia
+                sync_receivers, async_receivers = signal._live_receivers(model)
+                for receiver in list(sync_receivers) + list(async_receivers):
+                    name = f'{receiver.__module__}.{receiver.__qualname__}'
+                    self.assertIn(name, REPLICATED_DELETE_RECEIVERS,
+                                  f'{name} ({model.__name__}) is not replicated by teardown_conference')
+
+    def test_related_models_are_deleted(self):
+        for model in TEARDOWN_MODELS:
+            for relation in model._meta.related_objects:
+                if relation.on_delete.__name__ in ('CASCADE', 'PROTECT', 'RESTRICT'):
+                    self.assertIn(relation.related_model, TEARDOWN_MODELS,
+                                  f'{relation.related_model.__name__} references {model.__name__} and is not deleted by teardown_conference')
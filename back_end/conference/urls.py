@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('create/', views.create_conference, name='create_conference'),
+    path('async/create/', views.create_conference_async, name='create_conference_async'),
     path('delete/', views.delete_conference, name='delete_conference'),
     path('edit/', views.edit_conference, name='edit_conference'),
     path('upload_reviewers_csv/', views.upload_reviewers_csv, name='upload_reviewers_csv'),
@@ -1,33 +1,32 @@
 import json
-from django.http import JsonResponse
+from api.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.utils import timezone
+from asgiref.sync import sync_to_async
 from django.db import transaction
-import csv
-import io
-from django.core.paginator import Paginator
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
-from rest_framework import status
+from api.schema import openapi
+from api.schema import swagger_auto_schema
 from rest_framework.decorators import api_view
-from users.decorators import get_user
+from django.views.decorators.http import require_POST
+from users.decorators import async_get_user, get_user
 from reviews.models import ReviewTemplateItem
 
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
-from pulp import *
-
-from notifications.models import Notification
 from users.models import User  # Importa il modello User dall'app users
 from papers.models import Paper
-from reviews.models import Review
-from .helpers import send_invitation_email
+from .assignment import solve_assignment
+from .helpers import (
+    create_conference_with_reviewers, create_reviewer_invitations, find_invited_reviewers, import_reviewers_csv,
+    resolve_reviewers, validate_conference_data,
+)
+from .teardown import schedule_conference_teardown, should_teardown_async, teardown_conference
 from .models import Conference  # Importa il modello Conference creato in precedenza
 from conference_roles.models import ConferenceRole
 from assign_paper_reviewers.models import PaperReviewAssignment
 from preferences.models import Preference
-import  assign_paper_reviewers, conference_roles, notifications, papers
-from django.core.mail import send_mail
+from database.decorators import read_replica
+from api.decorators import conditional
+from api.throttling import rate_limit
 
 
 
@@ -63,103 +62,29 @@ def create_conference(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            title = data.get('title')
-            deadline = data.get('deadline')
-            description = data.get('description')
-            reviewers = data.get('reviewers')
-            papers_deadline = data.get('papers_deadline')
-            status = data.get('status')
-            reviewTemplate = data.get('reviewTemplate')
-
-            if not (title and deadline and description and papers_deadline):
-                return JsonResponse({'error': 'Missing required fields'}, status=400)
-
-            if reviewers is None:
-                return JsonResponse({'error': 'Reviewers must be provided'}, status=400)
-
-            ## la submission deadline deve essere prima della deadline della conferenza
-            if deadline < papers_deadline:
-                return JsonResponse({'error': 'Submission deadline must be before conference deadline'}, status=400)
 
-            if status not in ['none', 'single_blind', 'double_blind']:
-                return JsonResponse({'error': 'Invalid status'}, status=400)
+            error = validate_conference_data(data)
+            if error:
+                return JsonResponse({'error': error}, status=400)
 
             admin_user = request.user
 
-            reviewersAreAllValid = True
-
-            for reviewer in reviewers or []:
-                reviewer_email = reviewer.get('email')
-                if not reviewer_email:
-                    continue
+            # Resolve all the reviewers with a single (chunked) query before creating anything
+            reviewer_users, unknown_reviewers, duplicate_reviewers = resolve_reviewers(data['reviewers'])
 
-                try:
-                    reviewer_user = User.objects.get(email=reviewer_email)
-                except User.DoesNotExist:
-                    reviewersAreAllValid = False
-                    break
-
-            if not reviewersAreAllValid:
+            if unknown_reviewers:
                 return JsonResponse({'error': 'One or more reviewers are invalid or do not exist'}, status=400)
 
-            # Create the new conference
-            conference = Conference.objects.create(
-                title=title,
-                admin_id=admin_user,
-                created_at=timezone.now(),
-                deadline=deadline,
-                description=description,
-                papers_deadline=papers_deadline,
-                status=status
-            )
-
-            # Create the admin role for the user
-            ConferenceRole.objects.create(
-                user=admin_user,
-                conference=conference,
-                role='admin'
-            )
-
-            # Send invitations to reviewers
-            for reviewer in reviewers or []:
-                reviewer_email = reviewer.get('email')
-                if not reviewer_email:
-                    continue
-
-                try:
-                    reviewer_user = User.objects.get(email=reviewer_email)
-                except User.DoesNotExist:
-                    return JsonResponse({'error': f'Reviewer user not found: {reviewer_email}'}, status=404)
-
-                if reviewer_user == admin_user:
-                    return JsonResponse({'error': 'Cannot invite yourself as a reviewer'}, status=400)
-
-                # Create only the notification, the role will be created after acceptance
-                Notification.objects.create(
-                    user_sender=admin_user,
-                    user_receiver=reviewer_user,
-                    conference=conference,
-                    status=0,  # pending
-                    type=1  # reviewer type
-                )
-
-                # Send the invitation email to the reviewer
-                send_invitation_email(reviewer_email, title, admin_user)
-                
-            for reviewTemplateItem in reviewTemplate or []:
-                ReviewTemplateItem.objects.create(
-                    conference = conference,
-                    label = reviewTemplateItem.get('label'),
-                    description = reviewTemplateItem.get('description'),
-                    has_comment = reviewTemplateItem.get('has_comment'),
-                    has_score = reviewTemplateItem.get('has_score')
-                )
-            
+            if any(reviewer_user.id == admin_user.id for reviewer_user in reviewer_users):
+                return JsonResponse({'error': 'Cannot invite yourself as a reviewer'}, status=400)
 
+            conference = create_conference_with_reviewers(admin_user, data, reviewer_users)
 
             return JsonResponse({
                 'message': 'Conference created successfully',
-                'conference_id': conference.id
+                'conference_id': conference.id,
+                'invited_reviewers': len(reviewer_users),
+                'duplicate_reviewers': duplicate_reviewers
             }, status=201)
 
         except json.JSONDecodeError:
@@ -168,6 +93,43 @@ def create_conference(request):
         return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
 
 
+@csrf_exempt
+@require_POST
+@async_get_user
+async def create_conference_async(request):
+    """
+    Variante async di create_conference per il deployment ASGI. L'ORM async non supporta le
+    transazioni: la creazione (conferenza, ruoli, inviti e template) gira in un thread con sync_to_async,
+    le email vengono messe in coda e inviate da process_email_queue come nella versione sincrona.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    error = validate_conference_data(data)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    admin_user = request.user
+    reviewer_users, unknown_reviewers, duplicate_reviewers = await sync_to_async(resolve_reviewers)(data['reviewers'])
+
+    if unknown_reviewers:
+        return JsonResponse({'error': 'One or more reviewers are invalid or do not exist'}, status=400)
+
+    if any(reviewer_user.id == admin_user.id for reviewer_user in reviewer_users):
+        return JsonResponse({'error': 'Cannot invite yourself as a reviewer'}, status=400)
+
+    conference = await sync_to_async(create_conference_with_reviewers)(admin_user, data, reviewer_users)
+
+    return JsonResponse({
+        'message': 'Conference created successfully',
+        'conference_id': conference.id,
+        'invited_reviewers': len(reviewer_users),
+        'duplicate_reviewers': duplicate_reviewers
+    }, status=201)
+
+
 
 ## delete conference view
 @swagger_auto_schema(
@@ -180,6 +142,7 @@ def create_conference(request):
     ),
     responses={
         200: 'Conference deleted successfully',
+        202: 'Conference deletion scheduled (large conferences are deleted in the background)',
         400: 'Bad request',
         403: 'Permission denied',
         404: 'Conference not found',
@@ -213,15 +176,13 @@ def delete_conference(request):
                 if not is_admin:
                     return JsonResponse({'error': 'Permission denied. User is not an admin of this conference.'}, status=403)
 
-                # Elimina tutte le cascades in cui la conferenza è coinvolta
-                assign_paper_reviewers.models.PaperReviewAssignment.objects.filter(conference=conference).delete()
-                conference_roles.models.ConferenceRole.objects.filter(conference=conference).delete()
-                notifications.models.Notification.objects.filter(conference=conference).delete()
-                papers.models.Paper.objects.filter(conference=conference).delete()
+                # Le conferenze molto grandi vengono cancellate a blocchi dal worker delete_conferences
+                if should_teardown_async(conference):
+                    schedule_conference_teardown(conference)
+                    return JsonResponse({'message': 'Conference deletion scheduled'}, status=202)
 
-
-                # Elimina la conferenza se l'utente è admin
-                conference.delete()
+                # Elimina la conferenza e tutte le cascades in un'unica transazione (i PDF vengono rimossi in background)
+                teardown_conference(conference.id)
                 return JsonResponse({'message': 'Conference deleted successfully'}, status=200)
             except Conference.DoesNotExist:
                 return JsonResponse({'error': 'Conference not found'}, status=404)
@@ -303,53 +264,22 @@ def edit_conference(request):
                 conference.papers_deadline = papers_deadline
             if description:
                 conference.description = description
+
+            reviewer_users = []
             if reviewers:
-                # Invia gli inviti ai revisori
-                for reviewer in reviewers or []:
-                    reviewer_email = reviewer.get('email')
-                    if not reviewer_email:
-                        continue
-
-                    try:
-                        reviewer_user = User.objects.get(email=reviewer_email)
-                    except User.DoesNotExist:
-                        return JsonResponse({'error': f'Reviewer user not found: {reviewer_email}'}, status=404)
-
-                    if reviewer_user == user:
-                        return JsonResponse({'error': 'Cannot invite yourself as a reviewer'}, status=400)
-
-                    # check if reviewer is already invited
-                    if Notification.objects.filter(
-                        user_sender=user,
-                        user_receiver=reviewer_user,
-                        conference=conference,
-                        type=1  # reviewer type
-                    ).exists():
-                        return JsonResponse({'error': f'Reviewer {reviewer_email} is already invited'}, status=400)
-
-                    # Crea solo la notifica, il ruolo verrà creato dopo l'accettazione
-                    Notification.objects.create(
-                        user_sender=user,
-                        user_receiver=reviewer_user,
-                        conference=conference,
-                        status=0,  # pending
-                        type=1  # reviewer type
-                    )
-                    
-                send_invitation_email(reviewer_email, title, user)
-
-            if reviewTemplate:
-                ReviewTemplateItem.objects.filter(conference = conference).delete()
-                for reviewTemplateItem in reviewTemplate or []:
-                    ReviewTemplateItem.objects.create(
-                        conference = conference,
-                        label = reviewTemplateItem.get('label'),
-                        description = reviewTemplateItem.get('description'),
-                        has_comment = reviewTemplateItem.get('has_comment'),
-                        has_score = reviewTemplateItem.get('has_score')
-                    )
-            
-            # Send the invitation email to the reviewer
+                # Risolve tutti i revisori con un'unica query (a blocchi) prima di creare gli inviti
+                reviewer_users, unknown_reviewers, duplicate_reviewers = resolve_reviewers(reviewers)
+
+                if unknown_reviewers:
+                    return JsonResponse({'error': f'Reviewer user not found: {unknown_reviewers[0]}'}, status=404)
+
+                if any(reviewer_user.id == user.id for reviewer_user in reviewer_users):
+                    return JsonResponse({'error': 'Cannot invite yourself as a reviewer'}, status=400)
+
+                # check if reviewers are already invited
+                already_invited = find_invited_reviewers(user, conference, reviewer_users)
+                if already_invited:
+                    return JsonResponse({'error': f'Reviewer {already_invited[0].email} is already invited'}, status=400)
 
             if status:
                 conference.status = status
@@ -358,7 +288,24 @@ def edit_conference(request):
             if conference.deadline < conference.papers_deadline:
                 return JsonResponse({'error': 'Submission deadline must be before conference deadline'}, status=400)
 
-            conference.save()
+            with transaction.atomic():
+                conference.save()
+
+                # Crea le notifiche in blocco e mette in coda le email di invito ai revisori
+                if reviewer_users:
+                    create_reviewer_invitations(user, conference, reviewer_users)
+
+                if reviewTemplate:
+                    ReviewTemplateItem.objects.filter(conference = conference).delete()
+                    for reviewTemplateItem in reviewTemplate or []:
+                        ReviewTemplateItem.objects.create(
+                            conference = conference,
+                            label = reviewTemplateItem.get('label'),
+                            description = reviewTemplateItem.get('description'),
+                            has_comment = reviewTemplateItem.get('has_comment'),
+                            has_score = reviewTemplateItem.get('has_score')
+                        )
+
             return JsonResponse({'message': 'Conference updated successfully'}, status=200)
 
         except json.JSONDecodeError:
@@ -378,10 +325,15 @@ def edit_conference(request):
         }
     ),
     responses={
-        200: openapi.Response('Email addresses extracted successfully', openapi.Schema(
+        200: openapi.Response('Email addresses extracted and validated successfully', openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
-                'emails': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, description='Email address'))
+                'emails': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, description='Email of an existing user')),
+                'unknown': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, description='Valid email without a registered user')),
+                'duplicates': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, description='Email repeated in the file')),
+                'invalid': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, description='Value that is not a valid email')),
+                'counts': openapi.Schema(type=openapi.TYPE_OBJECT, description='Total per list (emails, unknown, duplicates, invalid): each list holds at most the first 1000',
+                                         additional_properties=openapi.Schema(type=openapi.TYPE_INTEGER))
             }
         )),
         400: 'Bad request',
@@ -390,6 +342,7 @@ def edit_conference(request):
 )
 @api_view(['POST'])
 @csrf_exempt
+@rate_limit('upload_reviewers_csv', rate='10/m', concurrency=1)
 def upload_reviewers_csv(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST method is allowed'}, status=405)
@@ -404,43 +357,26 @@ def upload_reviewers_csv(request):
         return JsonResponse({'error': 'File must be a CSV'}, status=400)
 
     try:
-        # Try different encodings
-        encodings = ['utf-8', 'utf-8-sig', 'iso-8859-1', 'cp1252']
-        content = None
+        # The file is decoded and validated in streaming, the users are resolved in chunks
+        result = import_reviewers_csv(csv_file)
 
-        for encoding in encodings:
-            try:
-                # Reset file pointer
-                csv_file.seek(0)
-                content = csv_file.read().decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-
-        if content is None:
+        if result is None:
             return JsonResponse({'error': 'Unable to decode CSV file'}, status=400)
 
-        # Try different dialect detection
-        sample = content[:1024]
-        try:
-            dialect = csv.Sniffer().sniff(sample)
-        except csv.Error:
-            dialect = csv.excel
-
-        csv_reader = csv.reader(io.StringIO(content), dialect)
-
-        # Extract emails from CSV
-        emails = []
-        for row in csv_reader:
-            if row:  # Check if row is not empty
-                email = row[0].strip()  # Assuming email is in the first column
-                if '@' in email:  # Basic email validation
-                    emails.append(email)
-
-        if not emails:
+        if not (result['counts']['matched'] or result['counts']['unknown']):
             return JsonResponse({'error': 'No valid email addresses found in CSV'}, status=400)
 
-        return JsonResponse({'emails': emails})
+        # `emails` contains only the reviewers that can actually be invited with create/edit conference
+        return JsonResponse({
+            'emails': result['matched'],
+            'unknown': result['unknown'],
+            'duplicates': result['duplicates'],
+            'invalid': result['invalid'],
+            # Totali: unknown, duplicates e invalid contengono al massimo le prime CSV_MAX_REPORTED_EMAILS email
+            'counts': {'emails': result['counts']['matched'], **{
+                kind: result['counts'][kind] for kind in ('unknown', 'duplicates', 'invalid')
+            }}
+        })
 
     except Exception as e:
         return JsonResponse({'error': f'Error processing CSV: {str(e)}'}, status=400)
@@ -458,13 +394,16 @@ def upload_reviewers_csv(request):
     }
 )
 @api_view(['GET'])
+@read_replica
 @csrf_exempt
+@conditional(lambda request: ['conferences', 'users'], cache=True)
 def get_conferences(request):
     if request.method == 'GET':
         page_number = request.GET.get('page', 1)
         page_size = request.GET.get('page_size', 20)
 
-        conferences = Conference.objects.all().order_by('created_at')
+        # Le conferenze in fase di cancellazione non vengono più mostrate
+        conferences = Conference.objects.filter(deletion_requested_at__isnull=True).order_by('created_at')
         conferences_list = []
         for conference in conferences:
             templateItems = ReviewTemplateItem.objects.filter(conference = conference)
@@ -856,6 +795,9 @@ def get_paper_inconference_admin(request):
     }
 )
 @api_view(['POST'])
+# Il solver può impiegare secondi: un doppio click dello stesso admin riceve 429 invece di occupare un altro worker.
+# La chiave è l'utente della sessione e non la conferenza del corpo, che chiunque potrebbe inviare
+@rate_limit('automatic_assign_reviewers', rate='3/m', concurrency=1, global_concurrency=2)
 def automatic_assign_reviewers(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
@@ -880,7 +822,7 @@ def automatic_assign_reviewers(request):
             return JsonResponse({'error': 'Permission denied. User is not an admin.'}, status=403)
     
         papers = Paper.objects.filter(conference=conference)
-        reviewer_roles = ConferenceRole.objects.filter(conference=conference, role='reviewer').select_related('user')
+        reviewer_roles = ConferenceRole.objects.filter(conference=conference, role='reviewer')
     
         if not reviewer_roles.exists():
             return JsonResponse({'error': 'No reviewers found for this conference.'}, status=404)
@@ -894,58 +836,16 @@ def automatic_assign_reviewers(request):
         if max_papers_per_reviewer < 1 or required_reviewers_per_paper < 1:
             return JsonResponse({'error': 'Max papers per reviewer and required reviewers per paper must be greater than 0.'}, status=400)
         
-        # creazione del problema di ottimizzazione
-        # voglio massimizzare la soddisfazione totale dei revisori, assegnando loro i paper che preferiscono
-        # ma rispettando i vincoli di assegnamento
-        prob = LpProblem("Paper_Assignment", LpMaximize)
-        # LPMaximize: massimizza la funzione obiettivo
-
-        # Creazione delle variabili di decisione
-        # creazione variabili binarie per assegnare o meno un paper a un revisore
-        assignments = LpVariable.dicts("assign",
-                                     ((p.id, r.user.id) for p in papers for r in reviewer_roles),
-                                     cat='Binary')
-        # cat='Binary' indica che le variabili sono binarie
-        # assignments[(p.id, r.user.id)] = 1 se il paper p è assegnato al revisore r, 0 altrimenti
-
-        #Creo un dizionario con le preferenze dei revisori per i paper
-        #Le chiavi sono tuple (paper_id, reviewer_id), i valori sono le preferenze ('interested', 'not_interested')
+        # Assegnamento che massimizza la soddisfazione totale dei revisori rispettando i vincoli (vedi assignment.py)
+        paper_ids = list(papers.values_list('id', flat=True))
+        reviewer_ids = list(reviewer_roles.values_list('user_id', flat=True))
         preferences = {(pref.paper_id, pref.reviewer_id): pref.preference
                       for pref in Preference.objects.filter(paper__conference=conference)}
-
-        # Funzione obiettivo: massimizzare la soddisfazione totale dei revisori
-        # Funzione obiettivo modificata: include sia bonus che penalità
-        # Per ogni assegnamento:
-        # - +2 punti se il revisore è interessato
-        # - +1 punto se il revisore è neutrale
-        # - -penalty_weight punti se il revisore non è interessato
-        prob += lpSum(
-            (2 * assignments[(p.id, r.user.id)] if preferences.get((p.id, r.user.id)) == 'interested'
-             else (-penalty_weight * assignments[(p.id, r.user.id)] if preferences.get((p.id, r.user.id)) == 'not_interested'
-             else assignments[(p.id, r.user.id)]))
-            for p in papers for r in reviewer_roles
-        )
-
-        # Constraint 1: ogni paper deve avere almeno required_reviewers_per_paper revisori
-        for paper in papers:
-            prob += lpSum(assignments[(paper.id, r.user.id)] for r in reviewer_roles) >= required_reviewers_per_paper
-
-        # Constraint 2: Ogni reviewer può avere al massimo max_papers_per_reviewer da recensire
-        for reviewer in reviewer_roles:
-            prob += lpSum(assignments[(p.id, reviewer.user.id)] for p in papers) <= max_papers_per_reviewer
-
-        # NON LO VEDO PIù COME UN VINCOLO FORTE, potrebbe essere possibile assegnare un paper a un revisore non interessato
-        # tuttavia non sarà mai la scelta ottimale
-        # Constraint 3: Non devo assegnare un paper a un revisore che non è interessato
-        #for (paper_id, reviewer_id), pref in preferences.items():
-        #    if pref == 'not_interested':
-        #        prob += assignments[(paper_id, reviewer_id)] == 0
-
-        # Per risolvere il problema di ottimizzazione
-        prob.solve()
+        solution = solve_assignment(paper_ids, reviewer_ids, preferences, max_papers_per_reviewer,
+                                    required_reviewers_per_paper, penalty_weight)
 
         # Se non è stata trovata una soluzione ottimale restituisco un errore
-        if LpStatus[prob.status] != 'Optimal':
+        if solution is None:
             return JsonResponse({'error': 'Could not find optimal assignment.'}, status=400)
 
         # Creo le assegnazioni nel database
@@ -954,18 +854,15 @@ def automatic_assign_reviewers(request):
             PaperReviewAssignment.objects.filter(conference=conference).delete()
 
             # Creo nuove assegnazioni basate sulla soluzione ottimale trovata
-            new_assignments = []
-            for paper in papers:
-                for reviewer in reviewer_roles:
-                    if value(assignments[(paper.id, reviewer.user.id)]) == 1:
-                        new_assignments.append(
-                            PaperReviewAssignment(
-                                reviewer=reviewer.user,
-                                paper=paper,
-                                conference=conference,
-                                status="assigned"
-                            )
-                        )
+            new_assignments = [
+                PaperReviewAssignment(
+                    reviewer_id=reviewer_id,
+                    paper_id=paper_id,
+                    conference=conference,
+                    status="assigned"
+                )
+                for paper_id, reviewer_id in solution
+            ]
 
             PaperReviewAssignment.objects.bulk_create(new_assignments)
 
@@ -1005,6 +902,8 @@ def automatic_assign_reviewers(request):
     }
 )
 @api_view(['GET'])
+@read_replica
+@conditional(lambda request, conference_id: [f'conference:{conference_id}', 'users'], cache=True)
 def get_all_papers(request, conference_id):
     try:
         conference = Conference.objects.get(id=conference_id)
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_roles(apps, schema_editor):
+    """Rimuove i ruoli duplicati (stesso utente, conferenza e ruolo) prima di aggiungere il vincolo di unicità."""
+    ConferenceRole = apps.get_model('conference_roles', 'ConferenceRole')
+    keep_ids = ConferenceRole.objects.values('user', 'conference', 'role').annotate(keep_id=Min('id')).values('keep_id')
+    ConferenceRole.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0005_conference_status'),
+        ('conference_roles', '0001_initial'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_roles, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conferencerole',
+            index=models.Index(fields=['conference', 'role'], name='confrole_conference_role_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conferencerole',
+            constraint=models.UniqueConstraint(fields=('user', 'conference', 'role'), name='unique_conference_role'),
+        ),
+    ]
@@ -12,6 +12,16 @@ class ConferenceRole(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conference_roles")
     conference = models.ForeignKey(Conference, on_delete=models.CASCADE, related_name="conference_roles")
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
-    
+
+    class Meta:
+        constraints = [
+            # Un utente ha al massimo un ruolo di ogni tipo per conferenza
+            models.UniqueConstraint(fields=['user', 'conference', 'role'], name='unique_conference_role'),
+        ]
+        indexes = [
+            # Elenco dei reviewer/autori di una conferenza
+            models.Index(fields=['conference', 'role'], name='confrole_conference_role_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.conference.title} ({self.role})"
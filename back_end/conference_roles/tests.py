@@ -1,4 +1,5 @@
 import json
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from django.test import TestCase, Client, RequestFactory
 from django.utils import timezone
@@ -36,6 +37,25 @@ class ConferenceRoleCreationTests(TestCase):
         # Verifica che il ruolo sia stato creato nel database
         self.assertTrue(ConferenceRole.objects.filter(user=self.user, conference=self.conference, role="reviewer").exists())
 
+    def test_create_conference_role_duplicate(self):
+        """Test per l'assegnazione di un ruolo già presente (vincolo unique_conference_role)"""
+        payload = {
+            "id_user": self.user.id,
+            "id_conference": self.conference.id,
+            "role_user": "reviewer"
+        }
+        self.client.post(self.url, data=json.dumps(payload), content_type="application/json")
+        response = self.client.post(self.url, data=json.dumps(payload), content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "Role already assigned")
+        self.assertEqual(ConferenceRole.objects.filter(user=self.user, conference=self.conference, role="reviewer").count(), 1)
+
+    def test_unique_conference_role_constraint(self):
+        """Test per il vincolo di unicità su (user, conference, role) a livello di database"""
+        ConferenceRole.objects.create(user=self.user, conference=self.conference, role="author")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ConferenceRole.objects.create(user=self.user, conference=self.conference, role="author")
+
     def test_create_conference_role_missing_fields(self):
         """Test per mancanza di campi obbligatori"""
         payload = {
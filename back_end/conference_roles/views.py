@@ -1,5 +1,7 @@
 import json
-from django.http import JsonResponse
+import logging
+from django.db import IntegrityError, transaction
+from api.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view
 
@@ -7,10 +9,14 @@ from users.models import User
 from .models import Conference, ConferenceRole
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import openapi
+from api.schema import swagger_auto_schema
 from users.decorators import get_user
 from reviews.models import ReviewTemplateItem
+from database.decorators import read_replica
+from api.decorators import conditional
+
+logger = logging.getLogger(__name__)
 
 @csrf_exempt
 @swagger_auto_schema(
@@ -63,12 +69,17 @@ def create_conference_role(request):
             if role not in valid_roles:
                 return JsonResponse({'error': 'Invalid role'}, status=400)
 
-            # Crea la nuova tupla nella tabella ConferenceRole
-            conference_role = ConferenceRole.objects.create(
-                user=user,
-                conference=conference,
-                role=role
-            )
+            # Crea la nuova tupla nella tabella ConferenceRole: il vincolo unique_conference_role
+            # impedisce di assegnare due volte lo stesso ruolo, anche con richieste concorrenti
+            try:
+                with transaction.atomic():
+                    conference_role = ConferenceRole.objects.create(
+                        user=user,
+                        conference=conference,
+                        role=role
+                    )
+            except IntegrityError:
+                return JsonResponse({'error': 'Role already assigned'}, status=409)
 
             return JsonResponse({
                 'message': 'Role added successfully',
@@ -129,7 +140,9 @@ esempio risposta
     }
 )
 @api_view(['GET'])
+@read_replica
 @get_user
+@conditional(lambda request: ['conferences', 'users', f'user:{request.user.id}'], per_user=True, cache=True)
 def get_user_conferences(request):
     """Restituisce una lista di conferenze di cui l'utente fa parte con paginazione."""
     # Verifica che la richiesta sia GET
@@ -189,7 +202,7 @@ def get_user_conferences(request):
         "conferences": list(page_obj)
     }
 
-    print(paginator.count)
+    logger.debug("User conferences", extra={'user_id': user.id, 'total': paginator.count})
 
     return JsonResponse(response_data, status=200)
 
@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import caches
+
+from api.throttling import RATE_LIMIT_CACHE_ALIAS
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limits():
+    # La cache locale sopravvive tra i test e gli id degli utenti vengono riusati
+    caches[RATE_LIMIT_CACHE_ALIAS].clear()
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class DatabaseConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'database'
+
+    def ready(self):
+        # Registra il signal che applica i PRAGMA di SQLITE_PRAGMAS alle nuove connessioni
+        from . import signals  # noqa: F401
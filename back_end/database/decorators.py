@@ -0,0 +1,24 @@
+import functools
+
+from .routers import get_routing_state
+
+
+def read_replica(func):
+    """
+    Marca una view di sola lettura: le sue query possono andare su una replica (DATABASE_REPLICAS),
+    a meno che l'utente non abbia scritto da poco (vedi ReplicaStickinessMiddleware).
+    """
+    @functools.wraps(func)
+    def wrapper(request, *args, **kwargs):
+        state = get_routing_state()
+        if state is None:
+            return func(request, *args, **kwargs)
+        previous = state.read_only_view
+        state.read_only_view = True
+        try:
+            return func(request, *args, **kwargs)
+        finally:
+            state.read_only_view = previous
+
+    wrapper.read_replica = True
+    return wrapper
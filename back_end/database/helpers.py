@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.db.migrations.executor import MigrationExecutor
+
+
+def server_version(connection):
+    """Versione del server di database, come stringa leggibile."""
+    if connection.vendor == 'postgresql':
+        version = connection.pg_version  # es. 160004 -> 16.4
+        return f'PostgreSQL {version // 10000}.{version % 10000}'
+    if connection.vendor == 'sqlite':
+        return f'SQLite {sqlite3.sqlite_version}'
+    return connection.display_name
+
+
+def connection_settings(connection):
+    """Le impostazioni di riuso delle connessioni effettivamente in uso per `connection`."""
+    settings_dict = connection.settings_dict
+    pool = settings_dict.get('OPTIONS', {}).get('pool')
+    return {
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+        'pool': pool if pool else None,
+    }
+
+
+def pending_migrations(connection):
+    """Lista di 'app.migrazione' non ancora applicate al database di `connection`."""
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [f'{migration.app_label}.{migration.name}' for migration, backwards in plan if not backwards]
+
+
+def round_trip_ms(connection, samples=10):
+    """Tempo medio (in millisecondi) di un `SELECT 1` sulla connessione."""
+    with connection.cursor() as cursor:
+        start = time.perf_counter()
+        for _ in range(samples):
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """Esegue i PRAGMA indicati (nome -> valore) sul cursore di una connessione SQLite."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Esegue un checkpoint del WAL di SQLite (modalità DB_SQLITE_TUNING), riportando le pagine nel file del database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias del database SQLite')
+        parser.add_argument(
+            '--mode', default='TRUNCATE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+            help="PASSIVE non aspetta i lettori; TRUNCATE (default) aspetta e svuota il file -wal"
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database '{options['database']}' is {connection.vendor}, not SQLite")
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode.lower() != 'wal':
+                raise CommandError(f"Journal mode is '{journal_mode}', not WAL: set DB_SQLITE_TUNING=true")
+
+            cursor.execute(f"PRAGMA wal_checkpoint({options['mode']})")
+            busy, wal_pages, checkpointed = cursor.fetchone()
+
+        if busy:
+            raise CommandError(f"Checkpoint blocked by active readers or writers ({checkpointed}/{wal_pages} pages checkpointed)")
+        self.stdout.write(self.style.SUCCESS(f"Checkpoint {options['mode']}: {checkpointed}/{wal_pages} WAL pages written to the database"))
@@ -0,0 +1,46 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+
+from database.helpers import connection_settings, pending_migrations, round_trip_ms, server_version
+
+
+class Command(BaseCommand):
+    help = "Verifica la connessione al database configurato (DB_ENGINE), le impostazioni di pooling e le migrazioni da applicare."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Alias del database da verificare')
+        parser.add_argument('--migrate', action='store_true', help='Applica le migrazioni mancanti invece di fallire')
+        parser.add_argument('--samples', type=int, default=10, help='Numero di SELECT 1 per misurare la latenza')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        connection = connections[alias]
+
+        try:
+            connection.ensure_connection()
+        except OperationalError as e:
+            raise CommandError(f"Cannot connect to database '{alias}': {e}")
+
+        self.stdout.write(f"Database '{alias}': {server_version(connection)} ({connection.settings_dict['NAME']})")
+        reuse = connection_settings(connection)
+        if reuse['pool']:
+            self.stdout.write(f"Connection pool: {reuse['pool']}")
+        else:
+            self.stdout.write(f"Persistent connections: CONN_MAX_AGE={reuse['conn_max_age']}, "
+                              f"health checks {'on' if reuse['conn_health_checks'] else 'off'}")
+        self.stdout.write(f"Round trip: {round_trip_ms(connection, options['samples']):.2f} ms")
+
+        pending = pending_migrations(connection)
+        if pending and options['migrate']:
+            self.stdout.write(f"Applying {len(pending)} migration(s)")
+            call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'])
+            pending = pending_migrations(connection)
+
+        if pending:
+            raise CommandError(
+                f"{len(pending)} unapplied migration(s): {', '.join(pending)}. "
+                "Run `manage.py verify_database --migrate` or `manage.py migrate`."
+            )
+        self.stdout.write(self.style.SUCCESS("Database OK, all migrations applied"))
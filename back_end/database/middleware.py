@@ -0,0 +1,52 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import RoutingState, reset_routing_state, set_routing_state
+
+STICKY_COOKIE = 'db_pinned'
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes: dopo una richiesta che ha scritto sul primary il client riceve un cookie che,
+    per DATABASE_REPLICA_STICKINESS_SECONDS (più del ritardo di replica), fa leggere anche le view
+    @read_replica dal primary. Va messo prima di SessionMiddleware, così vede anche il salvataggio della sessione.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=STICKY_COOKIE in request.COOKIES)
+        token = set_routing_state(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_routing_state(token)
+        return self._pin_after_write(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=STICKY_COOKIE in request.COOKIES)
+        token = set_routing_state(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_routing_state(token)
+        return self._pin_after_write(state, response)
+
+    def _pin_after_write(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_STICKINESS_SECONDS', 10),
+                httponly=True,
+                secure=settings.SESSION_COOKIE_SECURE,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
@@ -0,0 +1,68 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class RoutingState:
+    """Stato del routing per la richiesta corrente, impostato da ReplicaStickinessMiddleware."""
+
+    def __init__(self, pinned=False):
+        # La richiesta arriva da un utente che ha scritto da poco: legge sempre dal primary
+        self.pinned = pinned
+        # La view corrente è marcata con @read_replica
+        self.read_only_view = False
+        # Durante la richiesta è stato scritto qualcosa (anche solo la sessione)
+        self.wrote = False
+        # Replica scelta alla prima lettura: tutte le letture della richiesta vedono lo stesso ritardo
+        self.replica = None
+
+
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+def get_routing_state():
+    return _routing_state.get()
+
+
+def set_routing_state(state):
+    return _routing_state.set(state)
+
+
+def reset_routing_state(token):
+    _routing_state.reset(token)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """
+    Manda le letture delle view marcate con @read_replica a una replica a caso tra DATABASE_REPLICAS,
+    la stessa per tutta la richiesta. Tutto il resto (scritture, view non marcate, utenti che hanno appena scritto) usa il primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = get_routing_state()
+        replicas = replica_aliases()
+        if state is None or not replicas or not state.read_only_view or state.pinned or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if state.replica not in replicas:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = get_routing_state()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary e repliche contengono gli stessi dati
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le repliche ricevono lo schema dal primary (replica streaming o copia del file SQLite)
+        return db not in replica_aliases()
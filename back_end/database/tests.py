@@ -0,0 +1,259 @@
+import os
+import runpy
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, router
+from django.http import HttpResponse
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users.models import User
+from .decorators import read_replica
+from .middleware import STICKY_COOKIE, ReplicaStickinessMiddleware
+from .routers import ReplicaRouter
+from .helpers import connection_settings, pending_migrations, server_version
+
+SETTINGS_FILE = Path(__file__).resolve().parent.parent / 'back_end' / 'settings.py'
+
+
+def load_settings(**env):
+    """
+    Esegue settings.py con le variabili d'ambiente indicate e ritorna i valori definiti.
+    Le altre variabili DB_* (es. quelle della CI) vengono ignorate.
+    """
+    with mock.patch.dict(os.environ):
+        for name in [name for name in os.environ if name.startswith('DB_')]:
+            del os.environ[name]
+        os.environ.update(env)
+        return runpy.run_path(str(SETTINGS_FILE))
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_sqlite_is_the_default(self):
+        """Test per il profilo di sviluppo (SQLite) usato senza variabili d'ambiente"""
+        settings = load_settings()
+
+        self.assertEqual(settings['DATABASES']['default']['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertNotIn('SQLITE_PRAGMAS', settings)
+
+    def test_sqlite_tuning_mode(self):
+        """Test per la modalità SQLite con WAL e gli altri PRAGMA"""
+        settings = load_settings(DB_ENGINE='sqlite', DB_SQLITE_TUNING='true')
+
+        self.assertEqual(settings['SQLITE_PRAGMAS']['journal_mode'], 'WAL')
+        self.assertEqual(settings['SQLITE_PRAGMAS']['synchronous'], 'NORMAL')
+
+    def test_postgresql_profile_with_pool(self):
+        """Test per il profilo PostgreSQL con il pool di connessioni integrato"""
+        settings = load_settings(DB_ENGINE='postgresql', DB_NAME='conf', DB_HOST='db', DB_POOL_MAX_SIZE='20')
+        database = settings['DATABASES']['default']
+
+        self.assertEqual(database['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(database['NAME'], 'conf')
+        self.assertEqual(database['HOST'], 'db')
+        self.assertEqual(database['OPTIONS']['pool']['max_size'], 20)
+        # Il pool non è compatibile con le connessioni persistenti
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+
+    def test_postgresql_profile_with_persistent_connections(self):
+        """Test per il profilo PostgreSQL senza pool, con connessioni persistenti"""
+        settings = load_settings(DB_ENGINE='postgresql', DB_POOL='false', DB_CONN_MAX_AGE='120')
+        database = settings['DATABASES']['default']
+
+        self.assertEqual(database['OPTIONS'], {})
+        self.assertEqual(database['CONN_MAX_AGE'], 120)
+
+    def test_unknown_engine(self):
+        """Test per un DB_ENGINE non supportato"""
+        with self.assertRaises(ImproperlyConfigured):
+            load_settings(DB_ENGINE='oracle')
+
+
+class VerifyDatabaseCommandTests(TestCase):
+    def test_verify_database(self):
+        """Test per la verifica del database configurato (SQLite o PostgreSQL)"""
+        out = StringIO()
+        call_command('verify_database', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn(server_version(connection), output)
+        self.assertIn("Database OK, all migrations applied", output)
+        self.assertEqual(pending_migrations(connection), [])
+
+    def test_connection_reuse_settings(self):
+        """Test per le impostazioni di riuso delle connessioni del motore in uso"""
+        reuse = connection_settings(connection)
+
+        if connection.vendor == 'postgresql':
+            self.assertTrue(reuse['conn_health_checks'])
+            self.assertTrue(reuse['pool'] or reuse['conn_max_age'])
+        else:
+            self.assertIsNone(reuse['pool'])
+
+    def test_pending_migrations_fail(self):
+        """Test per il fallimento del comando quando ci sono migrazioni non applicate"""
+        with mock.patch('database.management.commands.verify_database.pending_migrations', return_value=['papers.0002_x']):
+            with self.assertRaisesMessage(CommandError, "1 unapplied migration(s): papers.0002_x"):
+                call_command('verify_database', stdout=StringIO())
+
+    def test_pending_migrations_applied_with_migrate(self):
+        """Test per l'applicazione delle migrazioni mancanti con --migrate"""
+        with mock.patch('database.management.commands.verify_database.pending_migrations', side_effect=[['papers.0002_x'], []]), \
+                mock.patch('database.management.commands.verify_database.call_command') as migrate:
+            call_command('verify_database', '--migrate', stdout=StringIO())
+
+        migrate.assert_called_once()
+        self.assertEqual(migrate.call_args.args, ('migrate',))
+
+
+TUNING_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000, 'mmap_size': 1048576, 'cache_size': -2048}
+
+
+@override_settings(SQLITE_PRAGMAS=TUNING_PRAGMAS)
+class SQLiteTuningTests(SimpleTestCase):
+    # Usa una connessione SQLite separata su un file temporaneo, non il database dei test
+    databases = '__all__'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings_dict = {**connections.settings['default'], 'ENGINE': 'django.db.backends.sqlite3',
+                         'NAME': os.path.join(self.tmpdir.name, 'tuning.sqlite3')}
+        self.connection = SQLiteDatabaseWrapper(settings_dict, alias='tuning')
+
+    def tearDown(self):
+        self.connection.close()
+        self.tmpdir.cleanup()
+
+    def _pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_new_connection(self):
+        """Test per i PRAGMA eseguiti dal signal connection_created su ogni nuova connessione"""
+        self.assertEqual(self._pragma('journal_mode'), 'wal')
+        self.assertEqual(self._pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self._pragma('busy_timeout'), 5000)
+        self.assertEqual(self._pragma('cache_size'), -2048)
+
+    def test_checkpoint_command(self):
+        """Test per il checkpoint del WAL"""
+        with self.connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE t (x INTEGER)')
+            cursor.executemany('INSERT INTO t VALUES (%s)', [(i,) for i in range(100)])
+        out = StringIO()
+
+        with mock.patch('database.management.commands.sqlite_checkpoint.connections', {'default': self.connection}):
+            call_command('sqlite_checkpoint', stdout=out)
+
+        self.assertIn("Checkpoint TRUNCATE", out.getvalue())
+        self.assertEqual(os.path.getsize(os.path.join(self.tmpdir.name, 'tuning.sqlite3-wal')), 0)
+
+    @override_settings(SQLITE_PRAGMAS=None)
+    def test_checkpoint_requires_wal(self):
+        """Test per il checkpoint senza modalità WAL"""
+        with mock.patch('database.management.commands.sqlite_checkpoint.connections', {'default': self.connection}):
+            with self.assertRaisesMessage(CommandError, "not WAL"):
+                call_command('sqlite_checkpoint', stdout=StringIO())
+
+
+@read_replica
+def read_only_view(request):
+    return HttpResponse(router.db_for_read(User))
+
+
+def plain_view(request):
+    return HttpResponse(router.db_for_read(User))
+
+
+@read_replica
+def many_reads_view(request):
+    return HttpResponse(','.join(router.db_for_read(User) for _ in range(20)))
+
+
+@read_replica
+def writing_view(request):
+    User.objects.create(first_name="New", last_name="User", email="new@example.com", password="x")
+    return HttpResponse(router.db_for_read(User))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_REPLICA_STICKINESS_SECONDS=7)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _call(self, view, **cookies):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies)
+        return ReplicaStickinessMiddleware(view)(request)
+
+    def test_read_only_view_reads_from_replica(self):
+        """Test per le letture di una view @read_replica, che vanno sulla replica"""
+        response = self._call(read_only_view)
+
+        self.assertEqual(response.content, b'replica1')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_one_replica_per_request(self):
+        """Test per le letture di una richiesta, che usano tutte la stessa replica"""
+        with override_settings(DATABASE_REPLICAS=['replica1', 'replica2', 'replica3']), \
+                mock.patch('database.routers.random.choice', side_effect=['replica2', 'replica3']) as choose_replica:
+            self.assertEqual(set(self._call(many_reads_view).content.split(b',')), {b'replica2'})
+            self.assertEqual(set(self._call(many_reads_view).content.split(b',')), {b'replica3'})
+
+        self.assertEqual(choose_replica.call_count, 2)
+
+    def test_other_views_read_from_primary(self):
+        """Test per le view non marcate, che leggono dal primary"""
+        self.assertEqual(self._call(plain_view).content, b'default')
+
+    def test_write_pins_client_to_primary(self):
+        """Test per la stickiness read-your-writes dopo una scrittura"""
+        response = self._call(writing_view)
+
+        # Dopo la scrittura anche le letture della stessa richiesta vanno sul primary
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 7)
+
+        # Le richieste successive con il cookie leggono dal primary
+        self.assertEqual(self._call(read_only_view, **{STICKY_COOKIE: '1'}).content, b'default')
+
+    def test_no_replicas_configured(self):
+        """Test senza repliche configurate: tutto va sul primary"""
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self._call(read_only_view).content, b'default')
+
+    def test_replicas_are_not_migrated(self):
+        """Test per le migrazioni, che vengono applicate solo al primary"""
+        self.assertTrue(ReplicaRouter().allow_migrate('default', 'papers'))
+        self.assertFalse(ReplicaRouter().allow_migrate('replica1', 'papers'))
+
+    def test_list_endpoints_use_replica_until_user_writes(self):
+        """Test per gli endpoint di lista, che usano la replica finché l'utente non scrive"""
+        # La "replica" è il database dei test stesso: si verifica solo la scelta del router
+        with override_settings(DATABASE_REPLICAS=['default']), \
+                mock.patch('database.routers.random.choice', return_value='default') as choose_replica:
+            response = self.client.get(reverse('get_conferences'))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(choose_replica.called)
+            self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+            User.objects.create(first_name="Mario", last_name="Rossi", email="mario@example.com", password=make_password("secret"))
+            # Il login scrive la sessione e last_login: il client viene legato al primary
+            response = self.client.post(reverse('login'), data={'email': "mario@example.com", 'password': "secret"}, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(STICKY_COOKIE, response.cookies)
+
+            choose_replica.reset_mock()
+            response = self.client.get(reverse('get_conferences'))
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(choose_replica.called)
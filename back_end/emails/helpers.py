@@ -0,0 +1,120 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _queue_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def build_email(subject, text_content, to_email, html_content='', from_email=None):
+    """Costruisce (senza salvarla) una email da mettere in coda."""
+    return OutgoingEmail(
+        subject=subject,
+        body=text_content,
+        html_body=html_content or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to_email=to_email,
+    )
+
+
+def enqueue_email(subject, text_content, to_email, html_content='', from_email=None):
+    """Mette in coda una singola email: verrà inviata dal worker `process_email_queue`."""
+    email = build_email(subject, text_content, to_email, html_content, from_email)
+    email.save()
+    return email
+
+
+def enqueue_emails(emails):
+    """Mette in coda più email (costruite con build_email) con un'unica INSERT."""
+    return OutgoingEmail.objects.bulk_create(emails)
+
+
+def _claim_batch(batch_size):
+    """
+    Riserva un blocco di email scadute spostando in avanti il loro next_attempt_at (lease),
+    così che altri worker non le inviino in parallelo. Su PostgreSQL le righe già
+    riservate da un altro worker vengono saltate (SKIP LOCKED).
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=_queue_setting('EMAIL_QUEUE_LEASE_SECONDS', 300))
+
+    with transaction.atomic():
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            OutgoingEmail.objects.filter(id__in=ids).update(next_attempt_at=now + lease)
+
+    return list(OutgoingEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def _to_message(email, connection):
+    msg = EmailMultiAlternatives(email.subject, email.body, email.from_email, [email.to_email], connection=connection)
+    if email.html_body:
+        msg.attach_alternative(email.html_body, "text/html")
+    return msg
+
+
+def _mark_failed(email, error, now):
+    email.attempts += 1
+    email.last_error = error
+    max_attempts = _queue_setting('EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+    if email.attempts >= max_attempts:
+        # Dead letter: non verrà più ritentata automaticamente
+        email.status = 'dead'
+        logger.error("Email %s to %s moved to dead letter after %s attempts: %s", email.id, email.to_email, email.attempts, error)
+    else:
+        # Backoff esponenziale: retry_delay, 2*retry_delay, 4*retry_delay, ...
+        delay = _queue_setting('EMAIL_QUEUE_RETRY_DELAY_SECONDS', 60) * (2 ** (email.attempts - 1))
+        email.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Invia un blocco di email in coda riutilizzando un'unica connessione al backend email.
+    Ritorna la coppia (prese in carico, inviate con successo): un blocco preso in carico interamente fallito
+    non vuol dire che la coda sia vuota.
+    """
+    batch_size = batch_size or _queue_setting('EMAIL_QUEUE_BATCH_SIZE', 100)
+    emails = _claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    sent = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Impossibile aprire la connessione: tutte le email del blocco vengono ritentate più tardi
+        now = timezone.now()
+        for email in emails:
+            _mark_failed(email, str(e), now)
+    else:
+        try:
+            for email in emails:
+                try:
+                    connection.send_messages([_to_message(email, connection)])
+                except Exception as e:
+                    _mark_failed(email, str(e), timezone.now())
+                else:
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutgoingEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return len(emails), sent
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from emails.helpers import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Invia le email in coda (inviti ai reviewer, notifiche di accettazione) su un'unica connessione SMTP."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Svuota la coda una volta ed esce invece di restare in ascolto')
+        parser.add_argument('--batch-size', type=int, default=None, help='Numero massimo di email inviate per connessione')
+        parser.add_argument('--interval', type=float, default=5.0, help='Secondi di attesa quando la coda è vuota')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            # Svuota tutto ciò che è già scaduto, un blocco alla volta: anche un blocco interamente
+            # fallito (rimandato con backoff o in dead letter) non significa che la coda sia vuota
+            while True:
+                claimed, sent = send_queued_emails(batch_size=batch_size)
+                if not claimed:
+                    break
+                self.stdout.write(f"Sent {sent} of {claimed} email(s)")
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
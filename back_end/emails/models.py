@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),  # tentativi esauriti, resta in coda solo per ispezione/reinvio manuale
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()  # versione testuale
+    html_body = models.TextField(blank=True)  # versione HTML (opzionale)
+    from_email = models.EmailField()
+    to_email = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # il worker invia solo le email scadute
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Email to {self.to_email} - {self.subject} ({self.status})"
@@ -0,0 +1,116 @@
+import functools
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.template import Context, Engine
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / 'templates'
+CSS_TEMPLATE = TEMPLATES_DIR / 'emails' / 'email.css'
+# Segnaposto nell'<head> dei template: viene sostituito con le regole CSS non inlinabili (es. :hover)
+STYLE_MARKER = '<!-- email styles -->'
+
+_RULE_RE = re.compile(r'([^{}]+)\{([^}]*)\}')
+_TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)(\s[^<>]*?)?(/?)>')
+_CLASS_RE = re.compile(r'\sclass="([^"]*)"')
+_STYLE_RE = re.compile(r'\sstyle="([^"]*)"')
+_SIMPLE_SELECTOR_RE = re.compile(r'^\.?[\w-]+$')
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_css():
+    """
+    Legge email.css una sola volta e separa le regole inlinabili (selettori semplici come
+    `body` o `.button`) da quelle che devono restare in un blocco <style> (es. `.button:hover`).
+    """
+    inline_rules = {}
+    remaining = []
+    for selectors, declarations in _RULE_RE.findall(CSS_TEMPLATE.read_text()):
+        declarations = '; '.join(d.strip() for d in declarations.split(';') if d.strip())
+        for selector in (s.strip() for s in selectors.split(',')):
+            if _SIMPLE_SELECTOR_RE.match(selector):
+                inline_rules.setdefault(selector, []).append(declarations)
+            else:
+                remaining.append(f'{selector} {{ {declarations} }}')
+    return inline_rules, '\n'.join(remaining)
+
+
+def inline_css(source):
+    """Applica le regole di email.css come attributi style direttamente nel sorgente del template."""
+    inline_rules, remaining = _parse_css()
+
+    def add_style(match):
+        tag, attrs, closing = match.group(1), match.group(2) or '', match.group(3)
+        declarations = list(inline_rules.get(tag.lower(), []))
+        class_match = _CLASS_RE.search(attrs)
+        if class_match:
+            for css_class in class_match.group(1).split():
+                declarations.extend(inline_rules.get(f'.{css_class}', []))
+        if not declarations:
+            return match.group(0)
+
+        style = '; '.join(declarations)
+        style_match = _STYLE_RE.search(attrs)
+        if style_match:
+            # Lo stile già presente nel tag ha la precedenza su quello del foglio di stile
+            attrs = _STYLE_RE.sub(f' style="{style}; {style_match.group(1)}"', attrs, count=1)
+        else:
+            attrs = f'{attrs} style="{style}"'
+        return f'<{tag}{attrs}{closing}>'
+
+    source = _TAG_RE.sub(add_style, source)
+    return source.replace(STYLE_MARKER, f'<style>\n{remaining}\n</style>' if remaining else '')
+
+
+class InlineCSSLoader(FilesystemLoader):
+    """Loader che inlinea il CSS nei template HTML delle email al momento del caricamento."""
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if origin.name.endswith('.html'):
+            contents = inline_css(contents)
+        return contents
+
+
+@functools.lru_cache(maxsize=None)
+def _engine():
+    # Engine dedicato alle email: i template vengono caricati, inlinati e compilati una sola volta
+    # (cached loader), indipendentemente da DEBUG e dalla configurazione TEMPLATES del progetto
+    return Engine(
+        dirs=[str(TEMPLATES_DIR)],
+        loaders=[('django.template.loaders.cached.Loader', ['emails.rendering.InlineCSSLoader'])],
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _templates(name):
+    engine = _engine()
+    return (
+        engine.get_template(f'emails/{name}_subject.txt'),
+        engine.get_template(f'emails/{name}.txt'),
+        engine.get_template(f'emails/{name}.html'),
+    )
+
+
+def render_email_batch(name, shared_context, recipient_contexts):
+    """
+    Renderizza l'email `name` per più destinatari condividendo lo stesso contesto di base.
+    Ritorna una lista di tuple (subject, text_content, html_content), una per destinatario.
+    """
+    subject_template, text_template, html_template = _templates(name)
+    context = Context({'frontend_url': settings.FRONTEND_URL, **shared_context})
+    rendered = []
+    for recipient_context in recipient_contexts:
+        with context.push(recipient_context):
+            rendered.append((
+                subject_template.render(context).strip(),
+                text_template.render(context).strip(),
+                html_template.render(context),
+            ))
+    return rendered
+
+
+def render_email(name, context):
+    """Renderizza l'email `name` per un singolo destinatario."""
+    return render_email_batch(name, context, [{}])[0]
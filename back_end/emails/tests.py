@@ -0,0 +1,168 @@
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest import mock
+
+from users.models import User
+from . import rendering
+from .helpers import enqueue_email, send_queued_emails
+from .models import OutgoingEmail
+from .rendering import render_email, render_email_batch
+
+
+class FailingBackend(BaseEmailBackend):
+    """Backend che simula un server SMTP che rifiuta ogni messaggio."""
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP server unavailable")
+
+
+class RejectingBackend(BaseEmailBackend):
+    """Backend che simula un server SMTP che rifiuta i messaggi per un solo destinatario."""
+    def send_messages(self, email_messages):
+        if any("rejected@example.com" in message.to for message in email_messages):
+            raise ConnectionError("Recipient rejected")
+        return len(email_messages)
+
+
+class CountingBackend(BaseEmailBackend):
+    """Backend che conta le connessioni aperte e i messaggi inviati."""
+    opened = 0
+    sent = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, email_messages):
+        CountingBackend.sent += len(email_messages)
+        return len(email_messages)
+
+
+class EmailQueueTests(TestCase):
+    def test_enqueue_does_not_send(self):
+        """Test per verificare che mettere in coda una email non la invii subito"""
+        enqueue_email("Subject", "Body", "reviewer@example.com", html_content="<p>Body</p>")
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.to_email, "reviewer@example.com")
+
+    def test_send_queued_emails(self):
+        """Test per l'invio delle email in coda"""
+        enqueue_email("Subject", "Body", "reviewer@example.com", html_content="<p>Body</p>")
+
+        claimed, sent = send_queued_emails()
+
+        self.assertEqual((claimed, sent), (1, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["reviewer@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>Body</p>")
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, 'sent')
+        self.assertIsNotNone(email.sent_at)
+
+    @override_settings(EMAIL_BACKEND='emails.tests.CountingBackend')
+    def test_batch_uses_single_connection(self):
+        """Test per verificare che un blocco di email venga inviato su un'unica connessione"""
+        CountingBackend.opened = 0
+        CountingBackend.sent = 0
+        for i in range(10):
+            enqueue_email("Subject", "Body", f"reviewer{i}@example.com")
+
+        send_queued_emails()
+
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(CountingBackend.sent, 10)
+
+    @override_settings(EMAIL_BACKEND='emails.tests.FailingBackend', EMAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_failed_email_is_retried_then_dead_lettered(self):
+        """Test per il retry con backoff e il passaggio in dead letter"""
+        email = enqueue_email("Subject", "Body", "reviewer@example.com")
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn("SMTP server unavailable", email.last_error)
+
+        # Il retry non è ancora scaduto: il worker non la ritenta
+        self.assertEqual(send_queued_emails(), (0, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+
+        OutgoingEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+        send_queued_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'dead')
+        self.assertEqual(email.attempts, 2)
+
+    def test_process_email_queue_command(self):
+        """Test per il comando di gestione che svuota la coda"""
+        for i in range(3):
+            enqueue_email("Subject", "Body", f"reviewer{i}@example.com")
+
+        call_command('process_email_queue', '--once', '--batch-size', '2')
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutgoingEmail.objects.filter(status='pending').exists())
+
+    @override_settings(EMAIL_BACKEND='emails.tests.RejectingBackend')
+    def test_process_email_queue_command_continues_after_failed_batch(self):
+        """Test per verificare che un blocco interamente fallito non interrompa lo svuotamento della coda"""
+        enqueue_email("Subject", "Body", "rejected@example.com")
+        enqueue_email("Subject", "Body", "reviewer@example.com")
+
+        call_command('process_email_queue', '--once', '--batch-size', '1')
+
+        self.assertEqual(OutgoingEmail.objects.get(to_email="rejected@example.com").status, 'pending')
+        self.assertEqual(OutgoingEmail.objects.get(to_email="reviewer@example.com").status, 'sent')
+
+
+class EmailRenderingTests(TestCase):
+    def setUp(self):
+        self.admin_user = User(first_name="Admin", last_name="User", email="admin@example.com")
+
+    def test_render_email_inlines_css(self):
+        """Test per verificare che il CSS venga inlinato e le regole :hover restino nel blocco <style>"""
+        subject, text_content, html_content = render_email('reviewer_invitation', {
+            'conference_title': 'Test Conference',
+            'admin_user': self.admin_user,
+        })
+
+        self.assertEqual(subject, 'Invite to be a reviewer for the conference "Test Conference"')
+        self.assertIn("invited by Admin User", text_content)
+        self.assertIn('class="button" style="display: block;', html_content)
+        self.assertIn('<body style="font-family: Arial, sans-serif;', html_content)
+        self.assertIn('.button:hover', html_content)
+        self.assertNotIn('<!-- email styles -->', html_content)
+
+    def test_render_email_escapes_html_only(self):
+        """Test per l'escaping dei dati utente nella versione HTML ma non in subject e testo"""
+        subject, text_content, html_content = render_email('reviewer_invitation', {
+            'conference_title': 'A & <B>',
+            'admin_user': self.admin_user,
+        })
+
+        self.assertIn('"A & <B>"', subject)
+        self.assertIn('"A & <B>"', text_content)
+        self.assertIn('A &amp; &lt;B&gt;', html_content)
+
+    def test_templates_are_compiled_once(self):
+        """Test per verificare che i template vengano caricati e inlinati una sola volta per molti destinatari"""
+        rendering._templates.cache_clear()
+        rendering._engine.cache_clear()
+
+        with mock.patch('emails.rendering.inline_css', wraps=rendering.inline_css) as inline_css:
+            results = render_email_batch('reviewer_invitation', {
+                'conference_title': 'Test Conference',
+                'admin_user': self.admin_user,
+            }, [{'to_email': f'reviewer{i}@example.com'} for i in range(50)])
+            render_email('reviewer_invitation', {'conference_title': 'Other', 'admin_user': self.admin_user})
+
+        self.assertEqual(len(results), 50)
+        # reviewer_invitation.html + base.html
+        self.assertEqual(inline_css.call_count, 2)
@@ -0,0 +1,27 @@
+import re
+import uuid
+from contextvars import ContextVar
+
+# Id della richiesta in corso: ContextVar e non thread-local, così vale anche nelle view async
+_request_id = ContextVar('request_id', default=None)
+
+_valid_request_id = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+def set_request_id(request_id):
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def new_request_id(incoming=None):
+    """Riusa l'X-Request-ID del proxy se è ben formato, altrimenti ne genera uno nuovo."""
+    if incoming and _valid_request_id.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
@@ -0,0 +1,83 @@
+import copy
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from .context import get_request_id
+
+# Attributi standard di LogRecord: tutto il resto arriva da `extra=` e finisce nel JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+class RequestIdFilter(logging.Filter):
+    """Aggiunge a ogni record l'id della richiesta in corso (None fuori da una richiesta)."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = get_request_id()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Una riga JSON per record, con i campi passati in `extra=` allo stesso livello del messaggio."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and not name.startswith('_'):
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    QueueHandler con il proprio QueueListener: il thread della richiesta mette il record in coda e
+    formattazione e scrittura avvengono nel thread del listener, così i worker non si contendono stdout.
+    `handlers` sono gli handler di destinazione; in LOGGING si passano come 'cfg://handlers.<nome>'.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        # dictConfig passa una ConvertingList: l'accesso per indice risolve i riferimenti cfg://
+        self.listener = QueueListener(self.queue, *[handlers[i] for i in range(len(handlers))], respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Nel thread della richiesta si risolvono solo messaggio ed eccezione; il JSON lo produce il listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Meglio perdere un log che bloccare la richiesta se il listener non tiene il passo
+            self.dropped += 1
+
+    def close(self):
+        # Chiamato da logging.shutdown all'uscita: stop() scrive i record ancora in coda
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
@@ -0,0 +1,41 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .context import new_request_id, reset_request_id, set_request_id
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+class RequestIdMiddleware:
+    """
+    Assegna a ogni richiesta un id (quello dell'header X-Request-ID se presente) che compare in tutti i
+    log scritti durante la richiesta e viene restituito nella risposta, per correlare client, proxy e server.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+        token = set_request_id(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        request.request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+        token = set_request_id(request.request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
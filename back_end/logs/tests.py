@@ -0,0 +1,106 @@
+import io
+import json
+import logging
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from users.models import User
+from .context import get_request_id, new_request_id, set_request_id, reset_request_id
+from .handlers import BackgroundQueueHandler, JsonFormatter, RequestIdFilter
+from .middleware import RequestIdMiddleware
+
+
+def make_logger(name):
+    """Logger isolato che scrive JSON su uno StringIO passando dalla coda, come in LOGGING."""
+    stream = io.StringIO()
+    console = logging.StreamHandler(stream)
+    console.setFormatter(JsonFormatter())
+    handler = BackgroundQueueHandler([console])
+    handler.addFilter(RequestIdFilter())
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, handler, stream
+
+
+def written_entries(handler, stream):
+    # stop() attende che il listener abbia scritto tutto ciò che è in coda
+    handler.close()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class StructuredLoggingTests(SimpleTestCase):
+    def test_json_entry_with_extra_and_request_id(self):
+        logger, handler, stream = make_logger('logs.tests.json')
+        token = set_request_id('req-1')
+        try:
+            logger.info("Review %s saved", 7, extra={'paper_id': 3})
+        finally:
+            reset_request_id(token)
+        logger.warning("outside")
+
+        first, second = written_entries(handler, stream)
+        self.assertEqual(first['message'], "Review 7 saved")
+        self.assertEqual(first['level'], "INFO")
+        self.assertEqual(first['logger'], 'logs.tests.json')
+        self.assertEqual(first['request_id'], 'req-1')
+        self.assertEqual(first['paper_id'], 3)
+        self.assertIsNone(second['request_id'])
+
+    def test_exception_is_formatted(self):
+        logger, handler, stream = make_logger('logs.tests.exception')
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("failed")
+        entry, = written_entries(handler, stream)
+        self.assertIn('ZeroDivisionError', entry['exception'])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = BackgroundQueueHandler([logging.NullHandler()], maxsize=1)
+        handler.listener.stop()
+        record = logging.makeLogRecord({'msg': 'x'})
+        handler.handle(record)
+        handler.handle(record)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_incoming_request_id(self):
+        self.assertEqual(new_request_id('abc-123'), 'abc-123')
+        self.assertEqual(len(new_request_id('bad id\n')), 32)
+        self.assertEqual(len(new_request_id(None)), 32)
+
+
+class RequestIdMiddlewareTests(TestCase):
+    def test_id_is_set_during_request_and_returned(self):
+        seen = []
+
+        def view(request):
+            seen.append(get_request_id())
+            return HttpResponse()
+
+        response = RequestIdMiddleware(view)(RequestFactory().get('/', HTTP_X_REQUEST_ID='proxy-42'))
+        self.assertEqual(seen, ['proxy-42'])
+        self.assertEqual(response['X-Request-ID'], 'proxy-42')
+        self.assertIsNone(get_request_id())
+
+    def test_view_logs_carry_the_request_id(self):
+        user = User.objects.create(first_name="Log", last_name="User", email="log@example.com", password="x")
+        self.client.force_login(user)
+        records = []
+        capture = logging.Handler()
+        capture.emit = records.append
+        capture.addFilter(RequestIdFilter())
+        logger = logging.getLogger('conference_roles.views')
+        logger.addHandler(capture)
+        previous_level = logger.level
+        logger.setLevel(logging.DEBUG)
+        try:
+            response = self.client.get(reverse('get_user_conferences'))
+        finally:
+            logger.removeHandler(capture)
+            logger.setLevel(previous_level)
+        self.assertEqual(records[0].request_id, response['X-Request-ID'])
+        self.assertEqual(records[0].user_id, user.id)
@@ -0,0 +1,225 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: i file dei processi terminati restano nella directory
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Somma delle istantanee dei processi terminati, così la directory non cresce a ogni worker riciclato
+AGGREGATE_FILE = 'metrics-aggregate.json'
+
+# nome: (tipo, descrizione, bucket per gli istogrammi)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by view, method and status code.', None),
+    'http_request_duration_seconds': ('histogram', 'Time spent handling the request, middlewares included.', LATENCY_BUCKETS),
+    'http_request_db_queries': ('histogram', 'Database queries run by a request.', QUERY_COUNT_BUCKETS),
+    'http_request_db_duration_seconds': ('histogram', 'Time a request spent waiting for the database.', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Size of the response body as sent (after compression).', SIZE_BUCKETS),
+    'rate_limit_requests_total': ('counter', 'Requests to rate limited views by scope and outcome (allowed, rate_limited, concurrency_limited).', None),
+}
+
+
+class MetricsRegistry:
+    """
+    Contatori e istogrammi in memoria, con le etichette come tuple ordinate di coppie (nome, valore).
+    Con METRICS_MULTIPROC_DIR ogni processo (es. worker gunicorn) salva periodicamente la propria
+    istantanea in un file della directory e /metrics somma quelle di tutti i processi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._last_flush = 0.0
+        # Un file per processo: il pid da solo può essere riusato da un worker successivo
+        self.process_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                # Conteggi per bucket (l'ultimo è +Inf), somma, numero di osservazioni
+                histogram = self._histograms[(name, labels)] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, list(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self._histograms.items()
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def flush(self, force=False):
+        """Scrive l'istantanea del processo in METRICS_MULTIPROC_DIR, al massimo ogni METRICS_FLUSH_SECONDS."""
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < getattr(settings, 'METRICS_FLUSH_SECONDS', 5):
+            return
+        self._last_flush = now
+        _write_snapshot(directory, f'metrics-{self.process_id}.json', self.snapshot())
+
+    def collect(self):
+        """Istantanea aggregata: quella di tutti i processi se c'è METRICS_MULTIPROC_DIR, altrimenti quella locale."""
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+        if not directory:
+            return self.snapshot()
+        self.flush(force=True)
+        merge_dead_processes(directory)
+        snapshots = []
+        for entry in os.scandir(directory):
+            if entry.name.startswith('metrics-') and entry.name.endswith('.json'):
+                snapshot = _read_snapshot(entry.path)
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return merge_snapshots(snapshots)
+
+
+def _write_snapshot(directory, name, snapshot):
+    # Scrittura atomica: chi legge vede il file vecchio o quello nuovo, mai uno a metà
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Esiste, ma appartiene a un altro utente
+    return True
+
+
+def merge_dead_processes(directory):
+    """
+    Somma in AGGREGATE_FILE i file dei processi terminati (es. worker gunicorn riciclati) e li cancella.
+    Il pid è letto dal nome del file, quindi la directory deve essere locale alla macchina dei worker.
+    Il lock sulla directory impedisce a due scrape contemporanei di sommare due volte lo stesso file.
+    """
+    if fcntl is None:
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = []
+        for entry in os.scandir(directory):
+            if not entry.name.startswith('metrics-') or entry.name == AGGREGATE_FILE:
+                continue
+            pid = entry.name[len('metrics-'):].split('-', 1)[0]
+            if pid.isdigit() and not _process_alive(int(pid)):
+                dead.append(entry.path)
+        if not dead:
+            return
+        aggregate_path = os.path.join(directory, AGGREGATE_FILE)
+        snapshots = [_read_snapshot(path) for path in [aggregate_path, *dead]]
+        _write_snapshot(directory, AGGREGATE_FILE, merge_snapshots([snapshot for snapshot in snapshots if snapshot]))
+        for path in dead:
+            os.remove(path)
+
+
+def merge_snapshots(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key not in histograms:
+                histograms[key] = [list(counts), total, count]
+            else:
+                merged = histograms[key]
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, list(labels), counts, total, count] for (name, labels), (counts, total, count) in histograms.items()],
+    }
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = [tuple(pair) for pair in labels] + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(snapshot):
+    """Formato di esposizione testuale di Prometheus (version 0.0.4)."""
+    by_name = defaultdict(list)
+    for name, labels, value in snapshot['counters']:
+        by_name[name].append((labels, value))
+    for name, labels, counts, total, count in snapshot['histograms']:
+        by_name[name].append((labels, (counts, total, count)))
+
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(by_name.get(name, []), key=lambda item: str(item[0])):
+            if metric_type == 'counter':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f'{name}_bucket{_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+# Alla chiusura del worker l'ultima istantanea viene salvata anche se non è passato METRICS_FLUSH_SECONDS
+atexit.register(lambda: registry.flush(force=True))
@@ -0,0 +1,140 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users.models import User
+from .middleware import MetricsMiddleware
+from .registry import AGGREGATE_FILE, MetricsRegistry, merge_snapshots, registry, render_prometheus
+
+
+def sample_value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class RegistryTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = MetricsRegistry()
+        labels = (('view', 'v'), ('method', 'GET'))
+        for value in (0.003, 0.02, 0.02, 20):
+            metrics.observe('http_request_duration_seconds', labels, value)
+        text = render_prometheus(metrics.snapshot())
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        prefix = 'http_request_duration_seconds_bucket{view="v",method="GET",le='
+        self.assertEqual(sample_value(text, prefix + '"0.005"}'), 1)
+        self.assertEqual(sample_value(text, prefix + '"0.025"}'), 3)
+        self.assertEqual(sample_value(text, prefix + '"10"}'), 3)
+        self.assertEqual(sample_value(text, prefix + '"+Inf"}'), 4)
+        self.assertEqual(sample_value(text, 'http_request_duration_seconds_count{view="v",method="GET"}'), 4)
+        self.assertAlmostEqual(sample_value(text, 'http_request_duration_seconds_sum{view="v",method="GET"}'), 20.043)
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.inc('http_requests_total', (('view', 'a"b\\c\n'),))
+        self.assertIn('http_requests_total{view="a\\"b\\\\c\\n"} 1', render_prometheus(metrics.snapshot()))
+
+    def test_merge_sums_processes(self):
+        first, second = MetricsRegistry(), MetricsRegistry()
+        labels = (('view', 'v'),)
+        first.inc('http_requests_total', labels, 2)
+        second.inc('http_requests_total', labels, 3)
+        first.observe('http_request_db_queries', labels, 1)
+        second.observe('http_request_db_queries', labels, 7)
+        merged = merge_snapshots([json.loads(json.dumps(first.snapshot())), json.loads(json.dumps(second.snapshot()))])
+        text = render_prometheus(merged)
+
+        self.assertEqual(sample_value(text, 'http_requests_total{view="v"}'), 5)
+        self.assertEqual(sample_value(text, 'http_request_db_queries_count{view="v"}'), 2)
+        self.assertEqual(sample_value(text, 'http_request_db_queries_sum{view="v"}'), 8)
+
+    def test_multiprocess_directory(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            other_worker = MetricsRegistry()
+            other_worker.inc('http_requests_total', (('view', 'v'),), 4)
+            other_worker.flush(force=True)
+            this_worker = MetricsRegistry()
+            this_worker.inc('http_requests_total', (('view', 'v'),), 1)
+
+            text = render_prometheus(this_worker.collect())
+            self.assertEqual(sample_value(text, 'http_requests_total{view="v"}'), 5)
+            self.assertEqual(len([name for name in os.listdir(directory) if name.startswith('metrics-')]), 2)
+
+    def test_exited_processes_are_folded_into_aggregate(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            for value in (2, 3):
+                recycled_worker = MetricsRegistry()
+                recycled_worker.process_id = f'{exited.pid}-{value}'
+                recycled_worker.inc('http_requests_total', (('view', 'v'),), value)
+                recycled_worker.flush(force=True)
+            this_worker = MetricsRegistry()
+            this_worker.inc('http_requests_total', (('view', 'v'),), 1)
+
+            for _ in range(2):
+                text = render_prometheus(this_worker.collect())
+                self.assertEqual(sample_value(text, 'http_requests_total{view="v"}'), 6)
+            self.assertEqual(
+                sorted(name for name in os.listdir(directory) if name.startswith('metrics-')),
+                sorted([AGGREGATE_FILE, f'metrics-{this_worker.process_id}.json'])
+            )
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_records_view_status_and_database(self):
+        user = User.objects.create(first_name="Metrics", last_name="User", email="metrics@example.com", password="x")
+        self.client.force_login(user)
+        self.client.get(reverse('get_conferences'))
+        self.client.get('/does-not-exist/')
+
+        text = self.client.get(reverse('metrics')).content.decode()
+        labels = '{view="get_conferences",method="GET"}'
+        self.assertIsNotNone(sample_value(text, 'http_requests_total{view="get_conferences",method="GET",status="200"}'))
+        self.assertEqual(sample_value(text, 'http_request_duration_seconds_count' + labels), 1)
+        self.assertGreater(sample_value(text, 'http_request_db_queries_sum' + labels), 0)
+        self.assertGreater(sample_value(text, 'http_request_db_duration_seconds_sum' + labels), 0)
+        self.assertGreater(sample_value(text, 'http_response_size_bytes_sum' + labels), 0)
+        self.assertEqual(sample_value(text, 'http_requests_total{view="unresolved",method="GET",status="404"}'), 1)
+
+    def test_metrics_endpoint_format(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('# TYPE http_requests_total counter', response.content.decode())
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        request = RequestFactory().get('/')
+        MetricsMiddleware(lambda request: HttpResponse('ok'))(request)
+        self.assertEqual(registry.snapshot(), {'counters': [], 'histograms': []})
+
+
+class MetricsAccessTests(TestCase):
+    def test_denied_by_default(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_allowed_ips_and_networks(self):
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8']):
+            self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.2.3').status_code, 200)
+            self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='192.168.1.1').status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
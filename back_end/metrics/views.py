@@ -0,0 +1,48 @@
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse
+from api.responses import JsonResponse
+from api.schema import swagger_auto_schema
+from api.throttling import client_ip
+from rest_framework.decorators import api_view
+
+from .registry import registry, render_prometheus
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _has_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    scheme, _, value = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode())
+
+
+def _ip_allowed(request):
+    try:
+        address = ipaddress.ip_address(client_ip(request))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in getattr(settings, 'METRICS_ALLOWED_IPS', ()))
+
+
+def can_scrape(request):
+    """
+    /metrics espone nomi delle view, traffico ed errori: è negato a meno che la richiesta non abbia
+    il bearer token METRICS_TOKEN o non arrivi da un indirizzo (o rete) di METRICS_ALLOWED_IPS.
+    """
+    return _has_token(request) or _ip_allowed(request)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Metriche delle richieste (latenza, query, dimensione delle risposte, status code) nel formato testuale di Prometheus. "
+                          "Richiede il bearer token METRICS_TOKEN o un indirizzo di METRICS_ALLOWED_IPS.",
+    responses={200: 'Prometheus text exposition format', 403: 'Scrape not allowed'}
+)
+@api_view(['GET'])
+def metrics(request):
+    if not can_scrape(request):
+        return JsonResponse({"error": "Metrics are not available to this client"}, status=403)
+    return HttpResponse(render_prometheus(registry.collect()), content_type=CONTENT_TYPE)
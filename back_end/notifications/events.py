@@ -0,0 +1,196 @@
+import asyncio
+import functools
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from .models import Notification
+
+
+def serialize_notification(notification):
+    """Payload inviato ai client in tempo reale: stessi campi di get_notifications_received, senza la conferenza completa."""
+    return {
+        "id": notification.id,
+        "user_sender": {
+            "id": notification.user_sender.id,
+            "email": notification.user_sender.email
+        },
+        "conference": {
+            "id": notification.conference.id,
+            "title": notification.conference.title
+        },
+        "status": notification.get_status_display(),
+        "type": notification.get_type_display(),
+        "created_at": notification.created_at.isoformat()
+    }
+
+
+class InProcessSubscription:
+    def __init__(self, broker, user_id, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        # Chiamato nel loop del subscriber: se il client è troppo lento scarta l'evento più vecchio
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Ritorna il prossimo evento, o None se non arriva nulla entro `timeout` secondi."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub in memoria: gli eventi pubblicati (anche da thread sincroni, es. le view WSGI o i signal)
+    vengono consegnati alle code asyncio degli stream SSE aperti nello stesso processo.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = InProcessSubscription(self, user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Il loop del subscriber è già stato chiuso
+                self.unsubscribe(subscription)
+
+
+class CacheSubscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.last_seq = None
+
+    async def get(self, timeout):
+        cache = self.broker.cache
+        seq_key = self.broker.seq_key(self.user_id)
+        if self.last_seq is None:
+            # Riceve solo gli eventi pubblicati dopo l'apertura dello stream
+            self.last_seq = await cache.aget(seq_key, 0)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            seq = await cache.aget(seq_key, 0)
+            while self.last_seq < seq:
+                self.last_seq += 1
+                event = await cache.aget(self.broker.event_key(self.user_id, self.last_seq))
+                if event is not None:
+                    return event
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.broker.poll_interval, remaining))
+
+    def close(self):
+        pass
+
+
+class CacheBroker:
+    """
+    Sostituto locale di un broker esterno per deployment con più processi (es. più worker uvicorn):
+    gli eventi vengono scritti in una cache condivisa (file-based, memcached, redis...) con un
+    numero di sequenza per utente, e ogni stream controlla la sequenza ogni `poll_interval` secondi.
+    """
+
+    def __init__(self, cache_alias='default', poll_interval=1.0, event_ttl=300):
+        self.cache = caches[cache_alias]
+        self.poll_interval = poll_interval
+        self.event_ttl = event_ttl
+
+    @staticmethod
+    def seq_key(user_id):
+        return f'notifications:stream:{user_id}:seq'
+
+    @staticmethod
+    def event_key(user_id, seq):
+        return f'notifications:stream:{user_id}:{seq}'
+
+    def subscribe(self, user_id):
+        return CacheSubscription(self, user_id)
+
+    def publish(self, user_id, event):
+        seq_key = self.seq_key(user_id)
+        self.cache.add(seq_key, 0, timeout=None)
+        seq = self.cache.incr(seq_key)
+        self.cache.set(self.event_key(user_id, seq), event, timeout=self.event_ttl)
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    config = getattr(settings, 'NOTIFICATIONS_BROKER', {})
+    broker_class = import_string(config.get('BACKEND', 'notifications.events.InProcessBroker'))
+    return broker_class(**config.get('OPTIONS', {}))
+
+
+def _with_relations(notifications):
+    """
+    Sender e conferenza servono al payload: le notifiche che non li hanno già in cache (es. create
+    passando solo gli id) vengono ricaricate tutte insieme con una sola query, invece di due query
+    lazy per notifica. Quelle cancellate prima del commit non vengono pubblicate.
+    """
+    missing = {
+        notification.id for notification in notifications
+        if not (Notification.user_sender.is_cached(notification) and Notification.conference.is_cached(notification))
+    }
+    if not missing:
+        return list(notifications)
+    loaded = Notification.objects.select_related('user_sender', 'conference').in_bulk(missing)
+    return [
+        loaded[notification.id] if notification.id in missing else notification
+        for notification in notifications
+        if notification.id not in missing or notification.id in loaded
+    ]
+
+
+def publish_notification(notification):
+    """Invia la notifica al destinatario su tutti i suoi stream aperti."""
+    publish_notifications([notification])
+
+
+def publish_notifications(notifications):
+    broker = get_broker()
+    for notification in _with_relations(notifications):
+        broker.publish(notification.user_receiver_id, serialize_notification(notification))
+
+
+def format_sse(event, event_name='notification'):
+    return f"event: {event_name}\nid: {event['id']}\ndata: {json.dumps(event)}\n\n"
@@ -1,74 +1,134 @@
-from django.core.mail import EmailMultiAlternatives
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from conference_roles.models import ConferenceRole
+from emails.helpers import build_email, enqueue_email, enqueue_emails
+from emails.rendering import render_email, render_email_batch
+from .models import Notification, NotificationRemoval
+
 
 def send_reviewer_acceptance_email(admin_user, reviewer_user, conference_title):
-    subject = f'Reviewer Acceptance for the conference "{conference_title}"'
-    from_email = 'submissionispossible6@gmail.com'
-    text_content = f'{reviewer_user.first_name} {reviewer_user.last_name} has accepted the invitation to be a reviewer for the conference "{conference_title}".'
-
-    email_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                background-color: #f4f4f4;
-                color: #333;
-            }}
-            .container {{
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-                background-color: #F2E3EB;
-                border-radius: 10px;
-                box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
-            }}
-            .header {{
-                text-align: center;
-                padding: 10px 0;
-                background-color: #873F7E;
-                color: #fff;
-                border-radius: 10px 10px 0 0;
-            }}
-            .content {{
-                padding: 20px;
-            }}
-            .button {{
-                display: block;
-                width: 200px;
-                margin: 20px auto;
-                padding: 10px;
-                text-align: center;
-                background-color: #D7AEEE;
-                color: #333;
-                text-decoration: underline;
-                border-radius: 5px;
-                border: 1px solid #D7AEEE;
-            }}
-            .button:hover {{
-                background-color: #ffcccc;
-                border-color: #ffcccc;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Reviewer Acceptance Notification</h1>
-            </div>
-            <div class="content">
-                <p>Hello,</p>
-                <p>{reviewer_user.first_name} {reviewer_user.last_name} has accepted the invitation to be a reviewer for the conference "<strong>{conference_title}</strong>".</p>
-                <p>For more information, please visit our website: </p>
-                <a href="http://http://localhost:5173/login" class="button">Go to SubmissionIsPossible</a>
-                <p>Thank you,</p>
-                <p>The SubmissionIsPossible Team</p>
-            </div>
-        </div>
-    </body>
-    </html>
+    subject, text_content, email_content = render_email('reviewer_acceptance', {
+        'conference_title': conference_title,
+        'reviewer_user': reviewer_user,
+    })
+
+    # The email is queued and sent asynchronously by the process_email_queue worker
+    enqueue_email(subject, text_content, admin_user.email, html_content=email_content)
+
+
+def send_reviewer_acceptance_emails(acceptances):
+    """
+    Mette in coda con un'unica INSERT le email di accettazione per più inviti.
+    `acceptances` è una lista di tuple (admin_user, reviewer_user, conference_title).
+    """
+    rendered = render_email_batch('reviewer_acceptance', {}, [
+        {'conference_title': conference_title, 'reviewer_user': reviewer_user}
+        for _, reviewer_user, conference_title in acceptances
+    ])
+    enqueue_emails([
+        build_email(subject, text_content, admin_user.email, html_content=email_content)
+        for (admin_user, _, _), (subject, text_content, email_content) in zip(acceptances, rendered)
+    ])
+
+
+NOTIFICATION_STATUSES = {
+    'accept': 1,
+    'reject': -1
+}
+
+
+def validate_notification_update(data):
+    """Controlla il corpo di update_notification: ritorna il messaggio di errore, o None se è valido."""
+    if not (data.get('id_notification') and data.get('status')):
+        return 'Missing fields'
+    if data['status'] not in NOTIFICATION_STATUSES:
+        return 'Invalid status value'
+    return None
+
+
+@transaction.atomic
+def apply_notification_update(notification_id, status):
+    """
+    Accetta o rifiuta la notifica, usata sia da update_notification che dalla variante async.
+    Ritorna la notifica aggiornata, o None se non esiste.
+    """
+    try:
+        notification = Notification.objects.select_related('user_sender', 'user_receiver', 'conference').get(id=notification_id)
+    except Notification.DoesNotExist:
+        return None
+
+    notification.status = NOTIFICATION_STATUSES[status]
+
+    # Se l'invito è stato accettato e si tratta di un invito come reviewer
+    if status == 'accept' and notification.type == 1:
+        # Crea il ruolo di reviewer se non esiste già (il vincolo unique_conference_role evita duplicati)
+        ConferenceRole.objects.get_or_create(
+            user=notification.user_receiver,
+            conference=notification.conference,
+            role='reviewer'
+        )
+
+    # Scambia sender e receiver e salva la notifica
+    user_sender = notification.user_sender
+    user_receiver = notification.user_receiver
+    notification.user_sender = user_receiver
+    notification.user_receiver = user_sender
+    notification.save()
+    # Il vecchio receiver non la riceve più: in sync la vede come rimossa
+    record_notification_removals([(user_receiver.id, notification.id)])
+
+    # Email to admin of the reviewer acceptance
+    send_reviewer_acceptance_email(user_sender, user_receiver, notification.conference.title)
+    return notification
+
+
+def pending_count_cache_key(user_id):
+    return f'notifications:pending:{user_id}'
+
+
+def get_pending_count(user_id):
+    """Numero di notifiche in attesa (status 0) ricevute dall'utente, letto dalla cache quando possibile."""
+    key = pending_count_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_receiver_id=user_id, status=0).count()
+        cache.set(key, count, getattr(settings, 'NOTIFICATIONS_COUNT_CACHE_SECONDS', 60))
+    return count
+
+
+def invalidate_pending_counts(user_ids):
+    cache.delete_many([pending_count_cache_key(user_id) for user_id in set(user_ids)])
+
+
+def record_notification_removals(removals):
     """
+    Scrive le lapidi di notifications/sync/ per le coppie (user_id, notification_id): notifiche cancellate
+    o passate a un altro receiver. Va chiamata nella stessa transazione della modifica.
+    """
+    NotificationRemoval.objects.bulk_create([
+        NotificationRemoval(user_id=user_id, notification_id=notification_id)
+        for user_id, notification_id in dict.fromkeys(removals)
+    ])
+
+
+def encode_sync_cursor(updated_at, notification_id, removal_id):
+    """Cursore di notifications/sync/: ultima notifica inviata (updated_at, id) e ultima lapide inviata."""
+    return f'{updated_at.isoformat() if updated_at else ""}|{notification_id}|{removal_id}'
+
 
-    msg = EmailMultiAlternatives(subject, text_content, from_email, [admin_user.email])
-    msg.attach_alternative(email_content, "text/html")
-    msg.send()
+def decode_sync_cursor(cursor):
+    """Ritorna (updated_at, id, removal_id) dal cursore opaco restituito da notifications/sync/, o None se non valido."""
+    try:
+        timestamp, notification_id, removal_id = cursor.split('|')
+        updated_at = datetime.fromisoformat(timestamp) if timestamp else None
+        notification_id, removal_id = int(notification_id), int(removal_id)
+    except ValueError:
+        return None
+    if updated_at is not None and timezone.is_naive(updated_at):
+        updated_at = timezone.make_aware(updated_at, dt_timezone.utc)
+    return updated_at, notification_id, removal_id
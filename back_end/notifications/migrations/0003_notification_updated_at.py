@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0005_conference_status'),
+        ('notifications', '0002_rename_creation_date_notification_created_at_and_more'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user_receiver', 'updated_at', 'id'], name='notif_receiver_updated_idx'),
+        ),
+    ]
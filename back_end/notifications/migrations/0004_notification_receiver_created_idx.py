@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conference', '0005_conference_status'),
+        ('notifications', '0003_notification_updated_at'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user_receiver', '-created_at'], name='notif_receiver_created_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_receiver_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('notification_id', models.BigIntegerField()),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'id'], name='notif_removal_user_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from users.models import User
 from conference.models import Conference
 
@@ -20,6 +21,31 @@ class Notification(models.Model):
     status = models.IntegerField(choices=STATUS_CHOICES, default=0)
     type = models.IntegerField(choices=TYPE_CHOICES, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Watermark per la sincronizzazione incrementale (notifications/sync/)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_receiver', 'updated_at', 'id'], name='notif_receiver_updated_idx'),
+            # get_notifications_received: notifiche ricevute, dalla più recente
+            models.Index(fields=['user_receiver', '-created_at'], name='notif_receiver_created_idx'),
+        ]
 
     def __str__(self):
         return f"Notification from {self.user_sender} to {self.user_receiver} - {self.get_status_display()}"
+
+
+class NotificationRemoval(models.Model):
+    """
+    Lapide per notifications/sync/: la notifica è stata cancellata o non è più ricevuta dall'utente
+    (update_notification scambia sender e receiver). Le notifiche modificate si trovano invece da updated_at.
+    """
+    # Non ForeignKey: la riga deve sopravvivere alla notifica cancellata
+    user_id = models.BigIntegerField()
+    notification_id = models.BigIntegerField()
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'id'], name='notif_removal_user_idx'),
+        ]
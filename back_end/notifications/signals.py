@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .events import publish_notification, publish_notifications
+from .helpers import invalidate_pending_counts
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, **kwargs):
+    # update_notification scambia sender e receiver: il contatore cambia per entrambi
+    user_ids = [instance.user_sender_id, instance.user_receiver_id]
+    # Cache e stream vengono aggiornati solo dopo il commit, così non vedono mai righe annullate da un rollback
+    transaction.on_commit(lambda: invalidate_pending_counts(user_ids))
+    transaction.on_commit(lambda: publish_notification(instance))
+
+
+def push_bulk_notifications(notifications):
+    """
+    bulk_create e bulk_update non emettono post_save: le notifiche create o aggiornate in blocco
+    vanno pubblicate (e i contatori invalidati) esplicitamente.
+    """
+    if notifications:
+        user_ids = [notification.user_receiver_id for notification in notifications]
+        user_ids += [notification.user_sender_id for notification in notifications]
+        transaction.on_commit(lambda: invalidate_pending_counts(user_ids))
+        transaction.on_commit(lambda: publish_notifications(notifications))
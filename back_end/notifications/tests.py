@@ -1,9 +1,23 @@
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
-from .models import User, Conference, Notification
+from .models import User, Conference, Notification, NotificationRemoval
+import asyncio
 import json
+import threading
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from conference_roles.models import ConferenceRole
+from emails.models import OutgoingEmail
+from api.helpers import bump_versions
+from conference.teardown import teardown_conference
+from .events import CacheBroker, InProcessBroker, publish_notifications, serialize_notification
+from .views import _notification_events
 
 
 class NotificationTests(TestCase):
@@ -225,4 +239,528 @@ class NotificationTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 400)
-        self.assertEqual(response.json()["error"], "Invalid status value")
\ No newline at end of file
+        self.assertEqual(response.json()["error"], "Invalid status value")
+
+
+    async def test_update_notification_async(self):
+        """Test per la variante async di update_notification: ruolo di reviewer ed email di accettazione in coda"""
+        notification = await Notification.objects.acreate(
+            user_sender=self.user_sender,
+            user_receiver=self.user_receiver,
+            conference=self.conference,
+            type=1,
+            status=0
+        )
+
+        response = await self.async_client.patch(reverse('update_notification_async'), json.dumps({
+            "id_notification": notification.id,
+            "status": "accept"
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        await notification.arefresh_from_db()
+        self.assertEqual(notification.status, 1)
+        self.assertEqual(notification.user_receiver_id, self.user_sender.id)
+        self.assertTrue(await ConferenceRole.objects.filter(
+            user=self.user_receiver, conference=self.conference, role='reviewer'
+        ).aexists())
+        self.assertEqual(await OutgoingEmail.objects.filter(to_email=self.user_sender.email).acount(), 1)
+
+        missing = await self.async_client.patch(reverse('update_notification_async'), json.dumps({
+            "id_notification": 999, "status": "accept"
+        }), content_type="application/json")
+        self.assertEqual(missing.status_code, 404)
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="password123")
+        self.reviewer = User.objects.create(first_name="Reviewer", last_name="User", email="reviewer@example.com", password="password123")
+        self.conference = Conference.objects.create(
+            title="Stream Conference",
+            admin_id=self.admin,
+            deadline=timezone.now() + timezone.timedelta(days=7),
+            description="Test Conference Description"
+        )
+
+    def test_in_process_broker_delivers_across_threads(self):
+        """Test per la consegna di un evento pubblicato da un altro thread allo stream del destinatario"""
+        broker = InProcessBroker()
+
+        async def listen():
+            subscription = broker.subscribe(self.reviewer.id)
+            other = broker.subscribe(self.admin.id)
+            publisher = threading.Thread(target=broker.publish, args=(self.reviewer.id, {"id": 1}))
+            publisher.start()
+            event = await subscription.get(timeout=1)
+            publisher.join()
+            other_event = await other.get(timeout=0.05)
+            subscription.close()
+            other.close()
+            return event, other_event
+
+        event, other_event = asyncio.run(listen())
+
+        self.assertEqual(event, {"id": 1})
+        self.assertIsNone(other_event)
+        self.assertEqual(broker.subscriber_count(self.reviewer.id), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stream-tests'}})
+    def test_cache_broker_delivers_only_new_events(self):
+        """Test per il broker basato su cache condivisa tra processi"""
+        broker = CacheBroker(poll_interval=0.01)
+        broker.publish(self.reviewer.id, {"id": 1})
+
+        async def listen():
+            subscription = broker.subscribe(self.reviewer.id)
+            self.assertIsNone(await subscription.get(timeout=0.02))
+            await asyncio.to_thread(broker.publish, self.reviewer.id, {"id": 2})
+            return await subscription.get(timeout=1)
+
+        self.assertEqual(asyncio.run(listen()), {"id": 2})
+
+    def test_saved_notification_is_published_after_commit(self):
+        """Test per la pubblicazione di una notifica solo dopo il commit della transazione"""
+        with mock.patch('notifications.signals.publish_notification') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                notification = Notification.objects.create(
+                    user_sender=self.admin,
+                    user_receiver=self.reviewer,
+                    conference=self.conference,
+                    type=1
+                )
+                publish.assert_not_called()
+
+        publish.assert_called_once_with(notification)
+
+    def test_publish_loads_relations_in_one_query(self):
+        """Test per il caricamento di sender e conferenza con una sola query quando non sono in cache"""
+        for _ in range(3):
+            Notification.objects.create(
+                user_sender=self.admin,
+                user_receiver=self.reviewer,
+                conference=self.conference,
+                type=1
+            )
+        # Notifiche con i soli id delle relazioni, come quelle create con bulk_create(user_sender_id=...)
+        notifications = list(Notification.objects.all())
+
+        with mock.patch('notifications.events.get_broker') as get_broker:
+            with self.assertNumQueries(1):
+                publish_notifications(notifications)
+
+        self.assertEqual(get_broker.return_value.publish.call_count, 3)
+        user_id, event = get_broker.return_value.publish.call_args.args
+        self.assertEqual(user_id, self.reviewer.id)
+        self.assertEqual(event["user_sender"]["email"], self.admin.email)
+        self.assertEqual(event["conference"]["title"], "Stream Conference")
+
+    def test_publish_skips_deleted_notifications(self):
+        """Test per le notifiche cancellate prima del commit, che non vengono pubblicate"""
+        notification = Notification.objects.create(
+            user_sender=self.admin,
+            user_receiver=self.reviewer,
+            conference=self.conference,
+            type=1
+        )
+        stale = Notification.objects.get(id=notification.id)
+        notification.delete()
+
+        with mock.patch('notifications.events.get_broker') as get_broker:
+            publish_notifications([stale])
+
+        get_broker.return_value.publish.assert_not_called()
+
+    def test_bulk_invitations_are_published(self):
+        """Test per la pubblicazione degli inviti creati in blocco da create_conference"""
+        self.client.force_login(self.admin)
+        payload = {
+            "title": "Bulk Conference",
+            "description": "Description",
+            "deadline": (timezone.now() + timezone.timedelta(days=7)).isoformat(),
+            "papers_deadline": (timezone.now() + timezone.timedelta(days=5)).isoformat(),
+            "status": "none",
+            "reviewers": [{"email": self.reviewer.email}],
+            "reviewTemplate": []
+        }
+
+        with mock.patch('notifications.events.get_broker') as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('create_conference'), data=json.dumps(payload), content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        get_broker.return_value.publish.assert_called_once()
+        user_id, event = get_broker.return_value.publish.call_args.args
+        self.assertEqual(user_id, self.reviewer.id)
+        self.assertEqual(event["conference"]["title"], "Bulk Conference")
+        self.assertEqual(event["type"], "reviewer")
+
+    def test_stream_formats_events_and_heartbeats(self):
+        """Test per il formato SSE degli eventi e dei keep-alive"""
+        notification = Notification.objects.create(
+            user_sender=self.admin,
+            user_receiver=self.reviewer,
+            conference=self.conference,
+            type=1
+        )
+        payload = serialize_notification(notification)
+        broker = InProcessBroker()
+
+        async def read_stream():
+            stream = _notification_events(broker, self.reviewer.id, heartbeat=0.01)
+            # Finché lo stream non viene letto non c'è nessuna sottoscrizione
+            self.assertEqual(broker.subscriber_count(self.reviewer.id), 0)
+            chunks = [await anext(stream), await anext(stream)]
+            broker.publish(self.reviewer.id, payload)
+            chunks.append(await anext(stream))
+            await stream.aclose()
+            return chunks
+
+        retry, heartbeat, event = asyncio.run(read_stream())
+
+        self.assertEqual(retry, "retry: 5000\n\n")
+        self.assertEqual(heartbeat, ": keep-alive\n\n")
+        self.assertTrue(event.startswith(f"event: notification\nid: {notification.id}\ndata: "))
+        self.assertEqual(json.loads(event.split("data: ", 1)[1]), payload)
+        # Chiudere lo stream rimuove la sottoscrizione
+        self.assertEqual(broker.subscriber_count(self.reviewer.id), 0)
+
+    def test_stream_requires_login(self):
+        """Test per l'accesso allo stream senza essere loggati"""
+        response = self.client.get(reverse('notification_stream'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "User Must be logged in")
+
+    def test_stream_opens_for_logged_user(self):
+        """Test per l'apertura dello stream da parte di un utente loggato"""
+        self.client.force_login(self.reviewer)
+
+        with mock.patch('notifications.views.get_broker') as get_broker:
+            response = self.client.get(reverse('notification_stream'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        # La sottoscrizione viene registrata solo quando lo stream viene letto
+        get_broker.return_value.subscribe.assert_not_called()
+
+
+
+class NotificationSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="password123")
+        self.reviewer = User.objects.create(first_name="Reviewer", last_name="User", email="reviewer@example.com", password="password123")
+        self.conference = Conference.objects.create(
+            title="Sync Conference",
+            admin_id=self.admin,
+            deadline=timezone.now() + timezone.timedelta(days=7),
+            description="Test Conference Description"
+        )
+        self.client.force_login(self.reviewer)
+
+    def _invite(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                user_sender=self.admin,
+                user_receiver=self.reviewer,
+                conference=self.conference,
+                type=1
+            )
+
+    def test_unread_count_is_cached_and_invalidated(self):
+        """Test per il contatore delle notifiche in attesa, servito dalla cache e invalidato dalle modifiche"""
+        self._invite()
+        self._invite()
+
+        self.assertEqual(self.client.get(reverse('get_notifications_unread_count')).json()["pending"], 2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('get_notifications_unread_count'))
+        self.assertEqual(response.json()["pending"], 2)
+        self.assertFalse(any('notifications_notification' in q['sql'] for q in queries.captured_queries))
+
+        self._invite()
+        self.assertEqual(self.client.get(reverse('get_notifications_unread_count')).json()["pending"], 3)
+
+    def test_accepting_updates_both_counters(self):
+        """Test per l'invalidazione del contatore dopo l'accettazione (sender e receiver vengono scambiati)"""
+        notification = self._invite()
+        self.assertEqual(self.client.get(reverse('get_notifications_unread_count')).json()["pending"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('update_notification'),
+                data=json.dumps({"id_notification": notification.id, "status": "accept"}),
+                content_type="application/json"
+            )
+
+        self.assertEqual(self.client.get(reverse('get_notifications_unread_count')).json()["pending"], 0)
+
+    def test_sync_returns_only_changes_since_cursor(self):
+        """Test per la sincronizzazione incrementale con cursore"""
+        first = self._invite()
+        second = self._invite()
+
+        data = self.client.get(reverse('sync_notifications')).json()
+        self.assertEqual([n["id"] for n in data["notifications"]], [first.id, second.id])
+        self.assertEqual(data["notifications"][0]["conference_title"], "Sync Conference")
+        self.assertEqual(data["pending"], 2)
+        self.assertFalse(data["has_more"])
+        cursor = data["cursor"]
+
+        # Nessuna modifica: risposta vuota e stesso cursore
+        data = self.client.get(reverse('sync_notifications'), {'since': cursor}).json()
+        self.assertEqual(data["notifications"], [])
+        self.assertEqual(data["cursor"], cursor)
+
+        third = self._invite()
+        first.status = -1
+        first.save()
+
+        data = self.client.get(reverse('sync_notifications'), {'since': cursor}).json()
+        self.assertEqual([n["id"] for n in data["notifications"]], [third.id, first.id])
+        self.assertEqual(data["notifications"][1]["status"], "rejected")
+
+    def test_sync_pages_with_limit(self):
+        """Test per la paginazione della sincronizzazione con limit e has_more"""
+        notifications = [self._invite() for _ in range(3)]
+        # Stesso updated_at: l'id fa da spareggio nel cursore
+        Notification.objects.update(updated_at=timezone.now())
+
+        data = self.client.get(reverse('sync_notifications'), {'limit': 2}).json()
+        self.assertTrue(data["has_more"])
+        self.assertEqual([n["id"] for n in data["notifications"]], [notifications[0].id, notifications[1].id])
+
+        data = self.client.get(reverse('sync_notifications'), {'limit': 2, 'since': data["cursor"]}).json()
+        self.assertFalse(data["has_more"])
+        self.assertEqual([n["id"] for n in data["notifications"]], [notifications[2].id])
+
+    def test_sync_receiver_swap_is_sent_as_removal(self):
+        """Test per lo scambio sender/receiver: il vecchio receiver riceve la rimozione, il nuovo la notifica"""
+        notification = self._invite()
+        cursor = self.client.get(reverse('sync_notifications')).json()["cursor"]
+        admin_client = self.client_class()
+        admin_client.force_login(self.admin)
+        admin_cursor = admin_client.get(reverse('sync_notifications')).json()["cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('update_notification'),
+                data=json.dumps({"id_notification": notification.id, "status": "accept"}),
+                content_type="application/json"
+            )
+
+        data = self.client.get(reverse('sync_notifications'), {'since': cursor}).json()
+        self.assertEqual(data["notifications"], [])
+        self.assertEqual(data["removed"], [notification.id])
+        data = admin_client.get(reverse('sync_notifications'), {'since': admin_cursor}).json()
+        self.assertEqual([n["id"] for n in data["notifications"]], [notification.id])
+        self.assertEqual(data["notifications"][0]["status"], "accepted")
+
+    def test_sync_conference_teardown_is_sent_as_removal(self):
+        """Test per le notifiche cancellate con DELETE set-based, senza post_delete"""
+        notification = self._invite()
+        cursor = self.client.get(reverse('sync_notifications')).json()["cursor"]
+
+        teardown_conference(self.conference.id)
+
+        data = self.client.get(reverse('sync_notifications'), {'since': cursor}).json()
+        self.assertEqual(data["removed"], [notification.id])
+
+    def test_sync_deleted_notification_is_sent_as_removal(self):
+        """Test per la lapide scritta quando l'utente cancella una notifica"""
+        kept, deleted = self._invite(), self._invite()
+        cursor = self.client.get(reverse('sync_notifications')).json()["cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('delete_notification'),
+                data=json.dumps({"user_id": self.reviewer.id, "id_notification": deleted.id}),
+                content_type="application/json"
+            )
+
+        data = self.client.get(reverse('sync_notifications'), {'since': cursor}).json()
+        self.assertEqual(data["notifications"], [])
+        self.assertEqual(data["removed"], [deleted.id])
+        self.assertEqual(data["pending"], 1)
+        # Il cursore avanza oltre la lapide
+        data = self.client.get(reverse('sync_notifications'), {'since': data["cursor"]}).json()
+        self.assertEqual(data["removed"], [])
+        self.assertTrue(Notification.objects.filter(id=kept.id).exists())
+
+    def test_sync_bulk_update_is_sent_as_removal(self):
+        """Test per le notifiche accettate in blocco, che passano all'admin"""
+        notifications = [self._invite() for _ in range(2)]
+        cursor = self.client.get(reverse('sync_notifications')).json()["cursor"]
+
+        self.client.patch(reverse('update_notifications_bulk'), data=json.dumps({"notifications": [
+            {"id_notification": notification.id, "status": "reject"} for notification in notifications
+        ]}), content_type="application/json")
+
+        data = self.client.get(reverse('sync_notifications'), {'since': cursor}).json()
+        self.assertEqual(data["removed"], [notification.id for notification in notifications])
+
+    def test_first_sync_lists_current_notifications_only(self):
+        """Test per la prima sync: tutte le notifiche attuali, senza le rimozioni precedenti"""
+        removed = self._invite()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('delete_notification'),
+                data=json.dumps({"user_id": self.reviewer.id, "id_notification": removed.id}),
+                content_type="application/json"
+            )
+        kept = self._invite()
+
+        data = self.client.get(reverse('sync_notifications')).json()
+        self.assertEqual([n["id"] for n in data["notifications"]], [kept.id])
+        self.assertEqual(data["removed"], [])
+
+    def test_saving_notifications_writes_no_tombstones(self):
+        """Test per verificare che solo cancellazioni e scambi del receiver scrivano lapidi"""
+        notification = self._invite()
+        notification.status = -1
+        notification.save()
+
+        self.assertFalse(NotificationRemoval.objects.exists())
+
+    def test_sync_uses_keyset_index(self):
+        """Test per la sync letta in ordine (updated_at, id) con una pagina in più invece di COUNT(*)"""
+        self._invite()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('sync_notifications'), {'since': f'{timezone.now().isoformat()}|0|0'})
+        order_by = 'ORDER BY "notifications_notification"."updated_at" ASC, "notifications_notification"."id" ASC'
+        sync_queries = [q['sql'] for q in queries.captured_queries if order_by in q['sql']]
+        self.assertEqual(len(sync_queries), 1)
+        self.assertIn('LIMIT 101', sync_queries[0])
+
+    def test_sync_invalid_cursor(self):
+        """Test per un cursore non valido"""
+        response = self.client.get(reverse('sync_notifications'), {'since': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Invalid cursor")
+
+
+class BulkUpdateNotificationTests(TestCase):
+    def setUp(self):
+        self.reviewer = User.objects.create(first_name="Reviewer", last_name="User", email="reviewer@example.com", password="password123")
+        self.admins = []
+        self.invitations = []
+        for i in range(5):
+            admin = User.objects.create(first_name=f"Admin{i}", last_name="User", email=f"admin{i}@example.com", password="password123")
+            conference = Conference.objects.create(
+                title=f"Track {i}",
+                admin_id=admin,
+                deadline=timezone.now() + timezone.timedelta(days=7),
+                description="Test Conference Description"
+            )
+            self.admins.append(admin)
+            self.invitations.append(Notification.objects.create(
+                user_sender=admin, user_receiver=self.reviewer, conference=conference, type=1
+            ))
+        self.client.force_login(self.reviewer)
+
+    def _patch(self, updates):
+        return self.client.patch(
+            reverse('update_notifications_bulk'),
+            data=json.dumps({"notifications": updates}),
+            content_type="application/json"
+        )
+
+    def test_bulk_accept_and_reject(self):
+        """Test per l'accettazione e il rifiuto di più inviti in una sola richiesta"""
+        updates = [{"id_notification": n.id, "status": "accept"} for n in self.invitations[:4]]
+        updates.append({"id_notification": self.invitations[4].id, "status": "reject"})
+
+        response = self._patch(updates)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], [n.id for n in self.invitations])
+        self.assertEqual(response.json()["not_found"], [])
+        self.assertEqual(ConferenceRole.objects.filter(user=self.reviewer, role='reviewer').count(), 4)
+        rejected = Notification.objects.get(id=self.invitations[4].id)
+        self.assertEqual(rejected.status, -1)
+        self.assertEqual(rejected.user_receiver, self.admins[4])
+        self.assertFalse(ConferenceRole.objects.filter(user=self.reviewer, conference=rejected.conference).exists())
+
+        # Le email di accettazione vengono messe in coda, non inviate durante la richiesta
+        queued = OutgoingEmail.objects.filter(status='pending').order_by('id')
+        self.assertEqual([email.to_email for email in queued], [admin.email for admin in self.admins[:4]])
+        self.assertIn('"Track 0"', queued[0].subject)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_bulk_query_count_does_not_grow(self):
+        """Test per verificare che il numero di query non cresca con il numero di notifiche"""
+        # Il contatore degli ETag del reviewer viene creato alla prima modifica: lo si crea prima della misura
+        bump_versions([f'user:{self.reviewer.id}'])
+        with CaptureQueriesContext(connection) as few:
+            self._patch([{"id_notification": n.id, "status": "accept"} for n in self.invitations[:2]])
+        with CaptureQueriesContext(connection) as many:
+            self._patch([{"id_notification": n.id, "status": "accept"} for n in self.invitations[2:]])
+
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_bulk_skips_foreign_and_processed_notifications(self):
+        """Test per le notifiche già processate o non ricevute dall'utente"""
+        self._patch([{"id_notification": self.invitations[0].id, "status": "accept"}])
+        other = Notification.objects.create(
+            user_sender=self.reviewer, user_receiver=self.admins[1], conference=self.invitations[1].conference, type=0
+        )
+        existing_role = ConferenceRole.objects.get(user=self.reviewer, conference=self.invitations[0].conference)
+
+        response = self._patch([
+            {"id_notification": self.invitations[0].id, "status": "accept"},
+            {"id_notification": other.id, "status": "accept"},
+            {"id_notification": self.invitations[1].id, "status": "accept"},
+            {"id_notification": 999999, "status": "reject"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], [self.invitations[1].id])
+        self.assertEqual(response.json()["not_found"], [self.invitations[0].id, other.id, 999999])
+        self.assertEqual(ConferenceRole.objects.filter(user=self.reviewer, conference=existing_role.conference).count(), 1)
+
+    def test_bulk_invalid_status(self):
+        """Test per uno stato non valido: nessuna notifica viene modificata"""
+        response = self._patch([
+            {"id_notification": self.invitations[0].id, "status": "accept"},
+            {"id_notification": self.invitations[1].id, "status": "maybe"},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Invalid status value")
+        self.assertFalse(Notification.objects.exclude(status=0).exists())
+
+    def test_bulk_string_ids(self):
+        """Test per gli id inviati come stringhe"""
+        response = self._patch([
+            {"id_notification": str(self.invitations[0].id), "status": "accept"},
+            {"id_notification": str(self.invitations[1].id), "status": "reject"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], [self.invitations[0].id, self.invitations[1].id])
+        self.assertEqual(Notification.objects.get(id=self.invitations[0].id).status, 1)
+
+    def test_bulk_invalid_and_duplicate_ids(self):
+        """Test per id non interi o ripetuti: nessuna notifica viene modificata"""
+        for updates, error in [
+            ([{"id_notification": "abc", "status": "accept"}], "Invalid notification id"),
+            ([{"id_notification": [1], "status": "accept"}], "Invalid notification id"),
+            ([{"id_notification": self.invitations[0].id + 0.7, "status": "accept"}], "Invalid notification id"),
+            ([{"id_notification": self.invitations[0].id, "status": "accept"},
+              {"id_notification": str(self.invitations[0].id), "status": "reject"}], "Duplicate notification id"),
+        ]:
+            response = self._patch(updates)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], error)
+        self.assertFalse(Notification.objects.exclude(status=0).exists())
+
+    def test_bulk_missing_fields(self):
+        """Test per una richiesta senza notifiche"""
+        response = self._patch([])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Missing fields")
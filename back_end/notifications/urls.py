@@ -6,5 +6,10 @@ urlpatterns = [
     path('create-notification/', create_notification, name='create_notification'),
     path('delete-notification/', delete_notification, name='delete_notification'),
     path('update-notification/', update_notification, name='update_notification'),
+    path('async/update-notification/', update_notification_async, name='update_notification_async'),
+    path('update-notifications-bulk/', update_notifications_bulk, name='update_notifications_bulk'),
+    path('unread-count/', get_notifications_unread_count, name='get_notifications_unread_count'),
+    path('sync/', sync_notifications, name='sync_notifications'),
+    path('stream/', notification_stream, name='notification_stream'),
 
 ]
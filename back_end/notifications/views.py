@@ -1,17 +1,34 @@
 import json
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.paginator import Paginator
-from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from api.responses import JsonResponse
+from django.views.decorators.http import require_GET, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 
 from conference_roles.models import ConferenceRole
 from users.models import User
-from .helpers import send_reviewer_acceptance_email
-from .models import Notification
+from .events import format_sse, get_broker
+from .helpers import (
+    NOTIFICATION_STATUSES, apply_notification_update, decode_sync_cursor, encode_sync_cursor, get_pending_count,
+    invalidate_pending_counts, record_notification_removals, send_reviewer_acceptance_emails, validate_notification_update,
+)
+from .signals import push_bulk_notifications
+from .models import Notification, NotificationRemoval
 from rest_framework.decorators import api_view
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import openapi
+from api.schema import swagger_auto_schema
+from django.db import transaction
+from django.db.models import Q
+from users.decorators import get_user
 from conference.models import Conference
+from database.decorators import read_replica
+from api.helpers import as_int, bump_versions
+
+logger = logging.getLogger(__name__)
 
 
 @csrf_exempt
@@ -151,6 +168,7 @@ def create_notification(request):
     }
 )
 @api_view(['POST'])
+@read_replica
 def get_notifications_received(request):
     if request.method != 'POST':
         return JsonResponse({"error": "Only POST requests are allowed"}, status=405)
@@ -202,7 +220,7 @@ def get_notifications_received(request):
         ]
 
     }
-    print(response_data)
+    logger.debug("Notifications received", extra={'user_id': user_id, 'page': page_obj.number, 'count': len(response_data['notifications'])})
     return JsonResponse(response_data, status=200)
 
 
@@ -246,7 +264,10 @@ def delete_notification(request):
             except Notification.DoesNotExist:
                 return JsonResponse({'error': 'Notification not found or does not belong to the user'}, status=404)
 
-            notification.delete()
+            with transaction.atomic():
+                record_notification_removals([(user.id, notification.id)])
+                notification.delete()
+                transaction.on_commit(lambda: invalidate_pending_counts([user.id]))
 
             return JsonResponse({'message': 'Notification deleted successfully'}, status=200)
         except json.JSONDecodeError:
@@ -281,57 +302,330 @@ def update_notification(request):
     if request.method == 'PATCH':
         try:
             data = json.loads(request.body)
-            notification_id = data.get('id_notification')
-            status = data.get('status')
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+        error = validate_notification_update(data)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        if apply_notification_update(data['id_notification'], data['status']) is None:
+            return JsonResponse({'error': 'Notification not found'}, status=404)
+
+        return JsonResponse({'message': 'Notification updated successfully'}, status=200)
+    else:
+        return JsonResponse({'error': 'Only PATCH requests are allowed'}, status=405)
 
-            if not (notification_id and status):
-                return JsonResponse({'error': 'Missing fields'}, status=400)
 
-            status_mapping = {
-                'accept': 1,
-                'reject': -1
+@csrf_exempt
+@require_http_methods(['PATCH'])
+async def update_notification_async(request):
+    """
+    Variante async di update_notification per il deployment ASGI: stessa validazione e stesso
+    aggiornamento, che gira in una transazione in un thread con sync_to_async.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    error = validate_notification_update(data)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    if await sync_to_async(apply_notification_update)(data['id_notification'], data['status']) is None:
+        return JsonResponse({'error': 'Notification not found'}, status=404)
+
+    return JsonResponse({'message': 'Notification updated successfully'}, status=200)
+
+
+@csrf_exempt
+@swagger_auto_schema(
+    methods=['PATCH'],
+    operation_description="Accept or reject many pending notifications received by the logged user in one transaction. "
+                          "Accepted reviewer invitations create the reviewer roles and queue the acceptance emails.",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'notifications': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'id_notification': openapi.Schema(type=openapi.TYPE_INTEGER, description='ID of the notification to update'),
+                    'status': openapi.Schema(type=openapi.TYPE_STRING, description='New status of the notification (accept/reject)')
+                },
+                required=['id_notification', 'status']
+            ))
+        },
+        required=['notifications']
+    ),
+    responses={
+        200: openapi.Response(description="Notifications updated", schema=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "updated": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+                "not_found": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                                            description="Notifications that do not exist, are not pending or do not belong to the user")
             }
+        )),
+        400: openapi.Response(description="Invalid data or status"),
+        405: openapi.Response(description="Only PATCH requests are allowed")
+    }
+)
+@api_view(['PATCH'])
+@get_user
+def update_notifications_bulk(request):
+    if request.method != 'PATCH':
+        return JsonResponse({'error': 'Only PATCH requests are allowed'}, status=405)
 
-            if status not in status_mapping:
-                return JsonResponse({'error': 'Invalid status value'}, status=400)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    updates = data.get('notifications')
+    if not updates or not isinstance(updates, list):
+        return JsonResponse({'error': 'Missing fields'}, status=400)
+
+    new_status = {}
+    for update in updates:
+        if not isinstance(update, dict) or not (update.get('id_notification') and update.get('status')):
+            return JsonResponse({'error': 'Missing fields'}, status=400)
+        if update['status'] not in NOTIFICATION_STATUSES:
+            return JsonResponse({'error': 'Invalid status value'}, status=400)
+        # Gli id possono arrivare anche come stringhe ("5"): le chiavi devono coincidere con notification.id
+        notification_id = as_int(update['id_notification'])
+        if notification_id is None:
+            return JsonResponse({'error': 'Invalid notification id'}, status=400)
+        if notification_id in new_status:
+            return JsonResponse({'error': 'Duplicate notification id'}, status=400)
+        new_status[notification_id] = NOTIFICATION_STATUSES[update['status']]
+
+    with transaction.atomic():
+        # Solo le notifiche ancora in attesa ricevute dall'utente, bloccate fino al commit
+        notifications = list(
+            Notification.objects.select_for_update()
+            .filter(id__in=new_status.keys(), user_receiver=request.user, status=0)
+            .select_related('user_sender', 'user_receiver', 'conference')
+            .order_by('id')
+        )
+
+        now = timezone.now()
+        accepted_invitations = []
+        for notification in notifications:
+            notification.status = new_status[notification.id]
+            if notification.status == 1 and notification.type == 1:
+                accepted_invitations.append(notification)
+            # Scambia sender e receiver, come update_notification
+            notification.user_sender, notification.user_receiver = notification.user_receiver, notification.user_sender
+            # bulk_update non aggiorna i campi auto_now
+            notification.updated_at = now
+
+        Notification.objects.bulk_update(notifications, ['status', 'user_sender', 'user_receiver', 'updated_at'])
+        # L'utente non riceve più queste notifiche: in sync le vede come rimosse
+        record_notification_removals([(request.user.id, notification.id) for notification in notifications])
+
+        # Ruoli di reviewer già esistenti, letti con una sola query
+        existing_roles = set(ConferenceRole.objects.filter(
+            role='reviewer',
+            user_id__in={notification.user_sender_id for notification in accepted_invitations},
+            conference_id__in={notification.conference_id for notification in accepted_invitations},
+        ).values_list('user_id', 'conference_id'))
+        ConferenceRole.objects.bulk_create([
+            ConferenceRole(user=notification.user_sender, conference=notification.conference, role='reviewer')
+            for notification in accepted_invitations
+            if (notification.user_sender_id, notification.conference_id) not in existing_roles
+        ], ignore_conflicts=True)
+        # bulk_create non emette post_save: gli ETag delle view sui ruoli vanno invalidati qui
+        bump_versions(
+            [f'conference:{notification.conference_id}' for notification in accepted_invitations]
+            + [f'user:{notification.user_sender_id}' for notification in accepted_invitations]
+        )
+
+        # Email all'admin per ogni invito accettato, inviate dal worker process_email_queue
+        send_reviewer_acceptance_emails([
+            (notification.user_receiver, notification.user_sender, notification.conference.title)
+            for notification in accepted_invitations
+        ])
+        push_bulk_notifications(notifications)
+
+    updated_ids = [notification.id for notification in notifications]
+    return JsonResponse({
+        'updated': updated_ids,
+        'not_found': [notification_id for notification_id in new_status if notification_id not in set(updated_ids)]
+    }, status=200)
 
-            try:
-                notification = Notification.objects.get(id=notification_id)
-            except Notification.DoesNotExist:
-                return JsonResponse({'error': 'Notification not found'}, status=404)
-
-            # Aggiorna la notifica
-            notification.status = status_mapping[status]
-
-            # Se l'invito è stato accettato e si tratta di un invito come reviewer
-            if status == 'accept' and notification.type == 1:
-                # Verifica che non esista già un ruolo per questo utente
-                existing_role = ConferenceRole.objects.filter(
-                    user=notification.user_receiver,
-                    conference=notification.conference,
-                    role='reviewer'
-                ).exists()
-
-                if not existing_role:
-                    # Crea il ruolo di reviewer
-                    ConferenceRole.objects.create(
-                        user=notification.user_receiver,
-                        conference=notification.conference,
-                        role='reviewer'
-                    )
-
-            # Scambia sender e receiver e salva la notifica
-            user_sender = notification.user_sender
-            user_receiver = notification.user_receiver
-            notification.user_sender = user_receiver
-            notification.user_receiver = user_sender
-            notification.save()
-
-            # Email to admin of the reviewer acceptance
-            send_reviewer_acceptance_email(user_sender, user_receiver, notification.conference.title)
-
-            return JsonResponse({'message': 'Notification updated successfully'}, status=200)
-        except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+@csrf_exempt
+@swagger_auto_schema(
+    methods=['GET'],
+    operation_description="Number of pending notifications received by the logged user (cached).",
+    responses={
+        200: openapi.Response(description="Pending notifications count", schema=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "pending": openapi.Schema(type=openapi.TYPE_INTEGER)
+            }
+        )),
+        400: openapi.Response(description="User must be logged in"),
+        405: openapi.Response(description="Only GET requests are allowed")
+    }
+)
+@api_view(['GET'])
+@get_user
+def get_notifications_unread_count(request):
+    if request.method != 'GET':
+        return JsonResponse({"error": "Only GET requests are allowed"}, status=405)
+
+    return JsonResponse({"pending": get_pending_count(request.user.id)}, status=200)
+
+
+SYNC_FIELDS = ('id', 'user_sender_id', 'conference_id', 'conference__title', 'status', 'type', 'created_at', 'updated_at')
+SYNC_STATUS_LABELS = dict(Notification.STATUS_CHOICES)
+SYNC_TYPE_LABELS = dict(Notification.TYPE_CHOICES)
+
+
+def _sync_row(row):
+    return {
+        "id": row['id'],
+        "user_sender_id": row['user_sender_id'],
+        "conference_id": row['conference_id'],
+        "conference_title": row['conference__title'],
+        "status": SYNC_STATUS_LABELS[row['status']],
+        "type": SYNC_TYPE_LABELS[row['type']],
+        "created_at": row['created_at'].isoformat(),
+        "updated_at": row['updated_at'].isoformat()
+    }
+
+
+@csrf_exempt
+@swagger_auto_schema(
+    methods=['GET'],
+    operation_description="Incremental sync of the notifications received by the logged user: returns the "
+                          "notifications created or updated after the `since` cursor, oldest first, and in `removed` the "
+                          "ids of those deleted or no longer received by the user (apply `removed` first). "
+                          "Pass the returned `cursor` as `since` in the next call; omit `since` for the first sync, "
+                          "which lists every notification currently received.",
+    manual_parameters=[
+        openapi.Parameter('since', openapi.IN_QUERY, description="Cursor returned by the previous sync", type=openapi.TYPE_STRING),
+        openapi.Parameter('limit', openapi.IN_QUERY, description="Maximum number of notifications returned (default 100, max 500)", type=openapi.TYPE_INTEGER),
+    ],
+    responses={
+        200: openapi.Response(description="Notifications changed since the cursor", schema=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "notifications": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "user_sender_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "conference_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "conference_title": openapi.Schema(type=openapi.TYPE_STRING),
+                        "status": openapi.Schema(type=openapi.TYPE_STRING),
+                        "type": openapi.Schema(type=openapi.TYPE_STRING),
+                        "created_at": openapi.Schema(type=openapi.TYPE_STRING, format="date-time"),
+                        "updated_at": openapi.Schema(type=openapi.TYPE_STRING, format="date-time")
+                    }
+                )),
+                "removed": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+                "cursor": openapi.Schema(type=openapi.TYPE_STRING),
+                "has_more": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                "pending": openapi.Schema(type=openapi.TYPE_INTEGER)
+            }
+        )),
+        400: openapi.Response(description="Invalid cursor or limit, or user not logged in"),
+        405: openapi.Response(description="Only GET requests are allowed")
+    }
+)
+@api_view(['GET'])
+@get_user
+def sync_notifications(request):
+    if request.method != 'GET':
+        return JsonResponse({"error": "Only GET requests are allowed"}, status=405)
+
+    try:
+        limit = min(int(request.GET.get('limit', 100)), 500)
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit"}, status=400)
+    if limit < 1:
+        return JsonResponse({"error": "Invalid limit"}, status=400)
+
+    notifications = Notification.objects.filter(user_receiver_id=request.user.id)
+    removals = NotificationRemoval.objects.filter(user_id=request.user.id)
+    since = request.GET.get('since')
+    if since:
+        cursor = decode_sync_cursor(since)
+        if cursor is None:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        updated_at, notification_id, removal_id = cursor
+        if updated_at is not None:
+            # (updated_at, id) > cursore: le notifiche con lo stesso updated_at non vengono né perse né ripetute
+            notifications = notifications.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=notification_id)
+            )
     else:
-        return JsonResponse({'error': 'Only PATCH requests are allowed'}, status=405)
\ No newline at end of file
+        # Prima sync: il client riceve tutte le notifiche attuali, le rimozioni precedenti non lo riguardano
+        updated_at, notification_id = None, 0
+        removal_id = removals.order_by('-id').values_list('id', flat=True).first() or 0
+
+    # Una riga in più per sapere se ci sono altre pagine senza fare COUNT(*)
+    rows = list(notifications.order_by('updated_at', 'id').values(*SYNC_FIELDS)[:limit + 1])
+    removal_rows = list(removals.filter(id__gt=removal_id).order_by('id').values_list('id', 'notification_id')[:limit + 1])
+    has_more = len(rows) > limit or len(removal_rows) > limit
+    rows, removal_rows = rows[:limit], removal_rows[:limit]
+    if rows:
+        updated_at, notification_id = rows[-1]['updated_at'], rows[-1]['id']
+    if removal_rows:
+        removal_id = removal_rows[-1][0]
+
+    removed = list(dict.fromkeys(notification_id for _, notification_id in removal_rows))
+    if removed:
+        # Una notifica tornata all'utente dopo la rimozione (es. scambiata due volte) non è rimossa
+        received = set(Notification.objects.filter(id__in=removed, user_receiver_id=request.user.id).values_list('id', flat=True))
+        removed = [notification_id for notification_id in removed if notification_id not in received]
+
+    return JsonResponse({
+        "notifications": [_sync_row(row) for row in rows],
+        "removed": removed,
+        "cursor": encode_sync_cursor(updated_at, notification_id, removal_id),
+        "has_more": has_more,
+        "pending": get_pending_count(request.user.id)
+    }, status=200)
+
+
+async def _notification_events(broker, user_id, heartbeat):
+    # La sottoscrizione nasce quando lo stream viene effettivamente letto: se la risposta non viene
+    # mai iterata (es. client disconnesso prima dell'invio) non resta nessuna coda registrata
+    subscription = broker.subscribe(user_id)
+    try:
+        # Il browser (EventSource) si riconnette dopo 5 secondi se lo stream cade
+        yield "retry: 5000\n\n"
+        while True:
+            event = await subscription.get(timeout=heartbeat)
+            if event is None:
+                # Commento SSE: mantiene aperta la connessione attraverso proxy e load balancer
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(event)
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def notification_stream(request):
+    """
+    Stream Server-Sent Events delle notifiche ricevute dall'utente loggato: ogni nuova notifica
+    viene inviata come evento `notification`, senza bisogno di fare polling su get_notifications_received.
+    Va servita tramite ASGI (back_end/asgi.py), con WSGI lo stream verrebbe bufferizzato.
+    """
+    user_id = await request.session.aget('_auth_user_id')
+    if not user_id or not await User.objects.filter(id=user_id).aexists():
+        return JsonResponse({"error": "User Must be logged in"}, status=400)
+
+    heartbeat = getattr(settings, 'NOTIFICATIONS_SSE_HEARTBEAT_SECONDS', 15)
+    response = StreamingHttpResponse(
+        _notification_events(get_broker(), int(user_id), heartbeat), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Disabilita il buffering di nginx, altrimenti gli eventi arrivano in ritardo
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,124 @@
+import base64
+import binascii
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from .models import Paper
+
+logger = logging.getLogger(__name__)
+
+# Directory (relative a MEDIA_ROOT) in cui vengono salvati i PDF: create_paper usa papers/paper,
+# i FileField caricati tramite upload_to finiscono in papers_pdf
+PAPER_FILE_DIRS = [os.path.join('papers', 'paper'), 'papers_pdf']
+PAPER_LOOKUP_CHUNK_SIZE = 500
+
+# Un solo thread: i file vengono cancellati in ordine, fuori dalla richiesta e dopo il commit
+_file_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='paper-files')
+
+
+def paper_file_path(name):
+    """
+    Percorso su disco del PDF di un paper a partire dal valore salvato in Paper.paper_file:
+    create_paper salva l'URL del file (il nome, eventualmente preceduto da MEDIA_URL) in MEDIA_ROOT/papers/paper.
+    """
+    if name.startswith('papers_pdf/'):
+        return os.path.join(settings.MEDIA_ROOT, name)
+    return os.path.join(settings.MEDIA_ROOT, 'papers', 'paper', os.path.basename(name))
+
+
+def decode_paper_file(value):
+    """Contenuto del PDF inviato in base64 da create_paper, o None se non è base64 valido."""
+    try:
+        return base64.b64decode(value)
+    except (binascii.Error, TypeError, ValueError):
+        return None
+
+
+def save_paper_file(content):
+    """Salva il PDF (byte) in MEDIA_ROOT/papers/paper e ritorna il valore da mettere in Paper.paper_file."""
+    current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
+    fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'papers', 'paper'))
+    filename = fs.save(f'paper_file_{current_time}.pdf', ContentFile(content))
+    return fs.url(filename)
+
+
+def _delete_files(names):
+    for name in names:
+        try:
+            os.remove(paper_file_path(name))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Il file rimane orfano: lo rimuoverà gc_paper_files
+            logger.exception("Could not delete paper file %s", name)
+
+
+def delete_paper_files(names):
+    """Rimuove i PDF in background; ritorna il Future del task."""
+    return _file_cleanup_executor.submit(_delete_files, [name for name in names if name])
+
+
+def _walk_files(directory):
+    """Visita ricorsiva con os.scandir: i file vengono restituiti uno alla volta, senza costruire la lista intera."""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _walk_files(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def _stored_names(relative_path):
+    """Valori di Paper.paper_file che possono riferirsi al file `relative_path` (relativo a MEDIA_ROOT)."""
+    basename = os.path.basename(relative_path)
+    names = {relative_path, basename}
+    if settings.MEDIA_URL:
+        names |= {settings.MEDIA_URL + relative_path, settings.MEDIA_URL + basename}
+    return names
+
+
+def _orphans_in_chunk(chunk):
+    candidates = set()
+    for relative_path, _ in chunk:
+        candidates |= _stored_names(relative_path)
+    referenced = set(Paper.objects.filter(paper_file__in=candidates).values_list('paper_file', flat=True))
+    return [(relative_path, entry) for relative_path, entry in chunk if not (_stored_names(relative_path) & referenced)]
+
+
+def find_orphan_paper_files(min_age=3600, chunk_size=PAPER_LOOKUP_CHUNK_SIZE):
+    """
+    Genera (percorso relativo a MEDIA_ROOT, os.DirEntry) dei PDF su disco non referenziati da nessun Paper.
+    I file più recenti di `min_age` secondi vengono ignorati: create_paper salva il file prima del paper.
+    """
+    media_root = os.path.abspath(settings.MEDIA_ROOT or '.')
+    newest = time.time() - min_age
+    chunk = []
+    for directory in PAPER_FILE_DIRS:
+        for entry in _walk_files(os.path.join(media_root, directory)):
+            if entry.stat(follow_symlinks=False).st_mtime > newest:
+                continue
+            chunk.append((os.path.relpath(entry.path, media_root).replace(os.sep, '/'), entry))
+            if len(chunk) >= chunk_size:
+                yield from _orphans_in_chunk(chunk)
+                chunk = []
+    if chunk:
+        yield from _orphans_in_chunk(chunk)
+
+
+def quarantine_file(entry, relative_path, quarantine_dir):
+    """Sposta il file in `quarantine_dir` mantenendo il percorso relativo a MEDIA_ROOT."""
+    destination = os.path.join(quarantine_dir, relative_path)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    shutil.move(entry.path, destination)
+    return destination
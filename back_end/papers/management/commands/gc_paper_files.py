@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from papers.helpers import PAPER_LOOKUP_CHUNK_SIZE, find_orphan_paper_files, quarantine_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Trova i PDF in MEDIA_ROOT non più referenziati da nessun paper (paper o conferenze cancellate, "
+        "create_paper fallite). Senza opzioni stampa solo il report (dry run)."
+    )
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument('--delete', action='store_true', help='Cancella i file orfani')
+        action.add_argument('--quarantine', metavar='DIR', help='Sposta i file orfani in DIR invece di cancellarli')
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Ignora i file modificati negli ultimi N secondi (upload in corso)')
+        parser.add_argument('--chunk-size', type=int, default=PAPER_LOOKUP_CHUNK_SIZE,
+                            help='File confrontati con il database per ogni query')
+
+    def handle(self, *args, **options):
+        if options['quarantine'] and not os.path.isdir(options['quarantine']):
+            raise CommandError(f"Quarantine directory does not exist: {options['quarantine']}")
+
+        orphans = total_size = 0
+        for relative_path, entry in find_orphan_paper_files(options['min_age'], options['chunk_size']):
+            size = entry.stat(follow_symlinks=False).st_size
+            if options['delete']:
+                os.remove(entry.path)
+                self.stdout.write(f"Deleted {relative_path} ({size} bytes)")
+            elif options['quarantine']:
+                destination = quarantine_file(entry, relative_path, options['quarantine'])
+                self.stdout.write(f"Quarantined {relative_path} -> {destination} ({size} bytes)")
+            else:
+                self.stdout.write(f"Orphan {relative_path} ({size} bytes)")
+            orphans += 1
+            total_size += size
+
+        summary = f"{orphans} orphan file(s), {total_size / (1024 * 1024):.1f} MB"
+        if options['delete']:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {summary}"))
+        elif options['quarantine']:
+            self.stdout.write(self.style.SUCCESS(f"Quarantined {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Dry run: {summary}. Use --delete or --quarantine DIR to remove them."))
@@ -12,6 +12,15 @@ import os
 import shutil
 from unittest.mock import patch
 from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from conference_roles.models import ConferenceRole
+from . import helpers as paper_helpers
+import tempfile
+import time
+from io import StringIO
 
 class PaperTests(TestCase):
     def setUp(self):
@@ -463,4 +472,191 @@ class ViewPaperPDFTests(TestCase):
 
         # Remove test directory and contents
         if os.path.exists(self.test_papers_dir):
-            shutil.rmtree(os.path.dirname(self.test_papers_dir)) 
\ No newline at end of file
+            shutil.rmtree(os.path.dirname(self.test_papers_dir)) 
+
+class PaperFileGCTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.media_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.media_override.enable()
+        self.papers_dir = os.path.join(self.media.name, 'papers', 'paper')
+        os.makedirs(self.papers_dir)
+
+        self.admin = User.objects.create(first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        self.conference = Conference.objects.create(
+            title="Test Conference",
+            admin_id=self.admin,
+            deadline=timezone.now() + timedelta(days=30),
+            description="Test Description"
+        )
+        ConferenceRole.objects.create(user=self.admin, conference=self.conference, role='admin')
+
+    def tearDown(self):
+        self.media_override.disable()
+        self.media.cleanup()
+
+    def _write(self, name, age=7200):
+        path = os.path.join(self.papers_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b"%PDF-1.4 test")
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _paper(self, paper_file):
+        return Paper.objects.create(
+            title="Paper", conference=self.conference, author_id=self.admin, status_id='submitted', paper_file=paper_file
+        )
+
+    def _gc(self, *args):
+        out = StringIO()
+        call_command('gc_paper_files', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_orphans_only(self):
+        referenced = self._write('paper_file_1.pdf')
+        orphan = self._write('paper_file_2.pdf')
+        recent = self._write('paper_file_3.pdf', age=0)
+        self._paper('paper_file_1.pdf')
+
+        output = self._gc()
+
+        self.assertIn('papers/paper/paper_file_2.pdf', output)
+        self.assertNotIn('paper_file_1.pdf', output)
+        self.assertNotIn('paper_file_3.pdf', output)
+        self.assertIn('Dry run: 1 orphan file(s)', output)
+        for path in (referenced, orphan, recent):
+            self.assertTrue(os.path.exists(path))
+
+    def test_delete_removes_orphans_in_chunks(self):
+        orphans = [self._write(f'orphan_{i}.pdf') for i in range(5)]
+        referenced = [self._write(f'paper_{i}.pdf') for i in range(3)]
+        for i in range(3):
+            self._paper(f'paper_{i}.pdf')
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self._gc('--delete', '--chunk-size', '3')
+
+        # Una query per blocco di 3 file
+        self.assertEqual(len(queries.captured_queries), 3)
+        self.assertIn('Deleted 5 orphan file(s)', output)
+        for path in orphans:
+            self.assertFalse(os.path.exists(path))
+        for path in referenced:
+            self.assertTrue(os.path.exists(path))
+
+    def test_quarantine_moves_orphans(self):
+        orphan = self._write('orphan.pdf')
+        with tempfile.TemporaryDirectory() as quarantine:
+            output = self._gc('--quarantine', quarantine)
+
+            self.assertIn('Quarantined 1 orphan file(s)', output)
+            self.assertFalse(os.path.exists(orphan))
+            self.assertTrue(os.path.exists(os.path.join(quarantine, 'papers', 'paper', 'orphan.pdf')))
+
+    def test_uploaded_file_field_is_referenced(self):
+        paper = self._paper(SimpleUploadedFile("upload.pdf", b"%PDF-1.4 test", content_type="application/pdf"))
+        mtime = time.time() - 7200
+        os.utime(paper.paper_file.path, (mtime, mtime))
+
+        self.assertIn('Dry run: 0 orphan file(s)', self._gc())
+
+    def test_delete_paper_removes_file(self):
+        path = self._write('paper_file_1.pdf')
+        paper = self._paper('paper_file_1.pdf')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                reverse('delete_paper'),
+                data=json.dumps({'paper_id': paper.id, 'user_id': self.admin.id}),
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        paper_helpers._file_cleanup_executor.submit(lambda: None).result()
+        self.assertFalse(os.path.exists(path))
+
+    def test_create_paper_unknown_conference_leaves_no_file(self):
+        session = self.client.session
+        session['_auth_user_id'] = self.admin.id
+        session.save()
+
+        response = self.client.post(
+            reverse('create_paper'),
+            data=json.dumps({
+                'title': 'Paper', 'conference_id': 9999,
+                'paper_file': base64.b64encode(b"%PDF-1.4 test").decode('utf-8')
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(os.listdir(self.papers_dir), [])
+
+
+class AsyncPaperViewTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.author = User.objects.create(first_name="Author", last_name="User", email="author@example.com", password="x")
+        self.conference = Conference.objects.create(
+            title="Async Conference", admin_id=self.author, description="", deadline=timezone.now() + timedelta(days=7)
+        )
+        self.async_client.force_login(self.author)
+
+    async def test_create_paper_async(self):
+        response = await self.async_client.post(reverse('create_paper_async'), json.dumps({
+            "title": "Async paper",
+            "paper_file": base64.b64encode(b"%PDF-1.4 async").decode(),
+            "conference_id": self.conference.id
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        paper = await Paper.objects.aget(id=response.json()["paper_id"])
+        self.assertEqual(paper.author_id_id, self.author.id)
+        with open(paper_helpers.paper_file_path(paper.paper_file.name), 'rb') as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 async")
+
+    async def test_create_paper_async_unknown_conference(self):
+        response = await self.async_client.post(reverse('create_paper_async'), json.dumps({
+            "title": "Async paper", "paper_file": "", "conference_id": 999
+        }), content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_create_paper_async_invalid_base64(self):
+        response = await self.async_client.post(reverse('create_paper_async'), json.dumps({
+            "title": "Async paper", "paper_file": "not base64!", "conference_id": self.conference.id
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Invalid paper_file")
+        self.assertFalse(await Paper.objects.aexists())
+
+    async def test_create_paper_async_requires_login(self):
+        await self.async_client.alogout()
+        response = await self.async_client.post(reverse('create_paper_async'), "{}", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_view_paper_pdf_async_streams_in_chunks(self):
+        content = b"%PDF-1.4\n" + os.urandom(3 * 64 * 1024)
+        os.makedirs(os.path.join(self.media.name, 'papers', 'paper'))
+        with open(os.path.join(self.media.name, 'papers', 'paper', 'async.pdf'), 'wb') as f:
+            f.write(content)
+
+        response = await self.async_client.get(reverse('view_paper_pdf_async', args=['async.pdf']))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Length'], str(len(content)))
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="async.pdf"')
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(b''.join(chunks), content)
+        self.assertEqual(len(chunks), 4)
+
+    async def test_view_paper_pdf_async_errors(self):
+        missing = await self.async_client.get(reverse('view_paper_pdf_async', args=['missing.pdf']))
+        self.assertEqual(missing.status_code, 404)
+        wrong_type = await self.async_client.get(reverse('view_paper_pdf_async', args=['notes.txt']))
+        self.assertEqual(wrong_type.status_code, 400)
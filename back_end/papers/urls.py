@@ -6,6 +6,9 @@ urlpatterns = [
     path('list/', views.list_papers, name='list_papers'),
     path('conf_list/', views.list_conf_papers,  name='list_conf_papers'),
     path('paper/<str:filename>/', views.view_paper_pdf, name='view_paper_pdf'),
+    # Varianti async, per il deployment ASGI (back_end/asgi.py)
+    path('async/create/', views.create_paper_async, name='create_paper_async'),
+    path('async/paper/<str:filename>/', views.view_paper_pdf_async, name='view_paper_pdf_async'),
 
     path('delete/', views.delete_paper, name='delete_paper'),
 
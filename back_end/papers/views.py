@@ -1,26 +1,30 @@
-import base64
+import asyncio
 import json
 
 from reviews.models import Review
 from .models import Paper
+from .helpers import decode_paper_file, delete_paper_files, paper_file_path, save_paper_file
 from users.models import User
 from conference.models import Conference
 from conference_roles.models import ConferenceRole
-from django.http import JsonResponse
+from api.responses import JsonResponse
+from api.throttling import rate_limit
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files.storage import FileSystemStorage
-from django.core.files.base import ContentFile
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import openapi
+from api.schema import swagger_auto_schema
 from rest_framework.decorators import api_view
-from datetime import datetime
 import os
 from django.conf import settings
+from django.db import transaction
 from django.core.paginator import Paginator
 from django.core.paginator import EmptyPage
 from django.core.paginator import PageNotAnInteger
-from django.http import FileResponse
-from users.decorators import get_user
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_GET, require_POST
+from users.decorators import async_get_user, get_user
+
+PDF_CHUNK_SIZE = 64 * 1024
 
 
 @csrf_exempt
@@ -39,13 +43,15 @@ from users.decorators import get_user
     ),
     responses={
         201: openapi.Response(description="Paper added successfully"),
-        400: openapi.Response(description="Missing fields or request body is not valid JSON"),
+        400: openapi.Response(description="Missing fields, paper_file not valid base64 or request body is not valid JSON"),
         404: openapi.Response(description="Author or conference not found")
     }
 )
 @api_view(['POST'])
 @csrf_exempt
 @get_user
+# Stesso scope della variante async: a ridosso di papers_deadline gli upload non occupano tutti i worker
+@rate_limit('create_paper', rate='10/m', concurrency=2, global_concurrency=8)
 def create_paper(request):
     if request.method == 'POST':
         data = json.loads(request.body)
@@ -57,19 +63,17 @@ def create_paper(request):
         if title is None or conference_id is None:
             return JsonResponse({'error': 'Missing fields'}, status=400)
 
-        paper_file = base64.b64decode(paper_file)
-        current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
-        paper_file = ContentFile(paper_file, name=f'paper_file_{current_time}.pdf')
-
-        fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'papers', 'paper'))
-        filename = fs.save(paper_file.name, paper_file)
-        paper_file = fs.url(filename)
-
+        # La conferenza va verificata prima di salvare il file, altrimenti il PDF resta orfano su disco
         try: 
             conference = Conference.objects.get(id=conference_id)
         except Conference.DoesNotExist:
             return JsonResponse({'error': 'Conference not found'}, status=404)
 
+        content = decode_paper_file(paper_file)
+        if content is None:
+            return JsonResponse({'error': 'Invalid paper_file'}, status=400)
+        paper_file = save_paper_file(content)
+
         paper = Paper(title=title, paper_file=paper_file, author_id=author, conference=conference, status_id='submitted')
         paper.save()
         return JsonResponse({'message': 'Paper added successfully',
@@ -77,6 +81,41 @@ def create_paper(request):
     else:
         return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+
+@csrf_exempt
+@require_POST
+@async_get_user
+@rate_limit('create_paper', rate='10/m', concurrency=2, global_concurrency=8)
+async def create_paper_async(request):
+    """
+    Variante async di create_paper per il deployment ASGI: le query usano l'ORM async e la scrittura
+    del PDF avviene in un thread, così la richiesta non occupa un worker mentre aspetta il disco.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    title = data.get('title')
+    paper_file = data.get('paper_file')
+    conference_id = data.get('conference_id')
+
+    if title is None or conference_id is None or paper_file is None:
+        return JsonResponse({'error': 'Missing fields'}, status=400)
+
+    try:
+        conference = await Conference.objects.aget(id=conference_id)
+    except Conference.DoesNotExist:
+        return JsonResponse({'error': 'Conference not found'}, status=404)
+
+    content = decode_paper_file(paper_file)
+    if content is None:
+        return JsonResponse({'error': 'Invalid paper_file'}, status=400)
+    paper_file = await asyncio.to_thread(save_paper_file, content)
+    paper = await Paper.objects.acreate(title=title, paper_file=paper_file, author_id=request.user,
+                                        conference=conference, status_id='submitted')
+    return JsonResponse({'message': 'Paper added successfully',
+                         'paper_id': paper.id}, status=201)
+
 @csrf_exempt
 @swagger_auto_schema(
     method='post',
@@ -279,6 +318,39 @@ def view_paper_pdf(request, filename):
         return JsonResponse({"error": f"Error serving PDF: {str(e)}"}, status=500)
 
 
+async def _read_chunks(file_path, chunk_size=PDF_CHUNK_SIZE):
+    # open/read/close in un thread: il loop resta libero per le altre connessioni mentre si legge dal disco
+    pdf_file = await asyncio.to_thread(open, file_path, 'rb')
+    try:
+        while chunk := await asyncio.to_thread(pdf_file.read, chunk_size):
+            yield chunk
+    finally:
+        await asyncio.to_thread(pdf_file.close)
+
+
+@require_GET
+async def view_paper_pdf_async(request, filename):
+    """
+    Variante async di view_paper_pdf per il deployment ASGI: il PDF viene inviato a blocchi da un
+    generatore async, quindi un client lento occupa una coroutine invece di un thread del worker.
+    """
+    filename = os.path.basename(filename)
+    if not filename.lower().endswith('.pdf'):
+        return JsonResponse({"error": "Invalid file type"}, status=400)
+
+    file_path = paper_file_path(filename)
+    try:
+        size = (await asyncio.to_thread(os.stat, file_path)).st_size
+    except FileNotFoundError:
+        return JsonResponse({"error": f"File not found: {filename}"}, status=404)
+
+    response = StreamingHttpResponse(_read_chunks(file_path), content_type='application/pdf')
+    response['Content-Length'] = str(size)
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
 
 
 
@@ -417,5 +489,8 @@ def delete_paper(request):
     except Review.DoesNotExist:
         pass
 
+    paper_file = paper.paper_file.name
     paper.delete()
+    # Il PDF viene rimosso solo se la cancellazione del paper va a buon fine
+    transaction.on_commit(lambda: delete_paper_files([paper_file]))
     return JsonResponse({"message": "Paper deleted successfully"}, status=200)
\ No newline at end of file
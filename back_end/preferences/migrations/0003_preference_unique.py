@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_preferences(apps, schema_editor):
+    """Tiene solo la preferenza più recente di ogni reviewer per ogni paper prima di aggiungere il vincolo di unicità."""
+    Preference = apps.get_model('preferences', 'Preference')
+    keep_ids = Preference.objects.values('reviewer', 'paper').annotate(keep_id=Max('id')).values('keep_id')
+    Preference.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0001_initial'),
+        ('preferences', '0002_alter_preference_preference'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_preferences, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='preference',
+            constraint=models.UniqueConstraint(fields=('reviewer', 'paper'), name='unique_reviewer_paper_preference'),
+        ),
+    ]
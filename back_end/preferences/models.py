@@ -12,5 +12,11 @@ class Preference(models.Model):
     # not interested, interested
     preference = models.CharField(max_length=20, choices=PREFERENCE_CHOICES)
 
+    class Meta:
+        constraints = [
+            # Un reviewer esprime una sola preferenza per paper
+            models.UniqueConstraint(fields=['reviewer', 'paper'], name='unique_reviewer_paper_preference'),
+        ]
+
     def __str__(self):
         return f"preference for {self.paper} of {self.reviewer} score is: {self.preference})"
\ No newline at end of file
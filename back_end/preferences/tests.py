@@ -3,4 +3,54 @@ from django.urls import reverse
 from django.utils import timezone
 from django.test import TestCase, Client
 from rest_framework.test import APITestCase
+from conference.models import Conference
+from conference_roles.models import ConferenceRole
+from papers.models import Paper
+from users.models import User
+from .models import Preference
 
+
+
+class SavePreferencesTests(TestCase):
+    def setUp(self):
+        # save_preferences usa ancora l'utente con id 2 al posto di quello della sessione. Entrambi gli id
+        # sono espliciti: su PostgreSQL la sequenza non li conosce e potrebbe riassegnare il 2
+        self.admin = User.objects.create(id=1, first_name="Admin", last_name="User", email="admin@example.com", password="x")
+        self.reviewer = User.objects.create(id=2, first_name="Reviewer", last_name="User", email="reviewer@example.com", password="x")
+        self.conference = Conference.objects.create(
+            title="Conference", admin_id=self.admin, description="Description",
+            deadline=timezone.now() + timezone.timedelta(days=7)
+        )
+        ConferenceRole.objects.create(user=self.reviewer, conference=self.conference, role='reviewer')
+        self.papers = [
+            Paper.objects.create(title=f"Paper {i}", conference=self.conference, author_id=self.admin, status_id='submitted')
+            for i in range(2)
+        ]
+
+    def _save(self, preferences):
+        return self.client.post(reverse('save_preferences'), json.dumps({
+            'conference_id': self.conference.id, 'preferences': preferences
+        }), content_type='application/json')
+
+    def test_repeated_paper_keeps_last_preference(self):
+        response = self._save([
+            {'paper': self.papers[0].id, 'preference': 'interested'},
+            {'paper': self.papers[1].id, 'preference': 'interested'},
+            {'paper': str(self.papers[0].id), 'preference': 'not_interested'},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        saved = dict(Preference.objects.filter(reviewer=self.reviewer).values_list('paper_id', 'preference'))
+        self.assertEqual(saved, {self.papers[0].id: 'not_interested', self.papers[1].id: 'interested'})
+
+    def test_existing_preference_is_updated(self):
+        self._save([{'paper': self.papers[0].id, 'preference': 'interested'}])
+        self._save([{'paper': self.papers[0].id, 'preference': 'not_interested'}])
+
+        self.assertEqual(Preference.objects.get(reviewer=self.reviewer, paper=self.papers[0]).preference, 'not_interested')
+
+    def test_invalid_paper(self):
+        response = self._save([{'paper': 'abc', 'preference': 'interested'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Preference.objects.exists())
@@ -1,12 +1,13 @@
 import json
-from django.http import JsonResponse
+import logging
+from api.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 import csv
 import io
 from django.core.paginator import Paginator
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import openapi
+from api.schema import swagger_auto_schema
 from rest_framework import status
 from rest_framework.decorators import api_view
 from users.decorators import get_user
@@ -16,6 +17,9 @@ from users.models import User
 from .models import Preference, Paper
 from conference.models import Conference
 
+logger = logging.getLogger(__name__)
+
+
 @swagger_auto_schema(
     method='post',
     request_body=openapi.Schema(
@@ -49,8 +53,7 @@ def save_preferences(request):
     try:
         user = request.user
         user = User.objects.get(id = 2)
-        print(user)
-        print(request)
+        logger.debug("save_preferences", extra={'user_id': user.id, 'conference_id': conference_id})
         if not conference_id:
             return JsonResponse({'error': 'Missing conference_id'}, status=400)
 
@@ -65,17 +68,22 @@ def save_preferences(request):
                 "error": "User is not a reviewer in this conference"
             }, status=403)
         
+        # Un paper ripetuto nella richiesta vale una volta sola, con l'ultima preferenza: PostgreSQL
+        # rifiuta un ON CONFLICT DO UPDATE che aggiorna la stessa riga due volte
+        latest = {}
         for preference in preferences or []:
-            paper_id = preference.get('paper')
-            preference = preference.get('preference')
-            if not paper_id or not preference:
-                continue
-
-            Preference.objects.create(   
-                paper_id = paper_id,
-                reviewer = user,
-                preference = preference
-            )
+            if preference.get('paper') and preference.get('preference'):
+                try:
+                    paper_id = int(preference['paper'])
+                except (TypeError, ValueError):
+                    return JsonResponse({'error': 'Invalid paper'}, status=400)
+                latest[paper_id] = preference['preference']
+
+        # Una sola INSERT; se il reviewer aveva già espresso una preferenza per il paper viene aggiornata
+        Preference.objects.bulk_create([
+            Preference(paper_id=paper_id, reviewer=user, preference=value)
+            for paper_id, value in latest.items()
+        ], update_conflicts=True, unique_fields=['reviewer', 'paper'], update_fields=['preference'])
         return JsonResponse({
             'message': 'Preferences saved'
         }, status=201)
@@ -148,22 +156,11 @@ def add_preference(request):
         if Preference.objects.filter(reviewer=reviewer, paper=paper, preference=type_preference).exists():
             return JsonResponse({'error': 'Preference already exists'}, status=409)
         
-        # Elimina la preferenza opposta se esiste
-        opposite_preferences = {
-            'interested': ['not_interested'],
-            'not_interested': ['interested']
-        }
-        Preference.objects.filter(
-            reviewer=reviewer,
-            paper=paper,
-            preference__in=opposite_preferences.get(type_preference, [])
-        ).delete()
-
-        # Aggiungi la preferenza
-        Preference.objects.create(
+        # Aggiungi la preferenza, sostituendo quella opposta se esiste
+        Preference.objects.update_or_create(
             paper=paper,
             reviewer=reviewer,
-            preference=type_preference
+            defaults={'preference': type_preference}
         )
 
         return JsonResponse({'message': 'Preference added successfully'}, status=201)
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0001_initial'),
+        ('reviews', '0005_remove_reviewitem_paper_reviewitem_review'),
+        ('users', '0002_user_last_login'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['paper', 'user'], name='review_paper_user_idx'),
+        ),
+    ]
@@ -11,6 +11,12 @@ class Review(models.Model):
     confidence_level = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # has_been_reviewed e i controlli "hai già recensito questo paper"
+            models.Index(fields=['paper', 'user'], name='review_paper_user_idx'),
+        ]
+
     def __str__(self):
         return f"Review for {self.paper.title} by {self.user.first_name} {self.user.last_name} - Score: {self.score}"
     
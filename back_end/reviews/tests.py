@@ -10,6 +10,8 @@ import json
 from django.contrib.auth import get_user_model
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.test import RequestFactory
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 class GetUserReviewsTest(TestCase):
     def setUp(self):
@@ -422,4 +424,121 @@ class CreateReviewTest(TestCase):
         )
 
         self.assertEqual(response.status_code, 400)
-        self.assertEqual(Review.objects.count(), 1)
\ No newline at end of file
+        self.assertEqual(Review.objects.count(), 1)
+
+class HasBeenReviewedBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            first_name="Test",
+            last_name="User",
+            email="testuser@example.com",
+            password="testpassword"
+        )
+
+        self.conference = Conference.objects.create(
+            title="Test Conference",
+            admin_id=self.user,
+            created_at=timezone.now(),
+            deadline=timezone.now() + timezone.timedelta(days=30),
+            description="A test conference"
+        )
+
+        self.papers = [
+            Paper.objects.create(
+                title=f"Test Paper {i}",
+                paper_file=None,
+                conference=self.conference,
+                author_id=self.user,
+                status_id="submitted"
+            )
+            for i in range(3)
+        ]
+
+        Review.objects.create(
+            paper=self.papers[1],
+            user=self.user,
+            comment_text="Great paper!",
+            score=5,
+            confidence_level=5
+        )
+
+        self.url = reverse('has_been_reviewed_batch')
+        self.client = Client()
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['_auth_user_id'] = self.user.id
+        session.save()
+
+    def test_batch_by_paper_ids(self):
+        """Test per verificare la mappa restituita a partire da una lista di paper_ids."""
+        paper_ids = [paper.id for paper in self.papers]
+        response = self.client.post(
+            self.url,
+            data=json.dumps({"paper_ids": paper_ids}),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["has_been_reviewed"], {
+            str(self.papers[0].id): False,
+            str(self.papers[1].id): True,
+            str(self.papers[2].id): False,
+        })
+
+    def test_batch_by_conference(self):
+        """Test per verificare la mappa restituita per tutti i paper di una conferenza."""
+        response = self.client.post(
+            self.url,
+            data=json.dumps({"conference_id": self.conference.id}),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["has_been_reviewed"]
+        self.assertEqual(len(data), 3)
+        self.assertTrue(data[str(self.papers[1].id)])
+        self.assertFalse(data[str(self.papers[0].id)])
+
+    def test_batch_single_query(self):
+        """Test per verificare che la verifica richieda una sola query sulle recensioni."""
+        paper_ids = [paper.id for paper in self.papers]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                self.url,
+                data=json.dumps({"paper_ids": paper_ids}),
+                content_type="application/json"
+            )
+        review_queries = [q for q in queries.captured_queries if 'reviews_review' in q['sql']]
+        self.assertEqual(len(review_queries), 1)
+
+    def test_batch_invalid_ids(self):
+        """Test per verificare che id non interi restituiscano 400 e non un errore del server."""
+        for body in (
+            {"conference_id": "abc"},
+            {"conference_id": [1]},
+            {"paper_ids": [self.papers[0].id, "abc"]},
+            {"paper_ids": [True]},
+            {"paper_ids": [1.5]},
+            ["not", "an", "object"],
+        ):
+            response = self.client.post(self.url, data=json.dumps(body), content_type="application/json")
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_batch_string_ids(self):
+        """Test per verificare che gli id inviati come stringhe vengano accettati."""
+        response = self.client.post(
+            self.url,
+            data=json.dumps({"paper_ids": [str(self.papers[1].id)]}),
+            content_type="application/json"
+        )
+        self.assertEqual(response.json()["has_been_reviewed"], {str(self.papers[1].id): True})
+
+    def test_batch_missing_fields(self):
+        """Test per verificare la gestione di una richiesta senza paper_ids e conference_id."""
+        response = self.client.post(
+            self.url,
+            data=json.dumps({}),
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
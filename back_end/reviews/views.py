@@ -1,7 +1,7 @@
 import json
 from django.core.paginator import Paginator
-from django.http import JsonResponse
-from drf_yasg.openapi import Response
+from django.db.models import Exists, OuterRef
+from api.responses import JsonResponse
 from rest_framework import status
 
 from papers.models import Paper
@@ -10,10 +10,13 @@ from conference_roles.models import ConferenceRole
 from comments.models import Comment
 from .models import Review, ReviewItem, ReviewTemplateItem
 from django.views.decorators.csrf import csrf_exempt
-from drf_yasg import openapi
+from api.schema import openapi
 from rest_framework.decorators import api_view
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import swagger_auto_schema
 from users.decorators import get_user
+from database.decorators import read_replica
+from api.decorators import conditional
+from api.helpers import as_int
 
 import logging
 logger = logging.getLogger(__name__)
@@ -162,6 +165,26 @@ esempio di risposta json della funzione:
     ]
 }
 '''
+
+
+def paper_reviews_tags(request):
+    """Tag delle risorse mostrate da get_paper_reviews: review del paper e ruoli/template della sua conferenza."""
+    paper_id = request.GET.get('paper_id')
+    if not paper_id or not paper_id.isdigit():
+        return None
+    conference_id = Paper.objects.filter(id=paper_id).values_list('conference_id', flat=True).first()
+    if conference_id is None:
+        return None
+    return [f'paper:{paper_id}', f'conference:{conference_id}', 'users']
+
+
+def paper_reviews_roles(request):
+    """get_paper_reviews dipende solo dai ruoli dell'utente nella conferenza: chi ha gli stessi ruoli condivide la cache."""
+    return tuple(sorted(ConferenceRole.objects.filter(
+        user=request.user, conference__papers__id=request.GET.get('paper_id')
+    ).values_list('role', flat=True).distinct()))
+
+
 @swagger_auto_schema(
     method='get',
     operation_description="Restituisce una lista di recensioni per un paper specifico con dettagli sugli utenti e paginazione.",
@@ -208,8 +231,10 @@ esempio di risposta json della funzione:
     }
 )
 @api_view(['GET'])
+@read_replica
 @csrf_exempt
 @get_user
+@conditional(paper_reviews_tags, vary_func=paper_reviews_roles, cache=True)
 def get_paper_reviews(request): 
     """Restituisce una lista di recensioni di un paper specifico, con dettagli sugli utenti e paginazione."""
 
@@ -397,14 +422,12 @@ def create_review(request):
         confidence_level = data.get('confidence_level')
         reviewItemList = data.get('reviewItemList')
 
-        print("DEBUGGING THE CREATE NOW")
-        print ([
-            paper_id,
-            comment_text,
-            score,
-            confidence_level,
-            reviewItemList
-        ])
+        logger.debug("create_review", extra={
+            'paper_id': paper_id,
+            'score': score,
+            'confidence_level': confidence_level,
+            'review_items': len(reviewItemList or []),
+        })
 
         if not all([paper_id, comment_text, score]):
             return JsonResponse({"error": "Tutti i campi sono obbligatori"}, status=status.HTTP_400_BAD_REQUEST)
@@ -511,8 +534,7 @@ def update_review(request, review_id):
     try:
         data = request.data
         review = Review.objects.get(id=review_id)
-        print("DEBUGGING THE UPDATE NOW")
-        print (request)
+        logger.debug("update_review", extra={'review_id': review_id, 'user_id': request.user.id})
 
 
         # Check for user authorization
@@ -580,15 +602,13 @@ def update_review(request, review_id):
 def delete_review(request, review_id):
     """Elimina una recensione esistente."""
     try:
-        print("==== DEBUG DELETE REVIEW ====")
-        print(f"Request User: {request.user}")
-        print(f"Request User ID: {request.user.id}")
-        print(f"Is authenticated: {request.user.is_authenticated}")
-
         review = Review.objects.get(id=review_id)
-        print(f"Review User ID: {review.user.id}")
-        print(f"Are IDs equal?: {request.user.id == review.user.id}")
-        print("========================")
+        logger.debug("delete_review", extra={
+            'review_id': review_id,
+            'user_id': request.user.id,
+            'review_user_id': review.user_id,
+            'authenticated': request.user.is_authenticated,
+        })
 
 
 
@@ -603,7 +623,7 @@ def delete_review(request, review_id):
     except Review.DoesNotExist:
         return JsonResponse({"error": "Recensione non trovata"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        print(f"Exception in delete_review: {str(e)}")
+        logger.warning("delete_review failed: %s", e, extra={'review_id': review_id})
         return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -714,6 +734,85 @@ def has_been_reviewed(request):
         return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+## batch version of has_been_reviewed: given many papers (or a whole conference), returns for each paper
+## whether the logged-in user has already reviewed it, using a single query
+'''  esempio richiesta post
+POST /reviews/hasbeenreviewed/batch/
+{
+    "paper_ids": [1, 2, 3]
+}
+oppure
+{
+    "conference_id": 4
+}
+esempio risposta:
+{
+    "has_been_reviewed": {
+        "1": true,
+        "2": false,
+        "3": false
+    }
+}
+'''
+@swagger_auto_schema(
+    method='post',
+    operation_description="Verifica, per più paper (o per tutti i paper di una conferenza), se l'utente loggato li ha già recensiti.",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'paper_ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER), description="Lista degli ID dei paper"),
+            'conference_id': openapi.Schema(type=openapi.TYPE_INTEGER, description="ID della conferenza (alternativo a paper_ids)")
+        }
+    ),
+    responses={
+        200: openapi.Response(
+            description="Mappa paper_id -> True se l'utente ha già recensito il paper, False altrimenti",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'has_been_reviewed': openapi.Schema(type=openapi.TYPE_OBJECT, additional_properties=openapi.Schema(type=openapi.TYPE_BOOLEAN))
+                }
+            )
+        ),
+        400: "Richiesta non valida"
+    }
+)
+@api_view(['POST'])
+@csrf_exempt
+@get_user
+def has_been_reviewed_batch(request):
+    """Restituisce, con una sola query, quali paper sono già stati recensiti dall'utente loggato."""
+    data = request.data
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "paper_ids o conference_id sono obbligatori"}, status=status.HTTP_400_BAD_REQUEST)
+    paper_ids = data.get('paper_ids')
+    conference_id = data.get('conference_id')
+
+    if conference_id:
+        conference_id = as_int(conference_id)
+        if conference_id is None:
+            return JsonResponse({"error": "conference_id deve essere un intero"}, status=status.HTTP_400_BAD_REQUEST)
+        # Un'unica query: tutti i paper della conferenza con un flag EXISTS sulle recensioni dell'utente
+        rows = Paper.objects.filter(conference_id=conference_id).annotate(
+            reviewed=Exists(Review.objects.filter(paper_id=OuterRef('pk'), user=request.user))
+        ).values_list('id', 'reviewed')
+        reviewed_map = {str(paper_id): reviewed for paper_id, reviewed in rows}
+        return JsonResponse({"has_been_reviewed": reviewed_map}, status=status.HTTP_200_OK)
+
+    if not isinstance(paper_ids, list) or not paper_ids:
+        return JsonResponse({"error": "paper_ids o conference_id sono obbligatori"}, status=status.HTTP_400_BAD_REQUEST)
+
+    paper_ids = [as_int(paper_id) for paper_id in paper_ids]
+    if None in paper_ids:
+        return JsonResponse({"error": "paper_ids deve contenere solo interi"}, status=status.HTTP_400_BAD_REQUEST)
+
+    reviewed = set(
+        Review.objects.filter(user=request.user, paper_id__in=paper_ids).values_list('paper_id', flat=True)
+    )
+    reviewed_map = {str(paper_id): paper_id in reviewed for paper_id in paper_ids}
+    return JsonResponse({"has_been_reviewed": reviewed_map}, status=status.HTTP_200_OK)
+
+
 
 @api_view(['GET'])
 @csrf_exempt
@@ -1,12 +1,16 @@
+import logging
+
 from django.contrib.sessions.models import Session
-from django.http import JsonResponse
+from api.responses import JsonResponse
 from users.models import User
 
+logger = logging.getLogger(__name__)
+
 def get_user(func):
     def wrapper(*args, **kwargs):
         if args:
-            print(args)
             request = args[0]
+            logger.debug("get_user %s %s", request.method, request.path)
             session_key = request.session
 
             if (session_key):
@@ -24,4 +28,19 @@ def get_user(func):
         # Call the original function with the modified arguments
         return func(*args, **kwargs)
     
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def async_get_user(func):
+    """Come get_user, per le view async: sessione e utente vengono letti con l'ORM async."""
+    async def wrapper(request, *args, **kwargs):
+        user_id = await request.session.aget('_auth_user_id')
+        if not user_id:
+            return JsonResponse({"error": "User Must be logged in"}, status=400)
+        try:
+            request.user = await User.objects.aget(id=user_id)
+        except User.DoesNotExist:
+            return JsonResponse({"error": "User not found"}, status=400)
+        return await func(request, *args, **kwargs)
+
+    return wrapper
@@ -1,12 +1,13 @@
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse
+from api.responses import JsonResponse
 from django.contrib.auth import login
 from django.contrib.auth.hashers import make_password, check_password
 from .models import User
 from django.views.decorators.csrf import csrf_exempt
 from django.db import IntegrityError
 import json
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from api.schema import openapi
+from api.schema import swagger_auto_schema
 from rest_framework import status
 from rest_framework.decorators import api_view
 